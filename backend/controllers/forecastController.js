@@ -1,3 +1,4 @@
+import crypto from 'crypto';
 import fs from 'fs';
 import path from 'path';
 import { fileURLToPath } from 'url';
@@ -5,52 +6,134 @@ import { fileURLToPath } from 'url';
 const __filename = fileURLToPath(import.meta.url);
 const __dirname = path.dirname(__filename);
 
+// Artifact published by price_prediction/models/forecast_all_vegetables.py:
+// latest.json is the manifest naming the current forecast-<version>.json, which
+// already holds the grouped response. Both are replaced atomically.
+const FORECASTS_DIR = path.join(__dirname, '..', '..', 'price_prediction', 'data', 'forecasts');
+const MANIFEST_PATH = path.join(FORECASTS_DIR, 'latest.json');
+// Committed forecast CSV, served until an artifact has been published
+const CSV_PATH = path.join(FORECASTS_DIR, 'next_7_days_forecast.csv');
+
+// Last artifact read; reused until its file's mtime changes
+let cachedArtifact = null;
+
+const statOrNull = async (file) => {
+  try {
+    return await fs.promises.stat(file);
+  } catch (error) {
+    if (error.code === 'ENOENT') return null;
+    throw error;
+  }
+};
+
+const readPublished = async () => {
+  const manifest = JSON.parse(await fs.promises.readFile(MANIFEST_PATH, 'utf8'));
+  const body = await fs.promises.readFile(path.join(FORECASTS_DIR, manifest.file));
+  return { version: manifest.version, generatedAt: new Date(manifest.generated_at), body };
+};
+
+// Same document as a published artifact, grouped from the CSV's
+// date,vegetable,predicted_price rows (parsed once per CSV version)
+const readCsv = async (mtimeMs) => {
+  const lines = (await fs.promises.readFile(CSV_PATH, 'utf8')).trim().split('\n');
+  const headers = lines[0].split(',').map(h => h.trim());
+  const grouped = new Map();
+  for (const line of lines.slice(1)) {
+    const values = line.split(',').map(v => v.trim());
+    const row = Object.fromEntries(headers.map((header, i) => [header, values[i]]));
+    if (!grouped.has(row.vegetable)) grouped.set(row.vegetable, []);
+    grouped.get(row.vegetable).push({ date: row.date, price: parseFloat(row.predicted_price) });
+  }
+  const document = [...grouped].map(([vegetable, forecast]) => ({ vegetable, forecast }));
+  const body = Buffer.from(JSON.stringify(document));
+  const version = crypto.createHash('sha256').update(body).digest('hex').slice(0, 16);
+  return { version, generatedAt: new Date(mtimeMs), body };
+};
+
+// The published artifact, else the CSV; null if there is neither
+const loadArtifact = async () => {
+  let source = MANIFEST_PATH;
+  let read = readPublished;
+  let stat = await statOrNull(MANIFEST_PATH);
+  if (!stat) {
+    source = CSV_PATH;
+    read = readCsv;
+    stat = await statOrNull(CSV_PATH);
+  }
+  if (!stat) return null;
+
+  if (cachedArtifact && cachedArtifact.source === source && cachedArtifact.mtimeMs === stat.mtimeMs) {
+    return cachedArtifact;
+  }
+  cachedArtifact = { source, mtimeMs: stat.mtimeMs, ...(await read(stat.mtimeMs)) };
+  return cachedArtifact;
+};
+
+// Long-lived Python forecast service (price_prediction/models/forecast_service.py)
+const FORECAST_SERVICE_URL =
+  process.env.FORECAST_SERVICE_URL || "http://127.0.0.1:8002";
+
+// Ask the forecast service for a fresh forecast. Returns { status, body } for
+// a forecast or a client error (unknown vegetable, too many days), and null if
+// the service is unreachable or failing
+const fetchLiveForecast = async (query) => {
+  const params = new URLSearchParams();
+  if (query.vegetable) params.set("vegetable", query.vegetable);
+  if (query.days) params.set("days", query.days);
+
+  try {
+    const response = await fetch(`${FORECAST_SERVICE_URL}/forecast?${params}`, {
+      signal: AbortSignal.timeout(3000),
+    });
+    if (response.status >= 500) return null;
+    return { status: response.status, body: await response.json() };
+  } catch (error) {
+    return null;
+  }
+};
+
+// The artifact's document narrowed to ?vegetable= and the first ?days= days
+const filterForecast = (document, query) => {
+  let result = document;
+  if (query.vegetable) {
+    result = result.filter(item => item.vegetable === query.vegetable);
+  }
+  const days = parseInt(query.days, 10);
+  if (days > 0) {
+    result = result.map(item => ({ ...item, forecast: item.forecast.slice(0, days) }));
+  }
+  return result;
+};
+
 export const getForecast = async (req, res) => {
   try {
-    // Path to the CSV file relative to this controller
-    // Controller is in backend/controllers/
-    // CSV is in price_prediction/data/forecasts/
-    const csvPath = path.join(__dirname, '..', '..', 'price_prediction', 'data', 'forecasts', 'next_7_days_forecast.csv');
+    const live = await fetchLiveForecast(req.query);
+    if (live) {
+      return res.status(live.status).json(live.body);
+    }
 
-    if (!fs.existsSync(csvPath)) {
+    // Service unreachable: fall back to the last published forecast
+    const artifact = await loadArtifact();
+    if (!artifact) {
       return res.status(404).json({ message: "Forecast data not found" });
     }
 
-    const fileContent = fs.readFileSync(csvPath, 'utf8');
-    const lines = fileContent.trim().split('\n');
-    
-    // Simple CSV parsing
-    const headers = lines[0].split(',').map(h => h.trim());
-    const data = lines.slice(1).map(line => {
-      const values = line.split(',').map(v => v.trim());
-      const obj = {};
-      headers.forEach((header, index) => {
-        obj[header] = values[index];
-      });
-      return obj;
-    });
-
-    // Group by vegetable for easier consumption on frontend
-    const groupedData = data.reduce((acc, item) => {
-      if (!acc[item.vegetable]) {
-        acc[item.vegetable] = [];
+    if (req.query.vegetable || req.query.days) {
+      artifact.document ??= JSON.parse(artifact.body);
+      const result = filterForecast(artifact.document, req.query);
+      if (!result.length) {
+        return res.status(404).json({ message: `No forecast for vegetable '${req.query.vegetable}'` });
       }
-      acc[item.vegetable].push({
-        date: item.date,
-        price: parseFloat(item.predicted_price)
-      });
-      return acc;
-    }, {});
-
-    // Convert back to array of objects for easier mapping
-    const result = Object.keys(groupedData).map(veg => ({
-      vegetable: veg,
-      forecast: groupedData[veg]
-    }));
-
-    res.json(result);
+      return res.json(result);
+    }
+
+    // Unfiltered: the document as-is. The version is the ETag, so unchanged
+    // forecasts get a 304 (Express checks If-None-Match).
+    res.set('ETag', `"${artifact.version}"`);
+    res.set('Last-Modified', artifact.generatedAt.toUTCString());
+    res.type('json').send(artifact.body);
   } catch (error) {
-    console.error("Error reading forecast CSV:", error);
+    console.error("Error reading forecast artifact:", error);
     res.status(500).json({ message: "Error reading forecast data" });
   }
 };
@@ -0,0 +1,160 @@
+"""Cold start of the chat app: time to first health response and first answer.
+
+Generates guide-like PDFs into a temporary data directory, then starts the app
+(main_pdf_rag by default) there in a subprocess with fake_genai.FakeClient in
+place of the Gemini client. From the moment the process is spawned it measures:
+
+    health   first 200 from `/`
+    ready    `/` reports the knowledge base as ready
+    answer   first /chat sent right after `health`, fully streamed back
+
+Runs:
+    blocking  the knowledge base loaded before the server starts serving
+              (the old startup), on a fresh data directory
+    cold      background loading, fresh data directory: no snapshot, no
+              embedding cache, so every PDF is read and embedded
+    warm      background loading, restarted on the data directory the cold
+              run left behind: the saved snapshot is loaded, no PDF is read
+
+    cd chatapp/benchmarks
+    python bench_cold_start.py --pdfs 4 --pages 100
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from bench_pdf_ingest import make_pdf
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+
+def serve(args):
+    """Run the app on args.port from the current directory (subprocess entry point)."""
+    import importlib
+
+    import uvicorn
+
+    from fake_genai import FakeClient
+
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+    os.environ.setdefault("RAG_WATCH_INTERVAL", "0")
+    mod = importlib.import_module(args.app)
+    mod.client = FakeClient(latency=args.embed_latency, ttft=args.ttft, token_delay=0.0, tokens=5)
+    if args.blocking:
+        start = mod.load_knowledge_base
+
+        def load_before_serving():
+            # Import what the loader would import in the background, then wait
+            from google import genai  # noqa: F401
+            start()
+            mod.loader._ready.wait()
+
+        mod.load_knowledge_base = load_before_serving
+    uvicorn.run(mod.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def get(url, timeout=5):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def measure(args, workdir, blocking):
+    """Seconds from spawn to (health, ready, answer) for one start in workdir."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+        "--app", args.app, "--embed-latency", str(args.embed_latency), "--ttft", str(args.ttft),
+    ] + (["--blocking"] if blocking else [])
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=workdir, stdout=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                status = get(url + "/", timeout=1)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if proc.poll() is not None or time.perf_counter() - t0 > args.timeout:
+                    raise RuntimeError("server did not start")
+                time.sleep(0.01)
+        health = time.perf_counter() - t0
+        ready = health if status.get("knowledge_base") == "ready" else None
+
+        request = urllib.request.Request(
+            url + "/chat", data=json.dumps({"message": "How do I prune apple trees?"}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(request, timeout=args.timeout) as response:
+            response.read()
+        answer = time.perf_counter() - t0
+
+        while ready is None:
+            if get(url + "/").get("knowledge_base") == "ready":
+                ready = time.perf_counter() - t0
+            elif time.perf_counter() - t0 > args.timeout:
+                break
+            else:
+                time.sleep(0.05)
+        chunks = get(url + "/").get("chunks_loaded")
+        return health, ready, answer, chunks
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdfs", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=100, help="pages per PDF")
+    parser.add_argument("--app", default="main_pdf_rag", help="app module to start")
+    parser.add_argument("--embed-latency", type=float, default=0.3, help="seconds per embed call")
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--blocking", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdfs = os.path.join(tmp, "pdfs")
+        os.makedirs(pdfs)
+        for i in range(args.pdfs):
+            make_pdf(os.path.join(pdfs, f"guide_{i}.pdf"), args.pages, seed=i)
+
+        def fresh(name):
+            workdir = os.path.join(tmp, name)
+            shutil.copytree(pdfs, os.path.join(workdir, "data"))
+            return workdir
+
+        runs = [("blocking", fresh("blocking"), True), ("cold", fresh("background"), False)]
+        runs.append(("warm", runs[-1][1], False))
+
+        print(f"{args.app}: {args.pdfs} PDFs x {args.pages} pages, embed call "
+              f"{args.embed_latency * 1000:.0f} ms, TTFT {args.ttft * 1000:.0f} ms\n")
+        print(f"{'run':<9} {'health (s)':>11} {'ready (s)':>10} {'answer (s)':>11} {'chunks':>7}")
+        for name, workdir, blocking in runs:
+            health, ready, answer, chunks = measure(args, workdir, blocking)
+            ready = f"{ready:.2f}" if ready is not None else "-"
+            print(f"{name:<9} {health:>11.2f} {ready:>10} {answer:>11.2f} {chunks:>7}")
+
+
+if __name__ == "__main__":
+    main()
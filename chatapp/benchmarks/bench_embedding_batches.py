@@ -0,0 +1,52 @@
+"""Indexing throughput: one embed_content call per chunk vs batched requests.
+
+Runs embedding.embed_texts against fake_genai.FakeClient, which sleeps a fixed
+per-request latency plus a small per-chunk cost, so no API key or network is
+needed. The first row reproduces the old loop (batch 1, one at a time).
+
+    cd chatapp/benchmarks
+    python bench_embedding_batches.py --chunks 300 --latency 0.05
+    python bench_embedding_batches.py --fail-rate 0.2   # exercise retries
+"""
+import argparse
+import os
+import sys
+import time
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+from embedding import embed_texts  # noqa: E402
+from fake_genai import FakeClient  # noqa: E402
+
+CONFIGS = [(1, 1), (1, 4), (20, 1), (100, 1), (20, 4), (100, 4), (20, 8)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--per-item", type=float, default=0.0005, help="seconds per chunk")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    texts = [f"chunk {i}: " + "lorem ipsum dolor sit amet " * 20 for i in range(args.chunks)]
+
+    print(f"{args.chunks} chunks, {args.latency * 1000:.0f} ms/request, "
+          f"fail rate {args.fail_rate:.0%}\n")
+    print(f"{'batch':>6} {'conc':>5} {'requests':>9} {'time (s)':>9} "
+          f"{'chunks/s':>9} {'failed':>7}")
+    for batch_size, concurrency in CONFIGS:
+        client = FakeClient(latency=args.latency, per_item=args.per_item,
+                            fail_rate=args.fail_rate)
+        t0 = time.perf_counter()
+        vectors = embed_texts(client, "fake", texts, batch_size=batch_size,
+                              concurrency=concurrency, backoff=0.01)
+        elapsed = time.perf_counter() - t0
+        failed = sum(v is None for v in vectors)
+        print(f"{batch_size:>6} {concurrency:>5} {client.models.calls:>9} {elapsed:>9.2f} "
+              f"{args.chunks / elapsed:>9.0f} {failed:>7}")
+
+
+if __name__ == "__main__":
+    main()
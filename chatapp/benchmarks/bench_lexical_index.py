@@ -0,0 +1,115 @@
+"""Hybrid retrieval: BM25 index size/speed and exact-term recall vs vectors alone.
+
+Builds a synthetic library of guide-like chunks (common farming words plus a
+few product names and doses, each in exactly one chunk). A chunk's
+"embedding" is the mean of per-word random vectors, which, like a real
+embedding, is dominated by the many common words, so one rare term barely
+moves it.
+
+Queries ask for one product name and dose ("mancozeb-17 dose 2.5 g/l for
+apple"). Recall@k counts the queries whose chunk is in the top k for:
+vector search only, BM25 only, and the two fused with reciprocal rank fusion
+(KnowledgeBase.hybrid_search). Latencies are medians per query; the BM25 build
+time and posting-list bytes are what each reindex adds.
+
+    cd chatapp/benchmarks
+    python bench_lexical_index.py --sizes 10000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+from knowledge_base import KnowledgeBase, normalize  # noqa: E402
+from lexical_index import BM25Index  # noqa: E402
+
+WORDS = ("apple cabbage soil compost prune irrigation seedling nursery spray fungicide "
+         "harvest yield spacing fertilizer nitrogen potash mulch orchard pest water plant "
+         "leaf root winter summer week day tree field crop disease control apply per").split()
+PRODUCTS = ("mancozeb carbendazim chlorpyrifos imidacloprid captan copper-oxychloride "
+            "dithane hexaconazole propiconazole thiram").split()
+
+
+def make_library(n, rng, words_per_chunk=150):
+    """(contents, needles): needles[i] is the product phrase only chunk i contains."""
+    contents, needles = [], []
+    for i in range(n):
+        words = list(rng.choice(WORDS, size=words_per_chunk))
+        phrase = f"{PRODUCTS[i % len(PRODUCTS)]}-{i} dose {rng.integers(1, 9)}.{rng.integers(0, 9)} g/l"
+        words.insert(int(rng.integers(0, words_per_chunk)), phrase)
+        contents.append(" ".join(words))
+        needles.append(phrase)
+    return contents, needles
+
+
+def embed(texts, word_vectors):
+    """Mean of the vectors of each text's words (unknown words get a fresh random vector)."""
+    dim = len(next(iter(word_vectors.values())))
+    rng = np.random.default_rng(1)
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for i, text in enumerate(texts):
+        words = text.split()
+        for w in words:
+            if w not in word_vectors:
+                word_vectors[w] = rng.standard_normal(dim).astype(np.float32)
+        out[i] = np.mean([word_vectors[w] for w in words], axis=0)
+    return out
+
+
+def timed(fn, queries):
+    results, times = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        results.append(fn(q))
+        times.append(time.perf_counter() - t0)
+    return results, 1000 * statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    word_vectors = {w: rng.standard_normal(args.dim).astype(np.float32) for w in WORDS}
+    print(f"{'chunks':>8} {'bm25 build (s)':>15} {'postings (MB)':>14} {'terms':>8} | "
+          f"{'recall@k vector':>16} {'bm25':>6} {'hybrid':>7} | "
+          f"{'ms vector':>10} {'bm25':>6} {'hybrid':>7}")
+    for n in args.sizes:
+        contents, needles = make_library(n, rng)
+        embeddings = embed(contents, word_vectors)
+
+        kb = KnowledgeBase(contents, ["synthetic.pdf"] * n, embeddings)
+        # KnowledgeBase builds both indexes; time the BM25 part on its own
+        t0 = time.perf_counter()
+        BM25Index(kb.contents)
+        build = time.perf_counter() - t0
+
+        picks = rng.choice(n, size=args.queries, replace=False)
+        queries = [f"{needles[i]} for apple" for i in picks]
+        query_vectors = normalize(embed(queries, word_vectors))
+
+        def recall(results):
+            return np.mean([contents[i] in [c for _, c, _ in r] for i, r in zip(picks, results)])
+
+        vector, vector_ms = timed(lambda j: kb.search(query_vectors[j], args.top_k), range(len(queries)))
+        lexical, lexical_ms = timed(lambda j: kb.search_lexical(queries[j], args.top_k), range(len(queries)))
+        hybrid, hybrid_ms = timed(
+            lambda j: kb.hybrid_search(queries[j], query_vectors[j], args.top_k), range(len(queries))
+        )
+        print(f"{n:>8} {build:>15.2f} {kb.lexical.nbytes / 2**20:>14.1f} {len(kb.lexical.vocab):>8} | "
+              f"{recall(vector):>16.2f} {recall(lexical):>6.2f} {recall(hybrid):>7.2f} | "
+              f"{vector_ms:>10.2f} {lexical_ms:>6.2f} {hybrid_ms:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
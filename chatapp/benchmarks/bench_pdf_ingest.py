@@ -0,0 +1,113 @@
+"""PDF ingestion: whole-text concatenation + "\\n\\n" split vs ingest.py streaming.
+
+Generates guide-like PDFs with reportlab (paragraphs of varying length, some
+short headings, a page break every ~4 paragraphs), then ingests each one in
+a fresh interpreter and reports wall time, peak RSS and the chunk size
+distribution. Extraction text has few blank lines, so the old "\n\n" split
+yields roughly one chunk per page, of any size.
+
+    cd chatapp/benchmarks
+    python bench_pdf_ingest.py --pages 250 1000 --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+WORDS = ("apple cabbage soil compost prune irrigation seedling nursery spray mancozeb "
+         "fungicide harvest yield spacing fertilizer nitrogen potash mulch orchard pest").split()
+
+
+def make_pdf(path, pages, seed=0):
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+    rng = random.Random(seed)
+    styles = getSampleStyleSheet()
+    story = []
+    for page in range(pages):
+        story.append(Paragraph(f"Section {page + 1}", styles["Heading2"]))
+        for _ in range(4):
+            words = [rng.choice(WORDS) for _ in range(rng.choice([8, 40, 120, 300]))]
+            story.append(Paragraph(" ".join(words).capitalize() + ".", styles["BodyText"]))
+        story.append(PageBreak())
+    SimpleDocTemplate(path).build(story)
+
+
+def legacy_chunks(pdf_path):
+    from pypdf import PdfReader
+
+    full_text = ""
+    for page in PdfReader(pdf_path).pages:
+        page_text = page.extract_text()
+        if page_text:
+            full_text += page_text + "\n"
+    return [p.strip() for p in full_text.split("\n\n") if len(p.strip()) > 50]
+
+
+def run(mode, pdf_path, workers):
+    """Ingest in this process and print a JSON result (child entry point)."""
+    import resource
+    import time
+
+    import ingest
+
+    # Only chunk lengths are kept, as the knowledge base keeps the chunks
+    # anyway; peak RSS then reflects the extraction itself
+    t0 = time.perf_counter()
+    if mode == "legacy":
+        chunks = legacy_chunks(pdf_path)
+        lengths = [len(c) for c in chunks]
+        del chunks
+    elif mode == "stream":
+        lengths = [len(c) for c in ingest.iter_chunks(pdf_path)]
+    else:
+        lengths = [len(c) for c, _ in ingest.ingest_pdfs([pdf_path], workers=workers)]
+    elapsed = time.perf_counter() - t0
+    rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    lengths.sort()
+    print(json.dumps({
+        "seconds": elapsed,
+        "rss_mb": rss_mb,
+        "chunks": len(lengths),
+        "min": lengths[0], "median": lengths[len(lengths) // 2], "max": lengths[-1],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[250, 1000])
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--run", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        mode, pdf_path, workers = args.run
+        return run(mode, pdf_path, int(workers))
+
+    modes = [("legacy", "legacy"), ("stream", "stream, 1 process"),
+             ("pool", f"stream, {args.workers} workers")]
+    print(f"{'pages':>6} {'mode':<20} {'time (s)':>9} {'peak RSS (MB)':>14} {'chunks':>7} "
+          f"{'min':>6} {'median':>7} {'max':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            pdf_path = os.path.join(tmp, f"guide_{pages}.pdf")
+            make_pdf(pdf_path, pages)
+            for mode, label in modes:
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--run", mode, pdf_path, str(args.workers)],
+                    cwd=CHATAPP_DIR, capture_output=True, text=True, check=True,
+                ).stdout
+                r = json.loads(out.strip().splitlines()[-1])
+                print(f"{pages:>6} {label:<20} {r['seconds']:>9.2f} {r['rss_mb']:>14.0f} {r['chunks']:>7} "
+                      f"{r['min']:>6} {r['median']:>7} {r['max']:>7}")
+
+
+if __name__ == "__main__":
+    main()
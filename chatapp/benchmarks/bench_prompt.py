@@ -0,0 +1,108 @@
+"""Prompt size: top-k chunks inlined as-is vs prompt.PromptBuilder.
+
+Builds a synthetic guide library with ingest.chunk_pages (so neighbouring
+chunks share their overlapping edge, as in production), retrieves the top k
+chunks for questions taken from the text with BM25, and assembles each prompt
+both ways:
+
+    inline   the old f-string: system prompt, every chunk, the question
+    builder  overlaps merged, duplicates dropped, context packed to the token
+             budget, after a byte-stable prefix
+
+Reported: estimated prompt tokens (mean and p95), how many chunks were merged
+into a neighbour, the bytes every prompt shares from the start (what a
+provider-side prefix cache can reuse), and the builder's cost per prompt.
+
+    cd chatapp/benchmarks
+    python bench_prompt.py --top-k 4 8 --budget 1200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+os.environ.setdefault("GEMINI_API_KEY", "fake")
+
+from ingest import chunk_pages  # noqa: E402
+from knowledge_base import KnowledgeBase  # noqa: E402
+from main_pdf_rag import SYSTEM_PROMPT  # noqa: E402
+from prompt import PromptBuilder, estimate_tokens  # noqa: E402
+
+WORDS = ("apple cabbage soil compost prune irrigation seedling nursery spray mancozeb "
+         "fungicide harvest yield spacing fertilizer nitrogen potash mulch orchard pest "
+         "scab aphid blight transplant sowing germination thinning staking drip").split()
+# Variety names and doses, so a question taken from the text is distinctive
+WORDS += [f"{w}-{i}" for w in WORDS[:10] for i in range(100)]
+
+
+def make_pages(n_pages, rng):
+    pages = []
+    for _ in range(n_pages):
+        paragraphs = [" ".join(rng.choice(WORDS) for _ in range(rng.choice([20, 60, 120]))).capitalize() + "."
+                      for _ in range(4)]
+        pages.append("\n".join(paragraphs))
+    return pages
+
+
+def inline_prompt(question, results):
+    context = "\n\n".join(f"[Source: {source}] {content}" for _, content, source in results)
+    return f"{SYSTEM_PROMPT}{context}\n\nUser Question: {question}"
+
+
+def common_prefix(texts):
+    return len(os.path.commonprefix(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--top-k", type=int, nargs="+", default=[4, 8])
+    parser.add_argument("--budget", type=int, default=1200, help="context tokens")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = make_pages(args.pages, rng)
+    chunks = list(chunk_pages(pages))
+    text = "\n".join(pages).split()
+    kb = KnowledgeBase(chunks, ["guide.pdf"] * len(chunks),
+                       np.random.default_rng(0).standard_normal((len(chunks), 8)))
+    questions = []
+    for _ in range(args.questions):
+        start = rng.randrange(len(text) - 12)
+        questions.append(" ".join(text[start:start + 12]))
+    builder = PromptBuilder(SYSTEM_PROMPT, args.budget)
+
+    print(f"{len(chunks)} chunks; system prompt {builder.prefix_tokens} tokens; "
+          f"context budget {args.budget} tokens\n")
+    print(f"{'top-k':>6} {'prompt':<8} {'tokens mean':>12} {'p95':>6} {'merged':>7} "
+          f"{'shared prefix (B)':>18} {'build (us)':>11}")
+    for k in args.top_k:
+        retrieved = [kb.hybrid_search(q, None, k) for q in questions]
+        inline = [inline_prompt(q, r) for q, r in zip(questions, retrieved)]
+        built, stats, times = [], [], []
+        for q, r in zip(questions, retrieved):
+            t0 = time.perf_counter()
+            contents, s = builder.build(q, r)
+            times.append(time.perf_counter() - t0)
+            built.append(contents)
+            stats.append(s)
+        for name, prompts, merged, us in (
+            ("inline", inline, 0, None),
+            ("builder", built, sum(s["merged"] for s in stats), 1e6 * statistics.median(times)),
+        ):
+            tokens = [estimate_tokens(p) for p in prompts]
+            print(f"{k:>6} {name:<8} {statistics.mean(tokens):>12.0f} {np.percentile(tokens, 95):>6.0f} "
+                  f"{merged / len(questions):>7.2f} {common_prefix(prompts):>18} "
+                  f"{'' if us is None else f'{us:.0f}':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Retrieval latency: the old per-chunk Python loop vs KnowledgeBase.search.
+
+The old loop calls get_cosine_similarity (both norms recomputed) for every
+chunk and sorts every score. KnowledgeBase keeps one pre-normalized float32
+matrix, so a query is one matrix-vector product plus argpartition.
+
+Embeddings are random unit vectors. At 768 dims, 1M chunks take about 3 GB;
+pass --dim 256 on smaller machines. The old loop is only timed up to
+--legacy-max chunks because it takes seconds per query beyond that.
+
+    cd chatapp/benchmarks
+    python bench_retrieval.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+from knowledge_base import KnowledgeBase  # noqa: E402
+
+
+def get_cosine_similarity(a, b):
+    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+
+
+def legacy_search(items, query, top_k):
+    scores = [(get_cosine_similarity(query, item["embedding"]), item) for item in items]
+    scores.sort(key=lambda x: x[0], reverse=True)
+    return scores[:top_k]
+
+
+def random_matrix(n, dim, rng, block=100_000):
+    """n x dim float32 matrix, filled in blocks to avoid a float64 temporary."""
+    out = np.empty((n, dim), dtype=np.float32)
+    for i in range(0, n, block):
+        out[i:i + block] = rng.standard_normal((min(block, n - i), dim), dtype=np.float32)
+    return out
+
+
+def median_ms(fn, queries):
+    times = []
+    for q in queries:
+        t0 = time.perf_counter()
+        fn(q)
+        times.append(time.perf_counter() - t0)
+    return 1000 * statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    print(f"dim {args.dim}, top_k {args.top_k}, median of {args.queries} queries\n")
+    print(f"{'chunks':>9} {'loop (ms)':>10} {'matrix (ms)':>12} {'speedup':>8} {'same top-k':>11}")
+    for n in args.sizes:
+        embeddings = random_matrix(n, args.dim, rng)
+        kb = KnowledgeBase(
+            contents=[f"chunk {i}" for i in range(n)],
+            sources=["bench.pdf"] * n,
+            embeddings=embeddings,
+        )
+        del embeddings
+        new_ms = median_ms(lambda q: kb.search(q, args.top_k), queries)
+
+        if n <= args.legacy_max:
+            # The old layout: one dict per chunk holding its raw vector
+            items = [{"content": c, "embedding": e} for c, e in zip(kb.contents, kb.embeddings)]
+            old_ms = median_ms(lambda q: legacy_search(items, q, args.top_k), queries[:5])
+            same = all(
+                [item["content"] for _, item in legacy_search(items, q, args.top_k)]
+                == [content for _, content, _ in kb.search(q, args.top_k)]
+                for q in queries[:3]
+            )
+            print(f"{n:>9} {old_ms:>10.2f} {new_ms:>12.3f} {old_ms / new_ms:>7.0f}x {str(same):>11}")
+            del items
+        else:
+            print(f"{n:>9} {'-':>10} {new_ms:>12.3f} {'-':>8} {'-':>11}")
+        del kb
+
+
+if __name__ == "__main__":
+    main()
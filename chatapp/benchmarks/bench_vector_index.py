@@ -0,0 +1,103 @@
+"""Recall@k and latency: exact scan vs the IVF index in vector_index.py.
+
+Vectors are synthetic and clustered (Gaussian blobs around random topic
+centres), which is closer to real chunk embeddings than uniform noise.
+Queries are perturbed copies of chunks. Recall@k is the share of the exact
+top-k that the IVF index also returns.
+
+The last table times an incremental rebuild: the index is saved to a temp
+directory, 1% new chunks are added, and it is built again.
+
+    cd chatapp/benchmarks
+    python bench_vector_index.py --chunks 200000 --dim 256
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+from knowledge_base import normalize  # noqa: E402
+from vector_index import ExactIndex, IVFIndex  # noqa: E402
+
+
+def clustered(n, dim, topics, rng, spread=0.6):
+    centres = rng.standard_normal((topics, dim), dtype=np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    block = 50_000
+    for i in range(0, n, block):
+        m = min(block, n - i)
+        out[i:i + m] = centres[rng.integers(topics, size=m)]
+        out[i:i + m] += spread * rng.standard_normal((m, dim), dtype=np.float32)
+    return normalize(out)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def run_queries(index, queries, k):
+    times, results = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        rows, _ = index.search(q, k)
+        times.append(time.perf_counter() - t0)
+        results.append(rows)
+    return results, 1000 * statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--topics", type=int, default=2_000)
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = clustered(args.chunks, args.dim, args.topics, rng)
+    contents = [f"chunk {i}" for i in range(args.chunks)]
+    picks = rng.integers(args.chunks, size=args.queries)
+    queries = normalize(embeddings[picks] + 0.05 * rng.standard_normal((args.queries, args.dim), dtype=np.float32))
+
+    exact = ExactIndex()
+    exact.build(embeddings, contents)
+    truth, exact_ms = run_queries(exact, queries, args.top_k)
+
+    ivf = IVFIndex()
+    _, build_s = timed(lambda: ivf.build(embeddings, contents))
+
+    print(f"{args.chunks} chunks, dim {args.dim}, {len(ivf.centroids)} lists, "
+          f"top_k {args.top_k}, {args.queries} queries; IVF build {build_s:.1f}s\n")
+    print(f"{'index':<12} {'recall@k':>9} {'p50 (ms)':>9} {'speedup':>8}")
+    print(f"{'exact':<12} {1:>9.3f} {exact_ms:>9.3f} {1:>7.1f}x")
+    for n_probe in args.probes:
+        ivf.n_probe = n_probe
+        found, ivf_ms = run_queries(ivf, queries, args.top_k)
+        recall = np.mean([len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)])
+        print(f"{'ivf/' + str(n_probe):<12} {recall:>9.3f} {ivf_ms:>9.3f} {exact_ms / ivf_ms:>7.1f}x")
+
+    # Incremental rebuild after adding 1% new chunks
+    with tempfile.TemporaryDirectory() as tmp:
+        _, first_s = timed(lambda: IVFIndex(index_dir=tmp).build(embeddings, contents))
+        extra = clustered(args.chunks // 100, args.dim, args.topics, rng)
+        grown = np.concatenate([embeddings, extra])
+        grown_contents = contents + [f"new chunk {i}" for i in range(len(extra))]
+        index = IVFIndex(index_dir=tmp)
+        _, again_s = timed(lambda: index.build(grown, grown_contents))
+    print(f"\nfull build (saved): {first_s:.1f}s; rebuild with {len(extra)} new chunks: "
+          f"{again_s:.1f}s (retrained: {index.retrained}, reused {index.reused} assignments)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Load test for the /chat endpoint with a fake, latency-injecting model client.
+
+Starts the chat app (main_pdf_rag by default) in a subprocess with
+fake_genai.FakeClient in place of the Gemini client and a synthetic knowledge
+base, then runs 1-200 concurrent users against it. Each user sends
+--requests chats back to back and reads the streamed answer.
+
+Reported per concurrency level: throughput, time to first token (TTFT) and
+full-answer latency at p50/p99, and the p99 of a `/` health probe sent every
+50 ms during the run. A blocked event loop shows up as health p99 rising to
+the model latency.
+
+    cd chatapp/benchmarks
+    python load_test.py --users 1 10 50 100 200
+    python load_test.py --repeat-questions   # mostly cache hits
+    python load_test.py --url http://127.0.0.1:8001   # a running server (real model)
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+CHATAPP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+QUESTIONS = [
+    "How do I prune apple trees?",
+    "When should cabbage be transplanted?",
+    "What fertilizer does an apple orchard need?",
+    "How to control leaf spot?",
+]
+
+
+# ---------- server ----------
+
+def serve(args):
+    """Run the app on args.port with the fake client (subprocess entry point)."""
+    import importlib
+
+    import uvicorn
+
+    from fake_genai import FakeClient, fake_vector
+    from indexer import Indexer
+    from knowledge_base import KnowledgeBase
+    from loader import BackgroundLoader
+
+    os.environ.setdefault("GEMINI_API_KEY", "fake")
+    mod = importlib.import_module(args.app)
+    mod.client = FakeClient(
+        latency=args.embed_latency, ttft=args.ttft,
+        token_delay=args.token_delay, tokens=args.tokens,
+    )
+
+    class SyntheticIndexer(Indexer):
+        """Serves a synthetic snapshot and never reads chatapp/data."""
+
+        def load_snapshot(self):
+            contents = [f"Synthetic guide paragraph {i} about crops." for i in range(args.chunks)]
+            self.knowledge_base = KnowledgeBase(
+                contents=contents,
+                sources=["synthetic.pdf"] * len(contents),
+                embeddings=np.stack([fake_vector(c) for c in contents]),
+            )
+            return True
+
+        def reindex(self, force=False):
+            return False
+
+    mod.loader = BackgroundLoader(lambda: SyntheticIndexer(mod.client, "fake", mod.DATA_DIR))
+    uvicorn.run(mod.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args):
+    port = free_port()
+    cmd = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+        "--app", args.app, "--chunks", str(args.chunks),
+        "--embed-latency", str(args.embed_latency), "--ttft", str(args.ttft),
+        "--token-delay", str(args.token_delay), "--tokens", str(args.tokens),
+    ]
+    proc = subprocess.Popen(cmd, cwd=CHATAPP_DIR)
+    url = f"http://127.0.0.1:{port}"
+
+    import httpx
+    for _ in range(200):
+        try:
+            httpx.get(url + "/", timeout=1)
+            return proc, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+# ---------- load ----------
+# A minimal asyncio HTTP/1.1 client: httpx spends more CPU per streamed chunk
+# than the server does, which would make the client the bottleneck at 100+ users
+
+async def request(host, port, method, path, body=b""):
+    """Send one request; yields body chunks as they arrive (chunked or not)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nConnection: close\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        status = await reader.readline()
+        if b" 200 " not in status:
+            raise ConnectionError(status.decode(errors="replace").strip() or "no response")
+        chunked = False
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            chunked |= line.lower().startswith(b"transfer-encoding: chunked")
+        if not chunked:
+            yield await reader.read()
+            return
+        while size := int((await reader.readline()).split(b";")[0], 16):
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    finally:
+        writer.close()
+
+
+async def user(host, port, n_requests, ttfts, totals, errors, i, repeat):
+    for j in range(n_requests):
+        message = QUESTIONS[(i + j) % len(QUESTIONS)]
+        if not repeat:
+            # Unique text, so the app's query/response caches never answer for the model
+            message = f"{message} (user {i}, chat {j})"
+        body = json.dumps({"message": message}).encode()
+        t0 = time.perf_counter()
+        first = None
+        try:
+            async for piece in request(host, port, "POST", "/chat", body):
+                if piece and first is None:
+                    first = time.perf_counter() - t0
+        except (OSError, ValueError, asyncio.IncompleteReadError) as e:
+            errors.append(repr(e))
+            continue
+        totals.append(time.perf_counter() - t0)
+        ttfts.append(first if first is not None else totals[-1])
+
+
+async def probe(host, port, latencies, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        async for _ in request(host, port, "GET", "/"):
+            pass
+        latencies.append(time.perf_counter() - t0)
+        await asyncio.sleep(0.05)
+
+
+async def run_level(url, users, n_requests, repeat=False):
+    host, port = urlsplit(url).hostname, urlsplit(url).port or 80
+    ttfts, totals, errors, health = [], [], [], []
+    stop = asyncio.Event()
+    prober = asyncio.create_task(probe(host, port, health, stop))
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user(host, port, n_requests, ttfts, totals, errors, i, repeat) for i in range(users)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await prober
+    return elapsed, ttfts, totals, errors, health
+
+
+def pct(values, q):
+    return 1000 * float(np.percentile(values, q)) if values else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 10, 50, 100, 200])
+    parser.add_argument("--requests", type=int, default=3, help="chats per user")
+    parser.add_argument("--repeat-questions", action="store_true",
+                        help="reuse the same %d questions, so the app's caches can answer" % len(QUESTIONS))
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--app", default="main_pdf_rag", help="app module to start")
+    parser.add_argument("--chunks", type=int, default=1000, help="synthetic knowledge base size")
+    parser.add_argument("--embed-latency", type=float, default=0.15)
+    parser.add_argument("--ttft", type=float, default=0.5)
+    # Gemini streams a handful of multi-word chunks, not one event per word
+    parser.add_argument("--token-delay", type=float, default=0.1)
+    parser.add_argument("--tokens", type=int, default=10)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(args)
+        print(f"{args.app} with fake client: embed {args.embed_latency * 1000:.0f} ms, "
+              f"TTFT {args.ttft * 1000:.0f} ms, {args.tokens} tokens x "
+              f"{args.token_delay * 1000:.0f} ms\n")
+    try:
+        print(f"{'users':>6} {'req/s':>7} {'ttft p50':>9} {'ttft p99':>9} "
+              f"{'total p50':>10} {'total p99':>10} {'health p99':>11} {'errors':>7}  (ms)")
+        for users in args.users:
+            elapsed, ttfts, totals, errors, health = asyncio.run(
+                run_level(url, users, args.requests, args.repeat_questions)
+            )
+            print(f"{users:>6} {len(totals) / elapsed:>7.1f} {pct(ttfts, 50):>9.0f} {pct(ttfts, 99):>9.0f} "
+                  f"{pct(totals, 50):>10.0f} {pct(totals, 99):>10.0f} {pct(health, 99):>11.0f} {len(errors):>7}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
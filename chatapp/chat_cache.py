@@ -0,0 +1,63 @@
+import re
+import time
+from collections import OrderedDict
+
+_SPACES = re.compile(r"\s+")
+_TRAILING_PUNCT = re.compile(r"[\s?!.,;:]+$")
+
+
+def normalize_query(text):
+    """Cache key for a user message: case, spacing and trailing punctuation ignored.
+
+    "How to prune apple?" and "how to  prune apple" share one entry.
+    """
+    return _TRAILING_PUNCT.sub("", _SPACES.sub(" ", text.strip().lower()))
+
+
+class TTLCache:
+    """LRU cache bounded by entry count, whose entries also expire after `ttl` seconds.
+
+    Not thread-safe; the chat apps only touch it from the event loop.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.entries = OrderedDict()  # key -> (expires_at, value), oldest use first
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """Cached value for `key`, or None if missing or expired."""
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value):
+        self.entries[key] = (self.clock() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        return {
+            "size": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,65 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# embed_content takes a list of contents; the Gemini API accepts up to 100
+# per request
+EMBED_BATCH_SIZE = 100
+# Batches in flight at once; keeps us under the per-minute request quota
+EMBED_CONCURRENCY = 4
+EMBED_RETRIES = 3
+EMBED_BACKOFF = 1.0  # seconds, doubled on every retry
+
+
+def batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def embed_batch(client, model, texts, retries=EMBED_RETRIES, backoff=EMBED_BACKOFF):
+    """Embed one batch with a single embed_content call, retrying with backoff.
+
+    Raises the last error once every attempt has failed.
+    """
+    for attempt in range(retries + 1):
+        try:
+            response = client.models.embed_content(model=model, contents=texts)
+            vectors = [e.values for e in response.embeddings]
+            if len(vectors) != len(texts):
+                raise ValueError(f"got {len(vectors)} embeddings for {len(texts)} texts")
+            return vectors
+        except Exception as e:
+            if attempt == retries:
+                raise
+            # Exponential backoff with jitter so parallel batches don't retry in lockstep
+            delay = backoff * 2 ** attempt * (0.5 + random.random() / 2)
+            print(f"Embedding batch of {len(texts)} failed ({e}); retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def embed_texts(client, model, texts, batch_size=EMBED_BATCH_SIZE,
+                concurrency=EMBED_CONCURRENCY, retries=EMBED_RETRIES,
+                backoff=EMBED_BACKOFF, on_batch=None):
+    """Embed `texts` in batches, `concurrency` batches at a time.
+
+    Returns one vector per text, in order. A text whose batch still fails
+    after all retries gets None, and the failure is reported, so the caller
+    can decide what to do with it instead of losing it silently.
+    on_batch(n), if given, is called as each batch of n texts finishes.
+    """
+    chunks = batches(list(texts), batch_size)
+    if not chunks:
+        return []
+
+    def run(batch):
+        try:
+            vectors = embed_batch(client, model, batch, retries, backoff)
+        except Exception as e:
+            print(f"Giving up on a batch of {len(batch)} chunks after {retries + 1} attempts: {e}")
+            vectors = [None] * len(batch)
+        if on_batch is not None:
+            on_batch(len(batch))
+        return vectors
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        results = pool.map(run, chunks)
+        return [vector for batch in results for vector in batch]
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+# Subdirectory of the data directory where vectors persist, next to the PDFs,
+# one subdirectory per embedding model
+CACHE_DIR = ".embedding_cache"
+
+
+def chunk_key(text):
+    """Cache key for a chunk: sha256 of its text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def model_dir(cache_dir, model):
+    """Per-model subdirectory of cache_dir (model names contain '/')."""
+    return os.path.join(cache_dir, model.replace("/", "_").replace(":", "_"))
+
+
+class EmbeddingCache:
+    """On-disk (embedding model, chunk-text hash) -> vector cache.
+
+    Vectors are one float32 `vectors.npy` matrix opened with mmap, and
+    `keys.json` lists the chunk hash of each row. Loading is therefore a
+    JSON read plus an mmap, no matter how many chunks are cached.
+    """
+
+    def __init__(self, model, cache_dir):
+        self.model = model
+        self.dir = model_dir(cache_dir, model)
+        self.vectors_path = os.path.join(self.dir, "vectors.npy")
+        self.keys_path = os.path.join(self.dir, "keys.json")
+
+        self.vectors = None
+        self.rows = {}
+        self.new = {}
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.keys_path)):
+            return
+        try:
+            with open(self.keys_path) as f:
+                keys = json.load(f)
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+            if len(keys) != len(vectors):
+                raise ValueError("keys/vectors length mismatch")
+        except Exception as e:
+            print(f"Ignoring unreadable embedding cache in {self.dir}: {e}")
+            return
+        self.vectors = vectors
+        self.rows = {key: i for i, key in enumerate(keys)}
+
+    def __len__(self):
+        return len(self.rows) + len(self.new)
+
+    def get(self, text):
+        """Cached vector for `text`, or None."""
+        key = chunk_key(text)
+        if key in self.new:
+            self.hits += 1
+            return self.new[key]
+        row = self.rows.get(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # Copy, so no caller holds a view into the mmap when save() replaces it
+        return np.array(self.vectors[row], dtype=np.float32)
+
+    def put(self, text, vector):
+        self.new[chunk_key(text)] = np.asarray(vector, dtype=np.float32)
+
+    def save(self, keep=None):
+        """Persist the cache, keeping only the chunk texts in `keep`.
+
+        Entries for chunks that are no longer in any PDF are evicted. Nothing is
+        written if no entry was added or evicted.
+        """
+        keep_keys = set(self.rows) | set(self.new)
+        if keep is not None:
+            keep_keys &= {chunk_key(text) for text in keep}
+        if not self.new and keep_keys == set(self.rows):
+            return
+
+        keys = sorted(keep_keys)
+        if keys:
+            vectors = np.stack([
+                self.new[k] if k in self.new else self.vectors[self.rows[k]]
+                for k in keys
+            ])
+        else:
+            vectors = np.empty((0, 0), dtype=np.float32)
+
+        # Write to temp files and rename so a crash never leaves a torn cache
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_vectors = self.vectors_path + ".tmp.npy"
+        tmp_keys = self.keys_path + ".tmp"
+        np.save(tmp_vectors, vectors)
+        with open(tmp_keys, "w") as f:
+            json.dump(keys, f)
+        self.vectors = None  # release the old mmap before replacing the file
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_keys, self.keys_path)
+
+        self.new = {}
+        self._load()
@@ -0,0 +1,123 @@
+"""Offline stand-in for genai.Client, for benchmarks and local runs without a key.
+
+Only the calls the chat apps make are implemented, on both `client.models`
+and the async `client.aio.models`. Latency is simulated with sleep (or
+asyncio.sleep), so concurrency behaves like real network-bound requests.
+"""
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+FAKE_DIM = 768
+
+
+def fake_vector(text, dim=FAKE_DIM):
+    """Deterministic vector for `text`: the same text always gets the same vector."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    return np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+
+
+FAKE_ANSWER = "According to our official guides, this is a simulated answer. "
+
+
+class FakeModels:
+    def __init__(self, dim, latency, per_item, fail_rate, seed, ttft, token_delay, tokens):
+        self.dim = dim
+        self.latency = latency
+        self.per_item = per_item
+        self.fail_rate = fail_rate
+        self.ttft = ttft
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.items = 0
+        self.generations = 0
+
+    def _embed_call(self, contents):
+        """Count the call; returns (texts, delay, fail)."""
+        texts = [contents] if isinstance(contents, str) else list(contents)
+        with self.lock:
+            self.calls += 1
+            self.items += len(texts)
+            fail = self.random.random() < self.fail_rate
+        return texts, self.latency + self.per_item * len(texts), fail
+
+    def _embed_response(self, texts, fail):
+        if fail:
+            raise RuntimeError("503 UNAVAILABLE (injected)")
+        return SimpleNamespace(
+            embeddings=[SimpleNamespace(values=fake_vector(t, self.dim).tolist()) for t in texts]
+        )
+
+    def _generation(self):
+        with self.lock:
+            self.generations += 1
+        words = FAKE_ANSWER.split()
+        return [words[i % len(words)] + " " for i in range(self.tokens)]
+
+    def _usage(self, contents):
+        """usage_metadata like the last chunk of a Gemini stream (about 4 characters per token)."""
+        return SimpleNamespace(prompt_token_count=len(contents) // 4, cached_content_token_count=None,
+                               candidates_token_count=self.tokens)
+
+    def embed_content(self, model, contents, config=None):
+        texts, delay, fail = self._embed_call(contents)
+        time.sleep(delay)
+        return self._embed_response(texts, fail)
+
+    def generate_content_stream(self, model, contents, config=None):
+        """First chunk after `ttft`, then one token every `token_delay`."""
+        tokens = self._generation()
+        time.sleep(self.ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(self.token_delay)
+            yield SimpleNamespace(text=token, usage_metadata=None)
+        yield SimpleNamespace(text="", usage_metadata=self._usage(contents))
+
+
+class FakeAsyncModels:
+    """client.aio.models: same behaviour and counters, awaitable."""
+
+    def __init__(self, models):
+        self.sync = models
+
+    async def embed_content(self, model, contents, config=None):
+        texts, delay, fail = self.sync._embed_call(contents)
+        await asyncio.sleep(delay)
+        return self.sync._embed_response(texts, fail)
+
+    async def generate_content_stream(self, model, contents, config=None):
+        tokens = self.sync._generation()
+
+        async def stream():
+            await asyncio.sleep(self.sync.ttft)
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(self.sync.token_delay)
+                yield SimpleNamespace(text=token, usage_metadata=None)
+            yield SimpleNamespace(text="", usage_metadata=self.sync._usage(contents))
+
+        return stream()
+
+
+class FakeClient:
+    """genai.Client look-alike.
+
+    Each embed call sleeps `latency` plus `per_item` per content, and fails
+    with probability `fail_rate` (raised after the sleep, like a server error).
+    A generation streams `tokens` words: the first after `ttft`, the rest
+    `token_delay` apart.
+    """
+
+    def __init__(self, dim=FAKE_DIM, latency=0.2, per_item=0.002, fail_rate=0.0, seed=0,
+                 ttft=0.5, token_delay=0.02, tokens=40):
+        self.models = FakeModels(dim, latency, per_item, fail_rate, seed, ttft, token_delay, tokens)
+        self.aio = SimpleNamespace(models=FakeAsyncModels(self.models))
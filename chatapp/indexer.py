@@ -0,0 +1,294 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+from embedding import embed_texts
+from embedding_cache import CACHE_DIR, EmbeddingCache, model_dir
+from ingest import ingest_pdfs
+from knowledge_base import KnowledgeBase
+from vector_index import INDEX_DIR, make_index
+
+# Seconds between checks of the data directory for added/changed/removed PDFs
+WATCH_INTERVAL = 30
+# Subdirectory of data_dir where the indexed state is saved for the next start
+SNAPSHOT_DIR = ".snapshot"
+
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class Indexer:
+    """Builds the knowledge base from data_dir and keeps it current.
+
+    `knowledge_base` is an immutable snapshot. A reindex builds a complete new
+    one off to the side and swaps the reference in a single assignment, so a
+    request that has read `indexer.knowledge_base` keeps a consistent index
+    while the next one is built.
+
+    Only PDFs whose (mtime, size) changed and whose content hash then differs
+    are re-extracted, and only chunks missing from the embedding cache are
+    sent to the embedding API.
+
+    After each reindex the file stamps and chunk texts are saved under
+    data_dir/.snapshot, so `load_snapshot()` can restore the knowledge base at
+    the next start from the embedding cache without opening a PDF.
+    """
+
+    def __init__(self, client, model, data_dir, index_backend="exact"):
+        self.client = client
+        self.model = model
+        self.data_dir = data_dir
+        self.index_backend = index_backend
+        self.snapshot_path = os.path.join(model_dir(os.path.join(data_dir, SNAPSHOT_DIR), model),
+                                          "snapshot.json")
+        self.cache_dir = os.path.join(data_dir, CACHE_DIR)
+        self.index_dir = os.path.join(data_dir, INDEX_DIR)
+
+        self.knowledge_base = KnowledgeBase()
+        self.files = {}   # path -> (mtime_ns, size, sha256) of the indexed version
+        self.chunks = {}  # path -> [chunk] of the indexed version
+
+        self._reindex_lock = threading.Lock()
+        self._progress_lock = threading.Lock()
+        self._progress = {"state": "idle", "version": 0}
+        self._stop = threading.Event()
+        self._watcher = None
+
+    # ---------- progress ----------
+
+    @property
+    def progress(self):
+        with self._progress_lock:
+            return dict(self._progress)
+
+    def _report(self, **fields):
+        with self._progress_lock:
+            self._progress.update(fields)
+
+    def _advance(self, key, n):
+        with self._progress_lock:
+            self._progress[key] = self._progress.get(key, 0) + n
+
+    @property
+    def running(self):
+        return self._reindex_lock.locked()
+
+    # ---------- change detection ----------
+
+    def scan(self):
+        """(changed, removed) PDF paths relative to the indexed snapshot."""
+        paths = sorted(glob.glob(os.path.join(self.data_dir, "*.pdf")))
+        changed = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            known = self.files.get(path)
+            if known and known[:2] == (st.st_mtime_ns, st.st_size):
+                continue
+            # mtime moved: only a different hash means new content (a `touch`
+            # or a copy of the same file does not)
+            digest = file_hash(path)
+            if known and known[2] == digest:
+                self.files[path] = (st.st_mtime_ns, st.st_size, digest)
+                continue
+            changed.append((path, (st.st_mtime_ns, st.st_size, digest)))
+        removed = sorted((set(self.files) | set(self.chunks)) - set(paths))
+        return changed, removed
+
+    # ---------- reindex ----------
+
+    def reindex(self, force=False):
+        """Bring the snapshot up to date with data_dir; returns False if one is already running.
+
+        force=True re-extracts every PDF, not just the changed ones.
+        """
+        if not self._reindex_lock.acquire(blocking=False):
+            return False
+        try:
+            self._reindex(force)
+        except Exception as e:
+            print(f"Reindex failed: {e}")
+            self._report(state="failed", error=str(e), finished_at=time.time())
+        finally:
+            self._reindex_lock.release()
+        return True
+
+    def _reindex(self, force):
+        previous = self.progress["state"]
+        self._report(state="scanning")
+        if force:
+            self.files, self.chunks = {}, {}
+        changed, removed = self.scan()
+        if not changed and not removed and self.progress["version"]:
+            # Nothing to do; keep the figures of the last real reindex
+            self._report(state=previous, checked_at=time.time())
+            return
+
+        started = time.time()
+        self._report(started_at=started, finished_at=None, error=None,
+                     pdfs_total=0, pdfs_done=0, chunks_total=0, chunks_embedded=0)
+        print(f"Reindexing: {len(changed)} new or changed PDF(s), {len(removed)} removed.")
+        # Extract only the changed PDFs; the rest keep their chunks
+        self._report(state="extracting", pdfs_total=len(changed))
+        chunks = {path: chunk_list for path, chunk_list in self.chunks.items() if path not in removed}
+        for path, _ in changed:
+            chunks[path] = []
+        by_name = {os.path.basename(path): path for path, _ in changed}
+        last = None
+        for chunk, filename in ingest_pdfs([path for path, _ in changed]):
+            if filename != last:
+                if last is not None:
+                    self._advance("pdfs_done", 1)
+                last = filename
+            chunks[by_name[filename]].append(chunk)
+        self._report(pdfs_done=len(changed))
+
+        # Embed only chunks the cache has never seen
+        cache = EmbeddingCache(self.model, self.cache_dir)
+        embeddings = {}
+        for path in sorted(chunks):
+            for chunk in chunks[path]:
+                if chunk not in embeddings:
+                    embeddings[chunk] = cache.get(chunk)
+        missing = [chunk for chunk, embedding in embeddings.items() if embedding is None]
+        self._report(state="embedding", chunks_total=len(missing))
+        vectors = embed_texts(self.client, self.model, missing,
+                              on_batch=lambda n: self._advance("chunks_embedded", n))
+        failed = 0
+        for chunk, embedding in zip(missing, vectors):
+            if embedding is None:
+                failed += 1
+                continue
+            embeddings[chunk] = embedding
+            cache.put(chunk, embedding)
+
+        # Build the new snapshot completely before anyone can see it
+        self._report(state="indexing")
+        snapshot = self._build(chunks, embeddings)
+        cache.save(keep=embeddings)
+
+        # Swap: one reference assignment, atomic for readers
+        self.knowledge_base = snapshot
+        self.chunks = chunks
+        for path in removed:
+            self.files.pop(path, None)
+        for path, stamp in changed:
+            self.files[path] = stamp
+
+        print(f"Embedding cache: {cache.hits} hits, {cache.misses} misses.")
+        if failed:
+            print(f"Warning: {failed} chunks could not be embedded and are not searchable "
+                  "(they will be retried on the next reindex).")
+            # Forget the stamps of PDFs with unembedded chunks so the watcher retries them
+            for path, _ in changed:
+                if any(embeddings[c] is None for c in chunks[path]):
+                    del self.files[path]
+        self._save_snapshot()
+        print(f"Successfully loaded {len(snapshot)} chunks into memory "
+              f"({time.time() - started:.1f}s).")
+        self._report(state="ready", finished_at=time.time(), chunks=len(snapshot),
+                     pdfs=len(chunks), failed=failed, version=self.progress["version"] + 1)
+
+    def _build(self, chunks, embeddings):
+        """KnowledgeBase of every chunk in `chunks` that has a vector in `embeddings`."""
+        indexed = [
+            (chunk, os.path.basename(path))
+            for path in sorted(chunks) for chunk in chunks[path]
+            if embeddings[chunk] is not None
+        ]
+        return KnowledgeBase(
+            contents=[chunk for chunk, _ in indexed],
+            sources=[source for _, source in indexed],
+            embeddings=[embeddings[chunk] for chunk, _ in indexed],
+            index=make_index(self.index_backend, self.model, self.index_dir),
+        )
+
+    # ---------- snapshot ----------
+
+    def _save_snapshot(self):
+        if not os.path.isdir(self.data_dir):
+            return
+        state = {
+            "files": self.files,
+            "chunks": {path: chunk_list for path, chunk_list in self.chunks.items() if path in self.files},
+        }
+        # Write to a temp file and rename so a crash never leaves a torn snapshot
+        os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+        tmp = self.snapshot_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def load_snapshot(self):
+        """Restore the last indexed state saved in data_dir; returns whether there was one.
+
+        Vectors come from the embedding cache. A PDF with a chunk missing from
+        the cache is left out, and the next reindex re-reads it.
+        """
+        try:
+            with open(self.snapshot_path) as f:
+                saved = json.load(f)
+            files, saved_chunks = saved["files"], saved["chunks"]
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable index snapshot {self.snapshot_path}: {e}")
+            return False
+
+        with self._reindex_lock:
+            started = time.time()
+            cache = EmbeddingCache(self.model, self.cache_dir)
+            chunks, embeddings = {}, {}
+            for path, chunk_list in saved_chunks.items():
+                vectors = {chunk: cache.get(chunk) for chunk in chunk_list}
+                if path in files and all(v is not None for v in vectors.values()):
+                    chunks[path] = chunk_list
+                    embeddings.update(vectors)
+            snapshot = self._build(chunks, embeddings)
+
+            self.knowledge_base = snapshot
+            self.chunks = chunks
+            self.files = {path: tuple(files[path]) for path in chunks}
+            print(f"Loaded {len(snapshot)} chunks from the index snapshot "
+                  f"({time.time() - started:.1f}s).")
+            self._report(state="ready", finished_at=time.time(), chunks=len(snapshot),
+                         pdfs=len(chunks), failed=0, version=self.progress["version"] + 1)
+        return True
+
+    def reindex_in_background(self, force=False):
+        """Start a reindex thread unless one is running; returns whether it started."""
+        if self.running:
+            return False
+        threading.Thread(target=self.reindex, args=(force,), daemon=True, name="reindex").start()
+        return True
+
+    # ---------- watcher ----------
+
+    def start_watcher(self, interval=WATCH_INTERVAL):
+        """Poll data_dir every `interval` seconds and reindex on changes (0 disables)."""
+        if not interval or self._watcher is not None:
+            return
+        self._stop.clear()
+
+        def watch():
+            while not self._stop.wait(interval):
+                self.reindex()
+
+        self._watcher = threading.Thread(target=watch, daemon=True, name="pdf-watcher")
+        self._watcher.start()
+
+    def stop_watcher(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pypdf import PdfReader
+
+# Chunks are at most CHUNK_CHARS long and repeat the last CHUNK_OVERLAP
+# characters of the previous chunk, so text cut at a boundary is still
+# retrievable with its context
+CHUNK_CHARS = 1000
+CHUNK_OVERLAP = 150
+MIN_CHUNK_CHARS = 50
+
+# Pages per worker task; small PDFs are extracted in-process, since starting
+# the pool costs more than it saves
+PAGES_PER_TASK = 16
+PARALLEL_MIN_PAGES = 64
+
+# ==============================
+# PAGE EXTRACTION
+# ==============================
+
+_reader = None  # (path, PdfReader), reused across tasks in a worker process
+
+
+def extract_pages(pdf_path, start, stop):
+    """Text of pages [start, stop) of pdf_path (runs in a worker process)."""
+    global _reader
+    if _reader is None or _reader[0] != pdf_path:
+        _reader = (pdf_path, PdfReader(pdf_path))
+    pages = _reader[1].pages
+    return [pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pages(pdf_path, pool=None, workers=None):
+    """Yield each page's text in order.
+
+    With a pool, page ranges are extracted in parallel, but only about two
+    tasks per worker are in flight at once, so memory does not grow with the
+    size of the PDF.
+    """
+    reader = PdfReader(pdf_path)
+    n_pages = len(reader.pages)
+    if pool is None or n_pages < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+    del reader
+
+    window = 2 * (workers or os.cpu_count() or 1)
+    ranges = deque((s, min(s + PAGES_PER_TASK, n_pages)) for s in range(0, n_pages, PAGES_PER_TASK))
+    pending = deque()
+    while ranges or pending:
+        while ranges and len(pending) < window:
+            pending.append(pool.submit(extract_pages, pdf_path, *ranges.popleft()))
+        yield from pending.popleft().result()
+
+# ==============================
+# CHUNKING
+# ==============================
+
+def _cut(text, limit):
+    """Where to end a chunk of text[:limit]: a paragraph, line, sentence or word break."""
+    floor = limit // 2
+    for sep in ("\n\n", "\n", ". ", " "):
+        at = text.rfind(sep, floor, limit)
+        if at != -1:
+            return at + len(sep)
+    return limit
+
+
+def chunk_pages(pages, size=CHUNK_CHARS, overlap=CHUNK_OVERLAP, min_chars=MIN_CHUNK_CHARS):
+    """Yield chunks of at most `size` characters from an iterable of page texts.
+
+    Chunks end on the nearest paragraph, line, sentence or word break and
+    start `overlap` characters (rounded to a word) before the previous end.
+    Only the unchunked tail is buffered, so this streams.
+    """
+    buf = ""
+    covered = 0  # leading characters of buf already emitted in a chunk
+    for page in pages:
+        buf += page + "\n"
+        while len(buf) >= size:
+            cut = _cut(buf, size)
+            chunk = buf[:cut].strip()
+            if len(chunk) >= min_chars:
+                yield chunk
+            start = max(cut - overlap, 1)
+            space = buf.find(" ", start, cut)
+            start = space + 1 if space != -1 else cut
+            buf, covered = buf[start:], cut - start
+    tail = buf.strip()
+    # Skip a tail that only repeats the last chunk's overlap
+    if buf[covered:].strip() and len(tail) >= min_chars:
+        yield tail
+
+
+def iter_chunks(pdf_path, pool=None, workers=None, **chunking):
+    """Chunks of one PDF, streamed page by page."""
+    return chunk_pages(iter_pages(pdf_path, pool, workers), **chunking)
+
+
+def ingest_pdfs(pdf_paths, workers=None, **chunking):
+    """Yield (chunk, filename) for every PDF, extracting pages in a process pool.
+
+    A PDF that cannot be read is reported and skipped.
+    """
+    # spawn: the apps call this with server threads running, where fork is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for pdf_path in pdf_paths:
+            filename = os.path.basename(pdf_path)
+            try:
+                for chunk in iter_chunks(pdf_path, pool, workers, **chunking):
+                    yield chunk, filename
+            except Exception as e:
+                print(f"Error reading {pdf_path}: {e}")
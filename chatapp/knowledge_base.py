@@ -0,0 +1,99 @@
+import numpy as np
+
+from lexical_index import BM25Index
+from vector_index import ExactIndex
+
+# Reciprocal rank fusion: a chunk scores sum(1 / (RRF_K + rank)) over the
+# rankings it appears in; 60 is the constant from the original RRF paper
+RRF_K = 60
+# Chunks taken from each ranking before fusing
+RRF_CANDIDATES = 20
+
+
+def normalize(vectors):
+    """Rows scaled to unit length as a C-contiguous float32 matrix (zero rows stay zero)."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2, order="C")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    return vectors
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse rankings (arrays of row indices, best first) into (rows, scores), best first."""
+    fused = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking.tolist(), start=1):
+            fused[row] = fused.get(row, 0.0) + 1.0 / (k + rank)
+    # Ties (a chunk ranked r by one side only) keep PDF order
+    ordered = sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+    return [row for row, _ in ordered], [score for _, score in ordered]
+
+
+class KnowledgeBase:
+    """All chunks as one pre-normalized float32 matrix plus parallel arrays.
+
+    Row i of `embeddings` belongs to `contents[i]` from `sources[i]`. Since the
+    rows are unit length, cosine similarity is a dot product. `index` picks the
+    search backend (see vector_index); the default scans every row. `lexical`
+    is a BM25 index over the same chunks, built with the snapshot.
+
+    A KnowledgeBase is never modified after construction (the matrix is made
+    read-only), so it can be searched from any thread while a newer one is
+    being built.
+    """
+
+    def __init__(self, contents=(), sources=(), embeddings=None, index=None):
+        self.contents = tuple(contents)
+        self.sources = tuple(sources)
+        if embeddings is None or len(self.contents) == 0:
+            self.embeddings = np.empty((0, 0), dtype=np.float32)
+        else:
+            self.embeddings = normalize(embeddings)
+        if len(self.embeddings) != len(self.contents) or len(self.sources) != len(self.contents):
+            raise ValueError("contents, sources and embeddings must have the same length")
+        self.embeddings.flags.writeable = False
+        self.index = index or ExactIndex()
+        if len(self.contents):
+            self.index.build(self.embeddings, self.contents)
+        self.lexical = BM25Index(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def search(self, query_embedding, top_k=4):
+        """[(score, content, source)] for the top_k chunks by cosine similarity."""
+        if not len(self):
+            return []
+        rows, scores = self.index.search(normalize(query_embedding)[0], top_k)
+        return [
+            (float(score), self.contents[i], self.sources[i])
+            for i, score in zip(rows, scores)
+        ]
+
+    def search_lexical(self, query, top_k=4):
+        """[(BM25 score, content, source)] for the top_k chunks matching the words of query."""
+        rows, scores = self.lexical.search(query, top_k)
+        return [
+            (float(score), self.contents[i], self.sources[i])
+            for i, score in zip(rows, scores)
+        ]
+
+    def hybrid_search(self, query, query_embedding=None, top_k=4, candidates=RRF_CANDIDATES):
+        """[(fused score, content, source)]: vector and BM25 rankings fused with RRF.
+
+        Exact terms (product names, varieties, doses) that embeddings blur are
+        still found by BM25. Without a query_embedding this is BM25 alone.
+        """
+        if not len(self):
+            return []
+        if query_embedding is None:
+            return self.search_lexical(query, top_k)
+        n = max(candidates, top_k)
+        vector_rows, _ = self.index.search(normalize(query_embedding)[0], n)
+        lexical_rows, _ = self.lexical.search(query, n)
+        rows, scores = reciprocal_rank_fusion([vector_rows, lexical_rows])
+        return [
+            (score, self.contents[i], self.sources[i])
+            for i, score in zip(rows[:top_k], scores[:top_k])
+        ]
@@ -0,0 +1,96 @@
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from vector_index import top_k_indices
+
+# Okapi BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Words, numbers and joined forms such as "2.5", "npk-19" or "2,4-d", so
+# product names and doses match as one term
+_TOKEN = re.compile(r"[a-z0-9]+(?:[.,\-/][a-z0-9]+)*")
+_JOINERS = re.compile(r"[\-/]")
+
+
+def tokenize(text):
+    """Lowercase terms of text; a hyphen- or slash-joined term also yields its parts
+    ("npk-19" -> "npk-19", "npk", "19"), so either spelling of a query matches."""
+    tokens = _TOKEN.findall(text.lower())
+    tokens += [part for token in tokens if "-" in token or "/" in token
+               for part in _JOINERS.split(token) if part]
+    return tokens
+
+
+class BM25Index:
+    """BM25 over chunk texts, with posting lists in flat NumPy arrays.
+
+    The postings of term t are rows offsets[t]:offsets[t + 1] of `doc_ids`
+    and `weights`, sorted by chunk. A posting's weight is the term's full BM25
+    contribution to that chunk (idf, term frequency and length normalization
+    are all fixed at build time), so a query only adds up the weight slices of
+    its terms. Apart from the term -> id dict, the index is three arrays:
+    8 bytes per posting plus 8 per term.
+    """
+
+    def __init__(self, contents=(), k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(contents)
+        self.vocab = {}
+        # (term, chunk, term frequency) per distinct term of each chunk, in
+        # compact arrays rather than lists of Python ints
+        term_ids, doc_ids, tfs = array("i"), array("i"), array("i")
+        doc_len = np.zeros(self.n_docs, dtype=np.float32)
+        for doc, text in enumerate(contents):
+            counts = Counter(tokenize(text))
+            doc_len[doc] = sum(counts.values())
+            term_ids.extend(self.vocab.setdefault(token, len(self.vocab)) for token in counts)
+            doc_ids.extend([doc] * len(counts))
+            tfs.extend(counts.values())
+
+        # Group the postings by term; chunks stay in order within a term
+        term_ids = np.frombuffer(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind="stable")
+        posting_terms = term_ids[order]
+        self.doc_ids = np.frombuffer(doc_ids, dtype=np.int32)[order]
+        tf = np.frombuffer(tfs, dtype=np.int32)[order].astype(np.float32)
+        self.offsets = np.searchsorted(posting_terms, np.arange(len(self.vocab) + 1)).astype(np.int64)
+
+        df = np.diff(self.offsets).astype(np.float32)
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+        avg_len = doc_len.mean() if self.n_docs else 1.0
+        norm = k1 * (1 - b + b * doc_len[self.doc_ids] / max(avg_len, 1e-9))
+        self.weights = (idf[posting_terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+
+    def __len__(self):
+        return self.n_docs
+
+    @property
+    def nbytes(self):
+        return self.doc_ids.nbytes + self.weights.nbytes + self.offsets.nbytes
+
+    def search(self, query, k):
+        """(row indices, scores) of the k best-matching chunks, best first.
+
+        Only chunks sharing at least one term with the query are returned, so
+        there may be fewer than k.
+        """
+        counts = {}
+        for token in tokenize(query):
+            term = self.vocab.get(token)
+            if term is not None:
+                counts[term] = counts.get(term, 0) + 1
+        if not counts:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term, count in counts.items():
+            start, stop = self.offsets[term], self.offsets[term + 1]
+            # A term's postings hold each chunk once, so += does not drop repeats
+            scores[self.doc_ids[start:stop]] += count * self.weights[start:stop]
+        matched = np.flatnonzero(scores)
+        idx = matched[top_k_indices(scores[matched], k)]
+        return idx, scores[idx]
@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+
+class BackgroundLoader:
+    """Creates the indexer and loads the knowledge base off the request path.
+
+    The apps import this module instead of `indexer`, so numpy, pypdf and the
+    model client are only imported by the loader thread, after the server is
+    already answering. `make_indexer()` runs in that thread.
+
+    The saved snapshot (if any) is loaded first, which only reads the
+    embedding cache; the loader is ready as soon as that is searchable. It then
+    reindexes data_dir for PDFs that changed while the server was down (on a
+    first start, this is the full build) and starts the watcher.
+
+    state: "starting" -> "loading" -> "ready", or "failed" if the indexer could
+    not be created.
+    """
+
+    def __init__(self, make_indexer, watch_interval=0):
+        self.make_indexer = make_indexer
+        self.watch_interval = watch_interval
+        self.indexer = None
+        self.error = None
+        self.ready_at = None
+        self._state = "starting"
+        self._ready = threading.Event()
+        self._stopped = False
+        self._started_at = None
+        self._thread = None
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def knowledge_base(self):
+        """The current snapshot, or None until the indexer exists."""
+        return self.indexer.knowledge_base if self.indexer is not None else None
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="kb-loader")
+        self._thread.start()
+
+    def _set_ready(self, state="ready"):
+        if not self._ready.is_set():
+            self.ready_at = time.time()
+            print(f"Knowledge base {state} after {self.ready_at - self._started_at:.1f}s.")
+        self._state = state
+        self._ready.set()
+
+    def _run(self):
+        try:
+            self._state = "loading"
+            indexer = self.make_indexer()
+            self.indexer = indexer
+            if indexer.load_snapshot():
+                self._set_ready()
+            indexer.reindex()
+            self._set_ready()
+            if not self._stopped:
+                indexer.start_watcher(self.watch_interval)
+        except Exception as e:
+            print(f"Knowledge base loading failed: {e}")
+            self.error = str(e)
+            self._set_ready("failed")
+
+    async def wait_ready(self, timeout):
+        """Wait up to `timeout` seconds for the first snapshot; returns whether it is there.
+
+        Polls instead of blocking a thread per waiting request, since every
+        chat that arrives during startup waits here.
+        """
+        deadline = time.monotonic() + timeout
+        while not self._ready.is_set() and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return self._ready.is_set()
+
+    def stop(self):
+        self._stopped = True
+        if self.indexer is not None:
+            self.indexer.stop_watcher()
@@ -1,32 +1,20 @@
+import asyncio
+import glob
 import os
-import sys
-
-# PATH HACK: Force the script to look into the local .venv site-packages
-# This fixes issues where uvicorn --reload might use the system Python.
-project_root = os.path.dirname(os.path.abspath(__file__))
-venv_site_packages = os.path.join(project_root, ".venv", "Lib", "site-packages")
-if os.path.exists(venv_site_packages) and venv_site_packages not in sys.path:
-    sys.path.insert(0, venv_site_packages)
-
-from fastapi import FastAPI, HTTPException
+import secrets
+import threading
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google import genai
-import glob
-from pypdf import PdfReader
-import numpy as np
 from dotenv import load_dotenv
-import os
-import sys
+from chat_cache import TTLCache, normalize_query
+from loader import BackgroundLoader
+from prompt import PromptBuilder
 
 # Load environment variables
 load_dotenv()
 
-# DEBUG: Print environment info
-print(f"DEBUG: Using Python Executable: {sys.executable}")
-# print(f"DEBUG: Python Path: {sys.path}")
-
 app = FastAPI(title="AgroMart PDF RAG")
 
 # CORS middleware
@@ -45,90 +33,132 @@ if not API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables")
 
 DATA_DIR = "data"
+# Seconds between checks of DATA_DIR for new/changed PDFs
+WATCH_INTERVAL = 30
+# Seconds a chat that arrives during startup waits for the knowledge base
+READY_TIMEOUT = 20
+# Seconds to wait for the query embedding before answering from BM25 alone
+EMBED_TIMEOUT = float(os.getenv("RAG_EMBED_TIMEOUT", "3"))
+# /admin endpoints require this value in the X-Admin-Token header; unset,
+# they are disabled (a forced reindex re-embeds every PDF on the paid API)
+ADMIN_TOKEN = os.getenv("RAG_ADMIN_TOKEN")
+# Repeated questions skip the embedding call and, when they retrieve the
+# same chunks, the generation call too
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 24 * 3600
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600
+
+# Backend Client, created on first use (importing google.genai is slow)
+client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global client
+    with _client_lock:
+        if client is None:
+            from google import genai
+            client = genai.Client(api_key=API_KEY)
+    return client
 
-# Backend Client
-client = genai.Client(api_key=API_KEY)
+async def model_client():
+    return client if client is not None else await asyncio.to_thread(get_client)
 
 # Model configuration
 EMBEDDING_MODEL = "text-embedding-004"
-GENERATION_MODEL = "gemini-3-flash-preview"
+# Stable flash, the model /chat streams from (and part of the response cache key)
+GENERATION_MODEL = "gemini-2.0-flash"
 
 class ChatRequest(BaseModel):
     message: str
 
-# In-memory storage for PDF text and embeddings
-knowledge_base = []
+def make_indexer():
+    from indexer import Indexer
+    return Indexer(get_client(), EMBEDDING_MODEL, DATA_DIR)
+
+# In-memory storage for PDF text and embeddings: an immutable snapshot that
+# the indexer replaces when PDFs in DATA_DIR change. The loader builds it in
+# the background, so the server answers while it loads.
+loader = BackgroundLoader(make_indexer, WATCH_INTERVAL)
+query_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
 
 def load_knowledge_base():
-    """Reads all PDFs and stores their content as chunks."""
-    global knowledge_base
-    knowledge_base = []
-    
+    """Starts loading the saved snapshot, then new or changed PDFs, in the background."""
     pdf_files = glob.glob(os.path.join(DATA_DIR, "*.pdf"))
     if not pdf_files:
         print("No PDF files found in data directory.")
-        return
-
-    for pdf_path in pdf_files:
-        print(f"Loading {pdf_path}...")
-        reader = PdfReader(pdf_path)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        
-        # Simple chunking by paragraph
-        chunks = [c.strip() for c in text.split("\n\n") if len(c.strip()) > 30]
-        
-        # Calculate embeddings for each chunk
-        for chunk in chunks:
-            try:
-                response = client.models.embed_content(
-                    model="text-embedding-004",
-                    contents=chunk
-                )
-                embedding = response.embeddings[0].values
-                knowledge_base.append({
-                    "content": chunk,
-                    "embedding": embedding,
-                    "source": os.path.basename(pdf_path)
-                })
-            except Exception as e:
-                print(f"Error embedding chunk from {pdf_path}: {e}")
-
-    print(f"Knowledge base loaded with {len(knowledge_base)} chunks.")
-
-# Initialize knowledge base on startup
+    print(f"Loading {len(pdf_files)} PDF(s) in the background...")
+    loader.start()
+
+# Initialize knowledge base on startup, then pick up PDF changes as they happen
 @app.on_event("startup")
 async def startup_event():
     load_knowledge_base()
 
-def get_cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+@app.on_event("shutdown")
+async def shutdown_event():
+    loader.stop()
 
-def find_relevant_context(query_text, limit=3):
-    """Finds the most similar chunks from the knowledge base."""
+def check_admin(token):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (RAG_ADMIN_TOKEN is not set)")
+    if token is None or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if loader.indexer is None:
+        raise HTTPException(status_code=503, detail="Knowledge base is still loading")
+    return loader.indexer
+
+@app.post("/admin/reindex")
+async def admin_reindex(force: bool = False, x_admin_token: str | None = Header(None)):
+    """Start a background reindex of DATA_DIR; returns its progress."""
+    indexer = check_admin(x_admin_token)
+    started = indexer.reindex_in_background(force)
+    return {"started": started, **indexer.progress}
+
+@app.get("/admin/reindex")
+async def admin_reindex_progress(x_admin_token: str | None = Header(None)):
+    indexer = check_admin(x_admin_token)
+    return indexer.progress
+
+async def embed_query(query_text):
+    """Query embedding, from query_cache when this question was asked before."""
+    key = normalize_query(query_text)
+    embedding = query_cache.get(key)
+    if embedding is None:
+        query_response = await (await model_client()).aio.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=query_text
+        )
+        embedding = query_response.embeddings[0].values
+        query_cache.put(key, embedding)
+    return embedding
+
+async def find_relevant_context(query_text, limit=3):
+    """Finds the most similar chunks from the knowledge base.
+
+    Returns (results, chunk ids); the ids identify the retrieved chunks in
+    the response cache key.
+    """
+    # Wait (bounded) for the knowledge base if the server is still starting
+    await loader.wait_ready(READY_TIMEOUT)
+    knowledge_base = loader.knowledge_base  # one snapshot for the whole request
     if not knowledge_base:
-        return "No information available in the PDF knowledge base."
-    
-    # Embed the user query
-    query_response = client.models.embed_content(
-        model="text-embedding-004",
-        contents=query_text
-    )
-    query_embedding = query_response.embeddings[0].values
-    
-    # Calculate similarities
-    similarities = []
-    for item in knowledge_base:
-        sim = get_cosine_similarity(query_embedding, item["embedding"])
-        similarities.append((sim, item))
+        return [], ()
     
-    # Sort by similarity
-    similarities.sort(key=lambda x: x[0], reverse=True)
+    # Embed the user query; if that fails or takes longer than EMBED_TIMEOUT,
+    # fall back to keyword (BM25) search
+    try:
+        query_embedding = await asyncio.wait_for(embed_query(query_text), EMBED_TIMEOUT)
+    except Exception as e:
+        print(f"Query embedding unavailable ({e!r}); using keyword search only")
+        query_embedding = None
     
-    # Format top results
-    relevant_chunks = [f"[Source: {item['source']}] {item['content']}" for sim, item in similarities[:limit]]
-    return "\n\n".join(relevant_chunks)
+    # Cosine similarity fused with BM25 keyword matches (reciprocal rank
+    # fusion), in the thread pool so the event loop keeps serving
+    results = await asyncio.to_thread(knowledge_base.hybrid_search, query_text, query_embedding, limit)
+    from embedding_cache import chunk_key  # loaded by the indexer by now
+    return results, tuple(f"{source}:{chunk_key(content)}" for _, content, source in results)
 
 @app.post("/chat")
 async def chat_endpoint(request: ChatRequest):
@@ -136,10 +166,52 @@ async def chat_endpoint(request: ChatRequest):
         user_query = request.message
         
         # 1. Search for relevant context in the PDF database
-        context = find_relevant_context(user_query)
+        results, chunk_ids = await find_relevant_context(user_query)
+
+        # Same question over the same chunks: replay the stored answer, no model call
+        cache_key = (normalize_query(user_query), chunk_ids, GENERATION_MODEL)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            async def cached_gen():
+                for piece in cached:
+                    yield piece
+            return StreamingResponse(cached_gen(), media_type="text/plain")
+
+        # 2. Strong system prompt first (the same bytes every request), then the
+        # merged, budgeted context and the query
+        contents, prompt_stats = prompt_builder.build(user_query, results)
+        print(f"Prompt: ~{prompt_stats['prompt_tokens']} tokens "
+              f"(context {prompt_stats['context_tokens']} from {prompt_stats['passages']} passages)")
+
+        async def generate():
+            pieces = []
+            try:
+                stream_response = await (await model_client()).aio.models.generate_content_stream(
+                    model=GENERATION_MODEL,
+                    contents=contents
+                )
+                async for chunk in stream_response:
+                    if chunk.text:
+                        pieces.append(chunk.text)
+                        yield chunk.text
+            except Exception as inner_e:
+                yield f"Error during generation: {str(inner_e)}"
+                return
+            # Only complete answers are cached (not errors or dropped streams)
+            if pieces:
+                response_cache.put(cache_key, tuple(pieces))
 
-# 2. Strong System Prompt implementation
-        system_prompt = f"""
+        return StreamingResponse(generate(), media_type="text/plain")
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in chat endpoint: {error_msg}")
+        def error_gen():
+            yield f"Endpoint Error: {error_msg}"
+        return StreamingResponse(error_gen(), media_type="text/plain")
+
+# Strong System Prompt implementation
+SYSTEM_PROMPT = """
 You are **AgroMart AI**, an expert agricultural assistant.
 
 ========================
@@ -166,33 +238,24 @@ MANDATORY RESPONSE BEHAVIOR
 ========================
 OFFICIAL CONTEXT:
 ========================
-{context}
 """
 
-        def generate():
-            try:
-                stream_response = client.models.generate_content_stream(
-                    model="gemini-2.0-flash", # Using stable flash for generation
-                    contents=f"{system_prompt}\n\nUser Query: {user_query}"
-                )
-                for chunk in stream_response:
-                    if chunk.text:
-                        yield chunk.text
-            except Exception as inner_e:
-                yield f"Error during generation: {str(inner_e)}"
-
-        return StreamingResponse(generate(), media_type="text/plain")
-
-    except Exception as e:
-        error_msg = str(e)
-        print(f"Error in chat endpoint: {error_msg}")
-        def error_gen():
-            yield f"Endpoint Error: {error_msg}"
-        return StreamingResponse(error_gen(), media_type="text/plain")
+prompt_builder = PromptBuilder(
+    SYSTEM_PROMPT,
+    no_context="No information available in the PDF knowledge base.",
+    question_label="User Query",
+)
 
 @app.get("/")
 async def root():
-    return {"message": "AgroMart PDF RAG API is running"}
+    return {
+        "message": "AgroMart PDF RAG API is running",
+        "knowledge_base": loader.state,
+        "cache": {
+            "query_embeddings": query_cache.stats(),
+            "responses": response_cache.stats(),
+        },
+    }
 
 if __name__ == "__main__":
     import uvicorn
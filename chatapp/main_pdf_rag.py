@@ -1,15 +1,17 @@
+import asyncio
 import os
-import sys
+import secrets
 import glob
-import numpy as np
-from fastapi import FastAPI, HTTPException
+import threading
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from google import genai
-from pypdf import PdfReader
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
+from chat_cache import TTLCache, normalize_query
+from loader import BackgroundLoader
+from prompt import CONTEXT_TOKEN_BUDGET, PromptBuilder
 
 # Load environment variables
 load_dotenv()
@@ -23,73 +25,80 @@ DATA_DIR = "data"
 # Verified compatible models
 EMBEDDING_MODEL = "models/gemini-embedding-001"
 GENERATION_MODEL = "models/gemini-3-flash-preview"
+# Retrieval backend: "exact" scans every chunk, "ivf" is approximate and
+# meant for large manual libraries (its index is saved under data/.vector_index)
+INDEX_BACKEND = os.getenv("RAG_INDEX", "exact")
+# Retrieval: "hybrid" fuses vector and BM25 (keyword) rankings, "vector"
+# and "lexical" use one side only ("lexical" never calls the embedding API)
+RETRIEVAL = os.getenv("RAG_RETRIEVAL", "hybrid")
+# Seconds to wait for the query embedding before answering from BM25 alone
+EMBED_TIMEOUT = float(os.getenv("RAG_EMBED_TIMEOUT", "3"))
+# Estimated tokens of retrieved context per prompt
+CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", CONTEXT_TOKEN_BUDGET))
+# Repeated questions (greetings, "how to prune apple") skip the embedding call
+# and, when they retrieve the same chunks, the generation call too
+QUERY_CACHE_SIZE = 1024
+QUERY_CACHE_TTL = 24 * 3600
+RESPONSE_CACHE_SIZE = 256
+RESPONSE_CACHE_TTL = 3600
+# Seconds between checks of DATA_DIR for new/changed PDFs (0 disables)
+WATCH_INTERVAL = int(os.getenv("RAG_WATCH_INTERVAL", "30"))
+# Seconds a chat that arrives during startup waits for the knowledge base
+# before it is answered without context
+READY_TIMEOUT = 20
+# /admin endpoints require this value in the X-Admin-Token header; unset,
+# they are disabled (a forced reindex re-embeds every PDF on the paid API)
+ADMIN_TOKEN = os.getenv("RAG_ADMIN_TOKEN")
 
-# Backend Client
-client = genai.Client(api_key=API_KEY)
+# Backend Client, created on first use: importing google.genai takes longer
+# than starting the server
+client = None
+_client_lock = threading.Lock()
 
-# Global memory for RAG
-knowledge_base = []
+def get_client():
+    global client
+    with _client_lock:
+        if client is None:
+            from google import genai
+            client = genai.Client(api_key=API_KEY)
+    return client
+
+async def model_client():
+    """get_client() without blocking the event loop on the first call."""
+    return client if client is not None else await asyncio.to_thread(get_client)
+
+def make_indexer():
+    """Create the indexer (runs in the loader thread, so its imports do too)."""
+    from indexer import Indexer
+    return Indexer(get_client(), EMBEDDING_MODEL, DATA_DIR, INDEX_BACKEND)
 
 def load_knowledge_base():
-    """Reads all PDFs in the data directory and generates embeddings."""
-    global knowledge_base
-    knowledge_base = []
-    
+    """Starts loading the knowledge base in the background; returns at once.
+
+    The snapshot saved by the last run is loaded first. Then only new or
+    changed PDFs are read, and only chunks without a cached embedding are
+    embedded.
+    """
     if not os.path.exists(DATA_DIR):
         print(f"Error: Data directory '{DATA_DIR}' not found.")
-        return
-
-    pdf_files = glob.glob(os.path.join(DATA_DIR, "*.pdf"))
-    if not pdf_files:
+    elif not glob.glob(os.path.join(DATA_DIR, "*.pdf")):
         print("No PDF files found in data directory.")
-        return
-
-    print(f"Processing {len(pdf_files)} PDF(s)...")
-    for pdf_path in pdf_files:
-        try:
-            reader = PdfReader(pdf_path)
-            filename = os.path.basename(pdf_path)
-            
-            # Extract text from all pages
-            full_text = ""
-            for i, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    full_text += page_text + "\n"
-            
-            # Simple chunking logic: split by double newline or fixed length
-            # Aim for chunks around 500-1000 characters
-            paragraphs = [p.strip() for p in full_text.split("\n\n") if len(p.strip()) > 50]
-            
-            for chunk in paragraphs:
-                try:
-                    # Generate embedding
-                    embed_res = client.models.embed_content(
-                        model=EMBEDDING_MODEL,
-                        contents=chunk
-                    )
-                    embedding = embed_res.embeddings[0].values
-                    
-                    knowledge_base.append({
-                        "content": chunk,
-                        "embedding": embedding,
-                        "source": filename
-                    })
-                except Exception as e:
-                    print(f"Error embedding chunk from {filename}: {e}")
-                    
-        except Exception as e:
-            print(f"Error reading {pdf_path}: {e}")
-
-    print(f"Successfully loaded {len(knowledge_base)} chunks into memory.")
+    loader.start()
+
+# Global memory for RAG: an immutable snapshot, swapped in by the indexer
+# when PDFs in DATA_DIR are added, changed or removed
+loader = BackgroundLoader(make_indexer, WATCH_INTERVAL)
+query_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL)
+response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Load PDFs
+    # Startup: load the knowledge base in the background and serve meanwhile;
+    # the loader watches DATA_DIR for changes once it is loaded
     load_knowledge_base()
     yield
-    # Shutdown: Clear memory
-    knowledge_base.clear()
+    # Shutdown: stop the watcher
+    loader.stop()
 
 app = FastAPI(title="AgroMart RAG Service", lifespan=lifespan)
 
@@ -105,42 +114,9 @@ app.add_middleware(
 class ChatRequest(BaseModel):
     message: str
 
-def get_cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-def find_context(query, top_k=4):
-    """Finds most relevant chunks based on cosine similarity."""
-    if not knowledge_base:
-        return ""
-    
-    try:
-        # Embed query
-        query_res = client.models.embed_content(
-            model=EMBEDDING_MODEL,
-            contents=query
-        )
-        query_embedding = query_res.embeddings[0].values
-        
-        # Calculate similarities
-        scores = []
-        for item in knowledge_base:
-            similarity = get_cosine_similarity(query_embedding, item["embedding"])
-            scores.append((similarity, item))
-        
-        # Sort and take top_k
-        scores.sort(key=lambda x: x[0], reverse=True)
-        top_chunks = [f"[Source: {s[1]['source']}] {s[1]['content']}" for s in scores[:top_k]]
-        return "\n\n".join(top_chunks)
-    except Exception as e:
-        print(f"Search error: {e}")
-        return ""
-
-@app.post("/chat")
-async def chat(request: ChatRequest):
-    try:
-        context = find_context(request.message)
-        
-        system_prompt = f"""
+# Instructions shared by every prompt. Keep per-request text out of it: an
+# identical prefix is what lets the provider cache it across requests.
+SYSTEM_PROMPT = """
 You are **AgroMart AI**, an expert agricultural assistant.
 
 ========================
@@ -155,21 +131,104 @@ RESPONSE PROTOCOL
 ========================
 DATABASE CONTEXT:
 ========================
-{context if context else "No relevant data found."}
 """
 
-        def stream_gen():
+prompt_builder = PromptBuilder(SYSTEM_PROMPT, CONTEXT_TOKENS)
+
+async def embed_query(query):
+    """Query embedding, from query_cache when this question was asked before."""
+    key = normalize_query(query)
+    embedding = query_cache.get(key)
+    if embedding is None:
+        # Embed query on the async client so the event loop keeps serving
+        query_res = await (await model_client()).aio.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=query
+        )
+        embedding = query_res.embeddings[0].values
+        query_cache.put(key, embedding)
+    return embedding
+
+async def find_context(query, top_k=4):
+    """Finds the most relevant chunks by cosine similarity fused with BM25.
+
+    If the embedding service fails or takes longer than EMBED_TIMEOUT, the
+    chunks come from the BM25 index alone.
+
+    Returns (results, chunk ids): [(score, content, source)], and ids that
+    identify the retrieved chunks in the response cache key (None when the
+    search failed).
+    """
+    # One snapshot for the whole request, even if a reindex swaps it meanwhile
+    knowledge_base = loader.knowledge_base
+    if not knowledge_base:
+        return [], ()
+    
+    from embedding_cache import chunk_key  # loaded by the indexer by now
+    try:
+        query_embedding = None
+        if RETRIEVAL != "lexical":
+            try:
+                query_embedding = await asyncio.wait_for(embed_query(query), EMBED_TIMEOUT)
+            except Exception as e:
+                if RETRIEVAL == "vector":
+                    raise
+                print(f"Query embedding unavailable ({e!r}); using keyword search only")
+        
+        # Search in the thread pool: scanning a large library is CPU work that
+        # would otherwise hold up every other request
+        if RETRIEVAL == "vector":
+            results = await asyncio.to_thread(knowledge_base.search, query_embedding, top_k)
+        else:
+            results = await asyncio.to_thread(knowledge_base.hybrid_search, query, query_embedding, top_k)
+        chunk_ids = tuple(f"{source}:{chunk_key(content)}" for _, content, source in results)
+        return results, chunk_ids
+    except Exception as e:
+        print(f"Search error: {e}")
+        return [], None
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    try:
+        # During startup, wait (bounded) for the knowledge base rather than
+        # answer without it
+        await loader.wait_ready(READY_TIMEOUT)
+        results, chunk_ids = await find_context(request.message)
+
+        # Same question over the same chunks: replay the stored answer, no model call
+        cache_key = (normalize_query(request.message), chunk_ids, GENERATION_MODEL)
+        cached = response_cache.get(cache_key) if chunk_ids is not None else None
+        if cached is not None:
+            async def cached_gen():
+                for piece in cached:
+                    yield piece
+            return StreamingResponse(cached_gen(), media_type="text/plain")
+        
+        # Overlapping chunks merged, context cut to CONTEXT_TOKENS, after the fixed prefix
+        contents, prompt_stats = prompt_builder.build(request.message, results)
+
+        async def stream_gen():
+            pieces = []
+            usage = None
             try:
-                response_stream = client.models.generate_content_stream(
+                response_stream = await (await model_client()).aio.models.generate_content_stream(
                     model=GENERATION_MODEL,
-                    contents=f"{system_prompt}\n\nUser Question: {request.message}"
+                    contents=contents
                 )
-                for chunk in response_stream:
+                async for chunk in response_stream:
+                    usage = getattr(chunk, "usage_metadata", None) or usage
                     if chunk.text:
+                        pieces.append(chunk.text)
                         yield chunk.text
             except Exception as e:
                 print(f"Streaming error: {e}")
                 yield f"AI Service Error: {str(e)}"
+                return
+            finally:
+                log_prompt_tokens(prompt_stats, usage)
+            # Only complete answers are cached (not errors or dropped streams)
+            if pieces and chunk_ids is not None:
+                response_cache.put(cache_key, tuple(pieces))
 
         return StreamingResponse(stream_gen(), media_type="text/plain")
         
@@ -178,9 +237,53 @@ DATABASE CONTEXT:
         def err_gen(): yield f"Service Error: {str(e)}"
         return StreamingResponse(err_gen(), media_type="text/plain")
 
+def log_prompt_tokens(stats, usage):
+    """One line per generation: estimated prompt make-up, plus the model's own
+    token counts (and how many came from its cache) when it reports them."""
+    line = (f"Prompt: ~{stats['prompt_tokens']} tokens (prefix {stats['prefix_tokens']}, "
+            f"context {stats['context_tokens']} from {stats['passages']} passages; "
+            f"{stats['merged']} merged, {stats['truncated']} cut, {stats['dropped']} dropped)")
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        line += (f"; model counted {usage.prompt_token_count} prompt, "
+                 f"{getattr(usage, 'cached_content_token_count', None) or 0} cached, "
+                 f"{getattr(usage, 'candidates_token_count', None) or 0} output")
+    print(line)
+
+def check_admin(token):
+    """The indexer, once the admin token checks out and it exists."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="Admin endpoints are disabled (RAG_ADMIN_TOKEN is not set)")
+    if token is None or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    if loader.indexer is None:
+        raise HTTPException(status_code=503, detail="Knowledge base is still loading")
+    return loader.indexer
+
+@app.post("/admin/reindex")
+async def admin_reindex(force: bool = False, x_admin_token: str | None = Header(None)):
+    """Start a reindex of DATA_DIR in the background (force=true re-reads every PDF)."""
+    indexer = check_admin(x_admin_token)
+    started = indexer.reindex_in_background(force)
+    return {"started": started, **indexer.progress}
+
+@app.get("/admin/reindex")
+async def admin_reindex_progress(x_admin_token: str | None = Header(None)):
+    """Progress of the running (or last) reindex."""
+    indexer = check_admin(x_admin_token)
+    return indexer.progress
+
 @app.get("/")
 async def root():
-    return {"status": "running", "chunks_loaded": len(knowledge_base)}
+    knowledge_base = loader.knowledge_base
+    return {
+        "status": "running",
+        "knowledge_base": loader.state,
+        "chunks_loaded": len(knowledge_base) if knowledge_base is not None else 0,
+        "cache": {
+            "query_embeddings": query_cache.stats(),
+            "responses": response_cache.stats(),
+        },
+    }
 
 if __name__ == "__main__":
     import uvicorn
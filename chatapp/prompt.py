@@ -0,0 +1,128 @@
+# Gemini averages about 4 characters of English per token; close enough to
+# budget context without a count_tokens round trip
+CHARS_PER_TOKEN = 4
+# Context tokens per prompt; chunks past the budget are cut or left out
+CONTEXT_TOKEN_BUDGET = 1200
+# A chunk is only cut to fit if at least this many tokens of it fit
+MIN_PASSAGE_TOKENS = 60
+# Neighbouring chunks repeat up to ingest.CHUNK_OVERLAP characters; shorter
+# shared edges are coincidence, not overlap
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _overlap(a, b):
+    """Length of the longest suffix of a that is a prefix of b (0 if under MIN_OVERLAP_CHARS)."""
+    head = b[:MIN_OVERLAP_CHARS]
+    if len(head) < MIN_OVERLAP_CHARS:
+        return 0
+    start = a.find(head, max(0, len(a) - MAX_OVERLAP_CHARS))
+    while start != -1:
+        if b.startswith(a[start:]):
+            return len(a) - start
+        start = a.find(head, start + 1)
+    return 0
+
+
+def merge_passages(results):
+    """[(content, source)] of the retrieved chunks with duplicates and overlaps removed.
+
+    A chunk contained in an earlier one is dropped, and chunks that continue
+    each other (same PDF, the overlapping edge from ingestion) are joined into
+    one passage, in the position of the better ranked one.
+    """
+    passages = []
+    for _, content, source in results:
+        for i, (text, src) in enumerate(passages):
+            if src != source:
+                continue
+            if content in text:
+                break
+            if text in content:
+                passages[i] = (content, src)
+                break
+            after = _overlap(text, content)
+            if after:
+                passages[i] = (text + content[after:], src)
+                break
+            before = _overlap(content, text)
+            if before:
+                passages[i] = (content + text[before:], src)
+                break
+        else:
+            passages.append((content, source))
+    return passages
+
+
+def _truncate(text, max_chars):
+    """text cut to max_chars at the last sentence or word break."""
+    if len(text) <= max_chars:
+        return text
+    floor = max_chars // 2
+    for sep in (". ", "\n", " "):
+        at = text.rfind(sep, floor, max_chars)
+        if at != -1:
+            return text[:at + len(sep)].rstrip() + " …"
+    return text[:max_chars] + " …"
+
+
+class PromptBuilder:
+    """Builds the model input: fixed instructions, then context, then the question.
+
+    `system_prompt` goes first and never changes between requests, so every
+    prompt shares it byte for byte and the provider's implicit context cache
+    can reuse it. Everything per-request comes after it.
+
+    Context is packed in retrieval order until `token_budget` (estimated)
+    tokens are used: duplicates and overlapping chunks are merged first, and
+    the passage that crosses the budget is cut at a sentence break if enough
+    of it fits.
+    """
+
+    def __init__(self, system_prompt, token_budget=CONTEXT_TOKEN_BUDGET,
+                 no_context="No relevant data found.", question_label="User Question"):
+        self.system_prompt = system_prompt
+        self.token_budget = token_budget
+        self.no_context = no_context
+        self.question_label = question_label
+        self.prefix_tokens = estimate_tokens(system_prompt)
+
+    def pack(self, results):
+        """(context, stats) for [(score, content, source)] search results."""
+        passages = merge_passages(results)
+        parts, used, truncated = [], 0, 0
+        for content, source in passages:
+            text = f"[Source: {source}] {content}"
+            cost = estimate_tokens(text) + 1
+            if used + cost > self.token_budget:
+                room = self.token_budget - used
+                if room < MIN_PASSAGE_TOKENS:
+                    break
+                text = _truncate(text, room * CHARS_PER_TOKEN - 2)
+                cost = estimate_tokens(text) + 1
+                truncated += 1
+            parts.append(text)
+            used += cost
+        stats = {
+            "chunks": len(results),
+            "passages": len(parts),
+            "merged": len(results) - len(passages),
+            "dropped": len(passages) - len(parts),
+            "truncated": truncated,
+        }
+        return "\n\n".join(parts), stats
+
+    def build(self, question, results):
+        """(contents, stats): the full prompt and what went into it, with token estimates."""
+        context, stats = self.pack(results)
+        tail = f"{context or self.no_context}\n\n{self.question_label}: {question}"
+        stats.update(
+            prefix_tokens=self.prefix_tokens,
+            context_tokens=estimate_tokens(context),
+            prompt_tokens=self.prefix_tokens + estimate_tokens(tail),
+        )
+        return self.system_prompt + tail, stats
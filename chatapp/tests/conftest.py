@@ -0,0 +1,44 @@
+import os
+import random
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CHATAPP_DIR = os.path.join(TESTS_DIR, "..")
+sys.path.insert(0, CHATAPP_DIR)
+
+from fake_genai import FakeClient  # noqa: E402
+
+WORDS = ("apple cabbage soil compost prune irrigation seedling nursery spray mancozeb "
+         "fungicide harvest yield spacing fertilizer nitrogen potash mulch orchard pest").split()
+
+
+def words(seed, n):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def make_pdf(path, seed, pages=2):
+    """A guide-like PDF: `pages` pages of a few paragraphs of words drawn with `seed`."""
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate
+
+    styles = getSampleStyleSheet()
+    story = []
+    for page in range(pages):
+        for paragraph in range(3):
+            story.append(Paragraph(words(f"{seed}/{page}/{paragraph}", 60) + ".", styles["BodyText"]))
+        story.append(PageBreak())
+    SimpleDocTemplate(str(path)).build(story)
+    return str(path)
+
+
+def fake_client(**options):
+    """FakeClient that answers at once."""
+    return FakeClient(**{"latency": 0, "per_item": 0, "ttft": 0, "token_delay": 0, "tokens": 5, **options})
+
+
+@pytest.fixture
+def client():
+    return fake_client()
@@ -0,0 +1,121 @@
+import asyncio
+import importlib
+import threading
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from chat_cache import TTLCache
+from conftest import fake_client
+from fake_genai import fake_vector
+from knowledge_base import KnowledgeBase
+
+CHUNKS = [
+    "Prune apple trees in late winter, before the buds swell, removing crossing branches.",
+    "Spray mancozeb at 2.5 g per litre when apple scab appears on the leaves.",
+    "Transplant cabbage seedlings after four to six weeks, spaced 45 cm apart.",
+]
+QUESTION = "When should I prune apple trees?"
+
+
+@pytest.fixture(params=["main_pdf", "main_pdf_rag"])
+def app(request, monkeypatch):
+    """One of the chat apps over a small knowledge base, with a fake client and empty caches."""
+    monkeypatch.setenv("GEMINI_API_KEY", "fake")
+    module = importlib.import_module(request.param)
+    knowledge_base = KnowledgeBase(CHUNKS, ["apple.pdf"] * len(CHUNKS), [fake_vector(c) for c in CHUNKS])
+    ready = threading.Event()
+    ready.set()
+    monkeypatch.setattr(module.loader, "indexer", SimpleNamespace(knowledge_base=knowledge_base))
+    monkeypatch.setattr(module.loader, "_ready", ready)
+    monkeypatch.setattr(module, "client", fake_client())
+    monkeypatch.setattr(module, "query_cache", TTLCache(16, 60))
+    monkeypatch.setattr(module, "response_cache", TTLCache(16, 60))
+    return module
+
+
+def chat(app, message=QUESTION):
+    return TestClient(app.app).post("/chat", json={"message": message}).text
+
+
+def generations(app):
+    return app.client.models.generations
+
+
+def test_repeated_question_is_answered_from_the_cache(app):
+    answer = chat(app)
+    assert answer and generations(app) == 1
+    assert chat(app, "  when should i prune APPLE trees ") == answer
+    assert generations(app) == 1
+    assert app.client.models.calls == 1  # one query embedding
+
+    cache = TestClient(app.app).get("/").json()["cache"]
+    assert cache["query_embeddings"] == {"size": 1, "hits": 1, "misses": 1, "evictions": 0}
+    assert cache["responses"] == {"size": 1, "hits": 1, "misses": 1, "evictions": 0}
+
+
+def unavailable(stream):
+    async def generate(model, contents, config=None):
+        raise RuntimeError("503 UNAVAILABLE")
+
+    return generate
+
+
+def failing_midway(stream):
+    """generate_content_stream that streams one token, then fails."""
+    async def generate(model, contents, config=None):
+        tokens = await stream(model, contents, config)
+
+        async def broken():
+            yield await tokens.__anext__()
+            raise RuntimeError("stream reset")
+
+        return broken()
+
+    return generate
+
+
+@pytest.mark.parametrize("failure, error", [(unavailable, "503 UNAVAILABLE"), (failing_midway, "stream reset")])
+def test_generation_errors_are_not_cached(app, monkeypatch, failure, error):
+    models = app.client.aio.models
+    monkeypatch.setattr(models, "generate_content_stream", failure(models.generate_content_stream))
+    assert error in chat(app)
+    assert error in chat(app)
+    assert len(app.response_cache) == 0
+
+
+def test_dropped_streams_are_not_cached(app):
+    endpoint = next(route.endpoint for route in app.app.routes if getattr(route, "path", None) == "/chat")
+
+    async def read_first_piece():
+        response = await endpoint(app.ChatRequest(message=QUESTION))
+        first = await response.body_iterator.__anext__()
+        # The client goes away mid-answer
+        await response.body_iterator.aclose()
+        return first
+
+    assert asyncio.run(read_first_piece())
+    assert len(app.response_cache) == 0
+    assert chat(app) and generations(app) == 2
+
+
+def test_failed_search_is_not_cached(app, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(app.loader.knowledge_base, "hybrid_search", broken)
+    chat(app)
+    chat(app)
+    assert len(app.response_cache) == 0
+    # main_pdf_rag answers without context, main_pdf reports the error
+    assert generations(app) == (2 if app.__name__ == "main_pdf_rag" else 0)
+
+
+def test_slow_query_embedding_falls_back_to_keywords(app, monkeypatch):
+    monkeypatch.setattr(app, "EMBED_TIMEOUT", 0.05)
+    monkeypatch.setattr(app, "client", fake_client(latency=1))
+    assert chat(app)
+    assert len(app.query_cache) == 0
+    # Keyword-only retrieval still finds the chunks, so the answer is cached
+    assert len(app.response_cache) == 1
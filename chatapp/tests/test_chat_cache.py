@@ -0,0 +1,67 @@
+from chat_cache import TTLCache, normalize_query
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_query():
+    assert normalize_query("How to prune apple?") == "how to prune apple"
+    assert normalize_query("  how to\tprune   APPLE !! ") == "how to prune apple"
+    # Only trailing punctuation goes; doses and names keep theirs
+    assert normalize_query("Is 2.5 g/l of mancozeb safe?") == "is 2.5 g/l of mancozeb safe"
+
+
+def test_entries_expire_after_ttl():
+    clock = Clock()
+    cache = TTLCache(4, ttl=10, clock=clock)
+    cache.put("a", 1)
+    clock.now = 9.9
+    assert cache.get("a") == 1
+    # A hit does not extend the entry's life
+    clock.now = 10
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+    # Putting again starts a new ttl
+    cache.put("a", 2)
+    clock.now = 19.9
+    assert cache.get("a") == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    # Replacing an entry refreshes it and does not evict
+    cache.put("a", 4)
+    cache.put("d", 5)
+    assert cache.get("c") is None
+    assert cache.get("a") == 4 and cache.get("d") == 5
+    assert cache.evictions == 2
+
+
+def test_stats():
+    clock = Clock()
+    cache = TTLCache(1, ttl=10, clock=clock)
+    assert cache.stats() == {"size": 0, "hits": 0, "misses": 0, "evictions": 0}
+    cache.get("a")
+    cache.put("a", 1)
+    cache.get("a")
+    cache.get("a")
+    cache.put("b", 2)
+    clock.now = 10
+    cache.get("b")
+    assert cache.stats() == {"size": 0, "hits": 2, "misses": 2, "evictions": 1}
+    cache.put("c", 3)
+    cache.clear()
+    assert cache.stats()["size"] == 0
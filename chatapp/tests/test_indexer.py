@@ -0,0 +1,163 @@
+import functools
+import os
+import shutil
+
+import numpy as np
+
+import indexer
+from conftest import fake_client, make_pdf
+from embedding import embed_texts
+from embedding_cache import EmbeddingCache
+from indexer import Indexer
+
+MODEL = "fake-embedding"
+
+
+def sources(idx):
+    return sorted(set(idx.knowledge_base.sources))
+
+
+def changed_paths(idx):
+    changed, removed = idx.scan()
+    return [path for path, _ in changed], removed
+
+
+def test_added_changed_and_removed_pdfs(tmp_path, client):
+    idx = Indexer(client, MODEL, str(tmp_path))
+    apple = make_pdf(tmp_path / "apple.pdf", seed=1)
+    assert idx.reindex()
+    assert sources(idx) == ["apple.pdf"]
+    assert client.models.items == len(set(idx.chunks[apple]))
+
+    # Added: only the new PDF is read and only its chunks are embedded
+    cabbage = make_pdf(tmp_path / "cabbage.pdf", seed=2)
+    assert changed_paths(idx) == ([cabbage], [])
+    before = client.models.items
+    idx.reindex()
+    assert sources(idx) == ["apple.pdf", "cabbage.pdf"]
+    assert client.models.items - before == len(set(idx.chunks[cabbage]))
+
+    # Touched without new content: nothing to do
+    os.utime(apple, ns=(1, 1))
+    assert changed_paths(idx) == ([], [])
+    calls, version = client.models.calls, idx.progress["version"]
+    idx.reindex()
+    assert (client.models.calls, idx.progress["version"]) == (calls, version)
+
+    # Changed: the old chunks are replaced by the new ones
+    old = set(idx.chunks[apple])
+    make_pdf(apple, seed=3)
+    assert changed_paths(idx) == ([apple], [])
+    idx.reindex()
+    assert not old & set(idx.knowledge_base.contents)
+    assert set(idx.chunks[apple]) <= set(idx.knowledge_base.contents)
+
+    # Removed: its chunks leave the index and the embedding cache
+    os.remove(cabbage)
+    assert changed_paths(idx) == ([], [cabbage])
+    idx.reindex()
+    assert sources(idx) == ["apple.pdf"]
+    assert list(idx.files) == list(idx.chunks) == [apple]
+    assert len(EmbeddingCache(MODEL, idx.cache_dir)) == len(set(idx.chunks[apple]))
+
+
+def test_reindex_swaps_in_a_complete_snapshot(tmp_path, client):
+    idx = Indexer(client, MODEL, str(tmp_path))
+    make_pdf(tmp_path / "apple.pdf", seed=1)
+    idx.reindex()
+    old = idx.knowledge_base
+    old_contents = old.contents
+
+    # While the new snapshot is built, readers still get the old one
+    seen = []
+    build = idx._build
+
+    def spy(*args):
+        seen.append(idx.knowledge_base)
+        return build(*args)
+
+    idx._build = spy
+    make_pdf(tmp_path / "cabbage.pdf", seed=2)
+    idx.reindex()
+    assert seen == [old]
+    assert idx.knowledge_base is not old
+    # A request holding the old snapshot keeps a consistent index
+    assert old.contents == old_contents and len(old.embeddings) == len(old_contents)
+    assert set(old_contents) < set(idx.knowledge_base.contents)
+
+
+def test_reindex_does_not_overlap(tmp_path, client):
+    idx = Indexer(client, MODEL, str(tmp_path))
+    with idx._reindex_lock:
+        assert idx.running
+        assert not idx.reindex()
+        assert not idx.reindex_in_background()
+    assert idx.reindex()
+
+
+def test_chunks_that_fail_to_embed_are_retried(tmp_path, client, monkeypatch):
+    monkeypatch.setattr(indexer, "embed_texts", functools.partial(embed_texts, backoff=0))
+    idx = Indexer(client, MODEL, str(tmp_path))
+    apple = make_pdf(tmp_path / "apple.pdf", seed=1)
+    idx.reindex()
+
+    # The embedding API is down: the new PDF is read but not searchable
+    idx.client = fake_client(fail_rate=1.0)
+    cabbage = make_pdf(tmp_path / "cabbage.pdf", seed=2)
+    idx.reindex()
+    assert sources(idx) == ["apple.pdf"]
+    assert idx.progress["failed"] == len(set(idx.chunks[cabbage]))
+    assert list(idx.files) == [apple]
+
+    # Next scan the PDF is due again, and only its chunks are embedded
+    idx.client = client
+    assert changed_paths(idx) == ([cabbage], [])
+    before = client.models.items
+    idx.reindex()
+    assert sources(idx) == ["apple.pdf", "cabbage.pdf"]
+    assert idx.progress["failed"] == 0
+    assert client.models.items - before == len(set(idx.chunks[cabbage]))
+    assert changed_paths(idx) == ([], [])
+
+
+def test_clean_start_restores_the_snapshot(tmp_path, client, monkeypatch):
+    first = Indexer(client, MODEL, str(tmp_path))
+    make_pdf(tmp_path / "apple.pdf", seed=1)
+    make_pdf(tmp_path / "cabbage.pdf", seed=2)
+    first.reindex()
+
+    def no_pdfs(paths):
+        raise AssertionError(f"read {paths}")
+
+    # Restored from the snapshot and the embedding cache: no PDF read, no API call
+    monkeypatch.setattr(indexer, "ingest_pdfs", no_pdfs)
+    restarted = fake_client()
+    second = Indexer(restarted, MODEL, str(tmp_path))
+    assert second.load_snapshot()
+    assert second.knowledge_base.contents == first.knowledge_base.contents
+    assert second.knowledge_base.sources == first.knowledge_base.sources
+    np.testing.assert_array_equal(second.knowledge_base.embeddings, first.knowledge_base.embeddings)
+    assert second.files == first.files
+    assert second.progress["state"] == "ready"
+
+    # Nothing changed since, so the first reindex does nothing
+    assert changed_paths(second) == ([], [])
+    second.reindex()
+    assert restarted.models.calls == 0
+
+
+def test_snapshot_without_cached_vectors(tmp_path, client):
+    assert not Indexer(client, MODEL, str(tmp_path)).load_snapshot()
+
+    first = Indexer(client, MODEL, str(tmp_path))
+    apple = make_pdf(tmp_path / "apple.pdf", seed=1)
+    first.reindex()
+    shutil.rmtree(first.cache_dir)
+
+    # The PDF is left out, and the next reindex reads and embeds it again
+    second = Indexer(client, MODEL, str(tmp_path))
+    assert second.load_snapshot()
+    assert len(second.knowledge_base) == 0
+    assert changed_paths(second) == ([apple], [])
+    second.reindex()
+    assert second.knowledge_base.contents == first.knowledge_base.contents
@@ -0,0 +1,109 @@
+from concurrent.futures import Future
+
+from conftest import make_pdf, words
+from ingest import (CHUNK_CHARS, CHUNK_OVERLAP, MIN_CHUNK_CHARS, PAGES_PER_TASK, PARALLEL_MIN_PAGES,
+                    chunk_pages, ingest_pdfs, iter_pages)
+
+
+def shared_edge(a, b):
+    """Length of the longest suffix of a that starts b."""
+    for n in range(min(len(a), len(b)), 0, -1):
+        if b.startswith(a[-n:]):
+            return n
+    return 0
+
+
+def pages(n, page_words=120):
+    return [f"Page{i} " + words(i, page_words) + "." for i in range(n)]
+
+
+def test_chunk_size_and_overlap():
+    assert (CHUNK_CHARS, CHUNK_OVERLAP, MIN_CHUNK_CHARS) == (1000, 150, 50)
+    text = pages(20)
+    chunks = list(chunk_pages(text))
+    assert len(chunks) > 10
+    assert all(len(chunk) <= CHUNK_CHARS for chunk in chunks)
+    # Full chunks are cut at a break in the second half, never mid-word
+    assert all(len(chunk) > CHUNK_CHARS // 2 for chunk in chunks[:-1])
+    assert all(chunk.split()[-1] in " ".join(text).split() for chunk in chunks)
+
+    # Each chunk repeats up to CHUNK_OVERLAP characters of the previous one,
+    # starting on a word
+    for before, after in zip(chunks, chunks[1:]):
+        edge = shared_edge(before, after)
+        assert CHUNK_OVERLAP - 20 <= edge <= CHUNK_OVERLAP
+        assert before[-edge - 1] == " "
+
+    # Nothing is lost: without the repeated edges the chunks are the text
+    rebuilt = chunks[0]
+    for after in chunks[1:]:
+        rebuilt += after[shared_edge(rebuilt, after):]
+    assert rebuilt.split() == "\n".join(text).split()
+
+
+def test_chunks_cross_page_boundaries():
+    # Pages shorter than a chunk are packed together, not one chunk each
+    text = pages(6, page_words=30)
+    chunks = list(chunk_pages(text))
+    assert len(chunks) < len(text)
+    assert "Page0" in chunks[0] and "Page1" in chunks[0]
+    assert chunks[0].startswith(text[0]) and f"\n{text[1]}" in chunks[0]
+
+
+def test_short_chunks_are_dropped():
+    assert list(chunk_pages(["too short"])) == []
+    assert list(chunk_pages(["", "x" * (MIN_CHUNK_CHARS - 1), ""])) == []
+    assert list(chunk_pages(["x" * MIN_CHUNK_CHARS])) == ["x" * MIN_CHUNK_CHARS]
+    # A tail that is only the last chunk's overlap is not repeated on its own
+    chunks = list(chunk_pages(["word " * 200]))
+    assert len(chunks) == 1 and chunks[0].endswith("word")
+    chunks = list(chunk_pages(["word " * 199 + "last words"]))
+    assert len(chunks) == 2 and chunks[1].endswith("last words")
+
+
+def test_pages_are_streamed():
+    pulled = []
+
+    def page_iter():
+        for page in pages(50):
+            pulled.append(page)
+            yield page
+
+    first = next(chunk_pages(page_iter()))
+    assert len("\n".join(pulled)) < CHUNK_CHARS + len(pulled[-1]) + 1
+    assert len(first) <= CHUNK_CHARS
+
+
+class InlinePool:
+    """Executor stand-in that runs each task when it is submitted."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append(args[1:])
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def test_pool_only_for_large_pdfs(tmp_path):
+    small = make_pdf(tmp_path / "small.pdf", seed=1, pages=PARALLEL_MIN_PAGES - 1)
+    pool = InlinePool()
+    assert len(list(iter_pages(small, pool))) == PARALLEL_MIN_PAGES - 1
+    assert pool.tasks == []
+
+    large = make_pdf(tmp_path / "large.pdf", seed=1, pages=PARALLEL_MIN_PAGES + 4)
+    in_process = list(iter_pages(large))
+    assert list(iter_pages(large, pool)) == in_process
+    assert pool.tasks == [(start, min(start + PAGES_PER_TASK, len(in_process)))
+                          for start in range(0, len(in_process), PAGES_PER_TASK)]
+
+
+def test_ingest_pdfs_skips_unreadable_files(tmp_path):
+    apple = make_pdf(tmp_path / "apple.pdf", seed=1)
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    results = list(ingest_pdfs([str(broken), apple]))
+    assert results and {filename for _, filename in results} == {"apple.pdf"}
+    assert [chunk for chunk, _ in results] == list(chunk_pages(iter_pages(apple)))
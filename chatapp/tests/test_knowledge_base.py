@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from knowledge_base import RRF_K, KnowledgeBase, reciprocal_rank_fusion
+
+CONTENTS = ["Apple scab", "apple, apple blight", "cabbage"]
+SOURCES = ["apple.pdf", "apple.pdf", "cabbage.pdf"]
+
+
+def knowledge_base():
+    # One-hot vectors: a query vector picks its chunk exactly
+    return KnowledgeBase(CONTENTS, SOURCES, np.eye(3, dtype=np.float32))
+
+
+def test_reciprocal_rank_fusion():
+    assert RRF_K == 60
+    rows, scores = reciprocal_rank_fusion([np.array([2, 0]), np.array([0, 1])])
+    assert rows == [0, 2, 1]
+    assert scores == pytest.approx([1 / 62 + 1 / 61, 1 / 61, 1 / 62])
+
+    # Equal scores keep PDF order
+    rows, _ = reciprocal_rank_fusion([np.array([1]), np.array([0])])
+    assert rows == [0, 1]
+
+
+def test_hybrid_search_fuses_vector_and_keyword_rankings():
+    kb = knowledge_base()
+    results = kb.hybrid_search("apple", [0, 0, 1], top_k=3)
+    # Vectors rank 2, 0, 1 and BM25 ranks 1, 0: chunk 1 comes out on top
+    # although the embedding ranked it last
+    expected = {1: 1 / 63 + 1 / 61, 0: 1 / 62 + 1 / 62, 2: 1 / 61}
+    assert [CONTENTS.index(content) for _, content, _ in results] == [1, 0, 2]
+    assert [score for score, _, _ in results] == pytest.approx([expected[1], expected[0], expected[2]])
+    assert [source for _, _, source in results] == ["apple.pdf", "apple.pdf", "cabbage.pdf"]
+
+    assert len(kb.hybrid_search("apple", [0, 0, 1], top_k=1)) == 1
+
+
+def test_hybrid_search_without_an_embedding_is_keyword_only():
+    kb = knowledge_base()
+    assert kb.hybrid_search("apple blight", None) == kb.search_lexical("apple blight")
+    assert [content for _, content, _ in kb.hybrid_search("apple blight")] == CONTENTS[1::-1]
+    assert kb.hybrid_search("mancozeb") == []
+
+
+def test_empty_knowledge_base():
+    kb = KnowledgeBase()
+    assert len(kb) == 0
+    assert kb.search([1, 0, 0]) == []
+    assert kb.search_lexical("apple") == []
+    assert kb.hybrid_search("apple", [1, 0, 0]) == []
+    assert kb.hybrid_search("apple") == []
+
+
+def test_snapshot_is_read_only():
+    kb = knowledge_base()
+    with pytest.raises(ValueError):
+        kb.embeddings[0, 0] = 2
+    with pytest.raises(ValueError):
+        KnowledgeBase(CONTENTS, SOURCES[:2], np.eye(3))
@@ -0,0 +1,52 @@
+import math
+
+import numpy as np
+import pytest
+
+from lexical_index import BM25_B, BM25_K1, BM25Index, tokenize
+
+# Three chunks of 2, 3 and 1 terms: average length 2
+CORPUS = ["Apple scab", "apple, apple blight", "cabbage"]
+
+
+def bm25(tf, df, doc_len, n_docs=3, avg_len=2):
+    """Okapi BM25 of one term, written out by hand."""
+    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / avg_len))
+
+
+def test_tokenize():
+    assert tokenize("Spray NPK-19 at 2.5 g/l") == ["spray", "npk-19", "at", "2.5", "g/l", "npk", "19", "g", "l"]
+    assert tokenize("2,4-D!") == ["2,4-d", "2,4", "d"]
+
+
+def test_scores_match_bm25():
+    index = BM25Index(CORPUS)
+    rows, scores = index.search("apple", 3)
+    # Chunk 1 has "apple" twice, chunk 2 not at all (and is left out)
+    assert rows.tolist() == [1, 0]
+    assert scores == pytest.approx([bm25(tf=2, df=2, doc_len=3), bm25(tf=1, df=2, doc_len=2)], rel=1e-6)
+
+    rows, scores = index.search("Apple scab?", 3)
+    assert rows.tolist() == [0, 1]
+    assert scores[0] == pytest.approx(bm25(1, 2, 2) + bm25(1, 1, 2), rel=1e-6)
+
+    # A term repeated in the query counts twice
+    _, twice = index.search("apple apple", 3)
+    assert twice == pytest.approx(2 * index.search("apple", 3)[1], rel=1e-6)
+
+
+def test_top_k_and_misses():
+    index = BM25Index(CORPUS)
+    rows, _ = index.search("apple", 1)
+    assert rows.tolist() == [1]
+    rows, scores = index.search("mancozeb", 3)
+    assert len(rows) == len(scores) == 0
+
+
+def test_empty_index():
+    index = BM25Index([])
+    assert len(index) == 0
+    rows, scores = index.search("apple", 3)
+    assert len(rows) == len(scores) == 0
+    assert rows.dtype == np.intp
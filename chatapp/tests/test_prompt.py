@@ -0,0 +1,87 @@
+from conftest import words
+from ingest import chunk_pages
+from prompt import MIN_PASSAGE_TOKENS, PromptBuilder, estimate_tokens, merge_passages
+
+SYSTEM_PROMPT = "You are AgroMart AI. Answer only from the context.\n\nCONTEXT:\n"
+
+
+def sentences(seed, n):
+    return " ".join(words(f"{seed}/{i}", 12).capitalize() + "." for i in range(n))
+
+
+def neighbours():
+    """Three consecutive chunks of one guide, sharing their overlapping edges."""
+    chunks = list(chunk_pages([sentences("guide", 60)]))
+    assert len(chunks) >= 3
+    return chunks[:3]
+
+
+def test_duplicates_and_contained_chunks_are_dropped():
+    a, b = sentences(1, 3), sentences(2, 3)
+    results = [(0.9, a, "apple.pdf"), (0.8, a, "apple.pdf"), (0.7, a[10:60], "apple.pdf"), (0.6, b, "apple.pdf")]
+    assert merge_passages(results) == [(a, "apple.pdf"), (b, "apple.pdf")]
+    # A better ranked fragment is replaced by the chunk containing it, in its place
+    assert merge_passages([(0.9, a[10:60], "apple.pdf"), (0.8, b, "apple.pdf"), (0.7, a, "apple.pdf")]) == [
+        (a, "apple.pdf"), (b, "apple.pdf")]
+    # The same text from another PDF is kept
+    assert len(merge_passages([(0.9, a, "apple.pdf"), (0.8, a, "cabbage.pdf")])) == 2
+
+
+def test_overlapping_chunks_are_merged():
+    first, second, third = neighbours()
+    joined = first + second[second.index(first[-40:]) + 40:]
+    # In either order, the better ranked chunk's position is kept
+    assert merge_passages([(0.9, first, "g.pdf"), (0.8, second, "g.pdf")]) == [(joined, "g.pdf")]
+    assert merge_passages([(0.9, second, "g.pdf"), (0.8, first, "g.pdf")]) == [(joined, "g.pdf")]
+    # A chain of three becomes one passage; another PDF's chunk stays apart
+    merged = merge_passages([(0.9, first, "g.pdf"), (0.8, "x" * 80, "h.pdf"), (0.7, second, "g.pdf"),
+                             (0.6, third, "g.pdf")])
+    assert [source for _, source in merged] == ["g.pdf", "h.pdf"]
+    assert merged[0][0].startswith(first) and merged[0][0].endswith(third)
+    # Edges shorter than MIN_OVERLAP_CHARS are coincidence
+    assert len(merge_passages([(0.9, "a" * 40 + "tail of it", "g.pdf"), (0.8, "tail of it" + "b" * 40, "g.pdf")])) == 2
+
+
+def test_context_is_cut_at_the_token_budget():
+    passages = [(1.0 - i / 10, sentences(i, 8), "apple.pdf") for i in range(6)]
+    budget = estimate_tokens(f"[Source: apple.pdf] {passages[0][1]}") + 1 + MIN_PASSAGE_TOKENS + 10
+    builder = PromptBuilder(SYSTEM_PROMPT, token_budget=budget)
+    context, stats = builder.pack(passages)
+    parts = context.split("\n\n")
+    # The first passage fits whole, the second is cut at a sentence, the rest are left out
+    assert parts[0] == f"[Source: apple.pdf] {passages[0][1]}"
+    assert parts[1].endswith(". …") and passages[1][1].startswith(parts[1][len("[Source: apple.pdf] "):-2])
+    assert sum(estimate_tokens(part) + 1 for part in parts) <= budget
+    assert stats == {"chunks": 6, "passages": 2, "merged": 0, "dropped": 4, "truncated": 1}
+
+    # Less than MIN_PASSAGE_TOKENS of room: the passage is left out, not cut
+    builder = PromptBuilder(SYSTEM_PROMPT, token_budget=budget - 20)
+    context, stats = builder.pack(passages)
+    assert context == parts[0]
+    assert stats["truncated"] == 0 and stats["dropped"] == 5
+
+
+def test_prompt_prefix_is_byte_stable():
+    builder = PromptBuilder(SYSTEM_PROMPT, question_label="User Query")
+    first, _ = builder.build("How to prune apple?", [(0.9, sentences(1, 3), "apple.pdf")])
+    second, _ = builder.build("Cabbage spacing?", [(0.9, sentences(2, 5), "cabbage.pdf")])
+    empty, _ = builder.build("Hello", [])
+    for prompt in (first, second, empty):
+        assert prompt.startswith(SYSTEM_PROMPT)
+    assert first.endswith("\n\nUser Query: How to prune apple?")
+    assert empty == SYSTEM_PROMPT + "No relevant data found.\n\nUser Query: Hello"
+
+
+def test_build_stats():
+    builder = PromptBuilder(SYSTEM_PROMPT)
+    first, second, _ = neighbours()
+    results = [(0.9, first, "g.pdf"), (0.8, second, "g.pdf"), (0.7, first, "g.pdf")]
+    contents, stats = builder.build("When to prune?", results)
+    context, _ = builder.pack(results)
+    tail = contents[len(SYSTEM_PROMPT):]
+    assert stats == {
+        "chunks": 3, "passages": 1, "merged": 2, "dropped": 0, "truncated": 0,
+        "prefix_tokens": estimate_tokens(SYSTEM_PROMPT),
+        "context_tokens": estimate_tokens(context),
+        "prompt_tokens": estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(tail),
+    }
@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from knowledge_base import normalize
+from vector_index import ExactIndex, IVFIndex, make_index
+
+
+def clustered(n, dim=32, clusters=40, seed=0):
+    """(unit vectors, contents): n rows around `clusters` topics, like chunks of a few guides."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    rows = centers[rng.integers(clusters, size=n)] + 0.3 * rng.standard_normal((n, dim))
+    return normalize(rows), [f"chunk {seed}/{i}" for i in range(n)]
+
+
+def recall(index, exact, queries, k=10):
+    found = 0
+    for query in queries:
+        found += len(np.intersect1d(index.search(query, k)[0], exact.search(query, k)[0]))
+    return found / (k * len(queries))
+
+
+def test_ivf_recall_against_exact():
+    embeddings, contents = clustered(4000)
+    exact, ivf = ExactIndex(), IVFIndex()
+    exact.build(embeddings, contents)
+    ivf.build(embeddings, contents)
+    assert len(ivf.centroids) == round(np.sqrt(4000))
+    assert ivf.offsets[-1] == 4000
+
+    queries = clustered(50, seed=1)[0]
+    assert recall(ivf, exact, queries) >= 0.9
+    # Probing every list is an exact search
+    ivf.n_probe = len(ivf.centroids)
+    assert recall(ivf, exact, queries) == 1
+    rows, scores = ivf.search(queries[0], 10)
+    np.testing.assert_allclose(scores, embeddings[rows] @ queries[0], rtol=1e-6)
+
+
+def test_save_and_reload(tmp_path):
+    embeddings, contents = clustered(2000)
+    first = IVFIndex(index_dir=str(tmp_path))
+    first.build(embeddings, contents)
+    assert first.retrained
+    saved = os.path.getmtime(first.path)
+
+    second = IVFIndex(index_dir=str(tmp_path))
+    second.build(embeddings, contents)
+    assert not second.retrained and second.reused == 2000
+    np.testing.assert_array_equal(second.centroids, first.centroids)
+    np.testing.assert_array_equal(second.order, first.order)
+    for query in clustered(10, seed=1)[0]:
+        for a, b in zip(first.search(query, 5), second.search(query, 5)):
+            np.testing.assert_array_equal(a, b)
+    # Nothing changed, so nothing was written
+    assert os.path.getmtime(first.path) == saved
+
+
+def test_new_chunks_are_assigned_without_retraining(tmp_path):
+    embeddings, contents = clustered(2000)
+    first = IVFIndex(index_dir=str(tmp_path))
+    first.build(embeddings, contents)
+
+    # A new PDF: its chunks go to their nearest list, the rest keep theirs
+    extra, extra_contents = clustered(300, seed=2)
+    second = IVFIndex(index_dir=str(tmp_path))
+    second.build(np.vstack([embeddings, extra]), contents + extra_contents)
+    assert not second.retrained and second.reused == 2000
+    np.testing.assert_array_equal(second.centroids, first.centroids)
+    lists = np.empty(2300, dtype=np.intp)
+    for l in range(len(second.centroids)):
+        lists[second.order[second.offsets[l]:second.offsets[l + 1]]] = l
+    np.testing.assert_array_equal(lists[:2000], first._assign(embeddings))
+    np.testing.assert_array_equal(lists[2000:], np.argmax(extra @ first.centroids.T, axis=1))
+
+
+@pytest.mark.parametrize("n, retrained", [(400, True), (500, False), (8000, False), (8001, True)])
+def test_size_change_over_4x_retrains(tmp_path, n, retrained):
+    embeddings, contents = clustered(2000)
+    IVFIndex(index_dir=str(tmp_path)).build(embeddings, contents)
+
+    embeddings, contents = clustered(n, seed=3)
+    index = IVFIndex(index_dir=str(tmp_path))
+    index.build(embeddings, contents)
+    assert index.retrained == retrained
+    assert index.trained_size == (n if retrained else 2000)
+
+
+def test_dimension_change_retrains(tmp_path):
+    IVFIndex(index_dir=str(tmp_path)).build(*clustered(1000))
+    index = IVFIndex(index_dir=str(tmp_path))
+    index.build(*clustered(1000, dim=16))
+    assert index.retrained and index.centroids.shape[1] == 16
+
+
+def test_make_index(tmp_path):
+    assert isinstance(make_index("exact"), ExactIndex)
+    index = make_index("ivf", "models/gemini-embedding-001", str(tmp_path))
+    assert index.index_dir == os.path.join(str(tmp_path), "models_gemini-embedding-001")
+    assert make_index("ivf").index_dir is None
+    with pytest.raises(ValueError):
+        make_index("hnsw")
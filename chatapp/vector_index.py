@@ -0,0 +1,194 @@
+import os
+
+import numpy as np
+
+from embedding_cache import chunk_key, model_dir
+
+# Subdirectory of the data directory where indexes persist, next to the PDFs,
+# one subdirectory per embedding model
+INDEX_DIR = ".vector_index"
+
+# Rows scored per block when assigning vectors to IVF lists
+ASSIGN_BLOCK = 65536
+
+
+def top_k_indices(scores, k):
+    """Indices of the k highest scores, best first, without a full sort."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        idx = np.argpartition(scores, -k)[-k:]
+    else:
+        idx = np.arange(len(scores))
+    # Stable order on ties so equal scores keep their PDF order
+    return idx[np.lexsort((idx, -scores[idx]))]
+
+
+class ExactIndex:
+    """Brute-force scan: one matrix-vector product over every chunk."""
+
+    name = "exact"
+
+    def __init__(self, index_dir=None):
+        self.embeddings = None
+
+    def build(self, embeddings, contents):
+        self.embeddings = embeddings
+
+    def search(self, query, k):
+        """(row indices, scores) of the k most similar rows, best first."""
+        scores = self.embeddings @ query
+        idx = top_k_indices(scores, k)
+        return idx, scores[idx]
+
+
+class IVFIndex:
+    """Inverted-file index over unit vectors, in pure NumPy.
+
+    Spherical k-means splits the rows into `n_lists` lists. A query scores the
+    centroids, then scans only the rows of the `n_probe` closest lists, so a
+    search touches about n_probe / n_lists of the matrix.
+
+    With `index_dir` set, the centroids and each chunk's list are saved there
+    (keyed by chunk hash). A later build reuses them and only assigns chunks it
+    has not seen before, so adding a PDF does not re-run k-means. k-means is
+    re-run when there is no saved index, the dimension changed, or the number
+    of chunks moved more than 4x away from the size it was trained on.
+    """
+
+    name = "ivf"
+
+    def __init__(self, index_dir=None, n_lists=None, n_probe=8, iters=10, seed=0):
+        self.index_dir = index_dir
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.iters = iters
+        self.seed = seed
+        self.embeddings = None
+        self.centroids = None
+        self.order = None    # row indices grouped by list
+        self.offsets = None  # list l is order[offsets[l]:offsets[l + 1]]
+        self.trained_size = 0
+        self.retrained = False
+        self.reused = 0
+
+    @property
+    def path(self):
+        return os.path.join(self.index_dir, "ivf.npz")
+
+    # ---------- build ----------
+
+    def build(self, embeddings, contents):
+        self.embeddings = embeddings
+        n, dim = embeddings.shape
+        keys = [chunk_key(c) for c in contents]
+
+        saved = self._load() if self.index_dir else None
+        self.retrained = saved is None or saved["centroids"].shape[1] != dim or not (
+            saved["trained_size"] / 4 <= n <= saved["trained_size"] * 4
+        )
+        if self.retrained:
+            self.centroids = self._train(embeddings)
+            self.trained_size = n
+            assign = self._assign(embeddings)
+            self.reused = 0
+        else:
+            self.centroids = saved["centroids"]
+            self.trained_size = saved["trained_size"]
+            known = dict(zip(saved["keys"].astype("U64").tolist(), saved["lists"].tolist()))
+            assign = np.array([known.get(k, -1) for k in keys], dtype=np.int32)
+            new = np.flatnonzero(assign < 0)
+            if len(new):
+                assign[new] = self._assign(embeddings[new])
+            self.reused = n - len(new)
+
+        self.order = np.argsort(assign, kind="stable")
+        self.offsets = np.searchsorted(assign[self.order], np.arange(len(self.centroids) + 1))
+        unchanged = not self.retrained and self.reused == n == len(saved["keys"])
+        if self.index_dir and not unchanged:
+            self._save(keys, assign)
+
+    def _train(self, embeddings):
+        n = len(embeddings)
+        n_lists = self.n_lists or max(1, int(round(np.sqrt(n))))
+        n_lists = min(n_lists, n)
+        rng = np.random.default_rng(self.seed)
+        # k-means on a sample is plenty to place the centroids
+        sample = embeddings[rng.choice(n, size=min(n, n_lists * 64), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(self.iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            counts = np.bincount(assign, minlength=n_lists)
+            # Per-list sums in one pass over the sample sorted by list
+            sums = np.zeros_like(centroids)
+            nonempty = np.flatnonzero(counts)
+            starts = np.concatenate(([0], np.cumsum(counts[nonempty])[:-1]))
+            sums[nonempty] = np.add.reduceat(sample[np.argsort(assign, kind="stable")], starts, axis=0)
+            empty = counts == 0
+            # Re-seed empty lists with random sample rows
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1
+            centroids = (sums / norms).astype(np.float32)
+        return centroids
+
+    def _assign(self, vectors):
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for i in range(0, len(vectors), ASSIGN_BLOCK):
+            assign[i:i + ASSIGN_BLOCK] = np.argmax(vectors[i:i + ASSIGN_BLOCK] @ self.centroids.T, axis=1)
+        return assign
+
+    # ---------- persistence ----------
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as f:
+                return {
+                    "centroids": f["centroids"],
+                    "keys": f["keys"],
+                    "lists": f["lists"],
+                    "trained_size": int(f["trained_size"]),
+                }
+        except Exception as e:
+            print(f"Ignoring unreadable index {self.path}: {e}")
+            return None
+
+    def _save(self, keys, assign):
+        os.makedirs(self.index_dir, exist_ok=True)
+        # Write to a temp file and rename so a crash never leaves a torn index
+        tmp = self.path + ".tmp.npz"
+        np.savez(
+            tmp,
+            centroids=self.centroids,
+            keys=np.array(keys, dtype="S64"),
+            lists=assign,
+            trained_size=self.trained_size,
+        )
+        os.replace(tmp, self.path)
+
+    # ---------- search ----------
+
+    def search(self, query, k):
+        """(row indices, scores) of the best k rows among the probed lists."""
+        probe = top_k_indices(self.centroids @ query, self.n_probe)
+        candidates = np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in probe])
+        candidates.sort()  # keeps PDF order on ties, and a forward-only gather
+        scores = self.embeddings[candidates] @ query
+        best = top_k_indices(scores, k)
+        return candidates[best], scores[best]
+
+
+INDEXES = {index.name: index for index in (ExactIndex, IVFIndex)}
+
+
+def make_index(kind, model=None, index_dir=None, **options):
+    """Index backend by name ("exact" or "ivf"), persisted under index_dir/model."""
+    if kind not in INDEXES:
+        raise ValueError(f"Unknown index backend '{kind}', expected one of {sorted(INDEXES)}")
+    path = None
+    if model is not None and index_dir is not None:
+        path = model_dir(index_dir, model)
+    return INDEXES[kind](index_dir=path, **options)
@@ -0,0 +1,131 @@
+"""Exogenous features: date merges vs the shared ExogenousTable, and festivals at inference.
+
+Training side: attaching rainfall, festival flag and calendar fields to every
+price row, with the two pandas date merges organizedData.py used before vs
+one ExogenousTable lookup, on the real archive and on it repeated --scale
+times (the same dates, so the same table).
+
+Inference side: on the July 2023+ holdout of the full history (model trained
+before it, as in bench_forecast_strategies.py), every day is a forecast
+origin for the recursive forecaster, run once without the table (no date is
+a festival, as before) and once with it (holidays from holiday.csv). Shows
+MAE on festival and ordinary target days, and the median forecast time.
+
+    cd price_prediction/benchmarks
+    python bench_exogenous.py --scale 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_forecast_strategies import histories_at, train
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import organizedData  # noqa: E402
+import train_model  # noqa: E402
+from exogenous import ExogenousTable  # noqa: E402
+from feature_store import from_one_hot  # noqa: E402
+from forecasting import FORECAST_DAYS, HISTORY_COLS, forecast_batched  # noqa: E402
+
+
+def merge_join(prices, rain, holidays):
+    """The previous merge_sources joins (rainfall, festival, calendar)."""
+    df = prices.merge(rain, on="date", how="left")
+    holidays = holidays.copy()
+    holidays["festival_flag"] = 1
+    df = df.merge(holidays[["date", "festival_flag"]], on="date", how="left")
+    df["festival_flag"] = df["festival_flag"].fillna(0)
+    df["rainfall_mm"] = df["rainfall_mm"].fillna(0)
+    df["month"] = df["date"].dt.month
+    df["day_of_week"] = df["date"].dt.weekday
+    df["is_monsoon"] = df["month"].isin([6, 7, 8, 9]).astype(int)
+    return df
+
+
+def table_join(prices, rain, holidays):
+    df = prices.reset_index(drop=True)
+    for name, values in ExogenousTable.from_sources(rain, holidays).lookup(df["date"]).items():
+        df[name] = values
+    return df
+
+
+def time_call(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--scale", type=int, default=20, help="copies of the price rows for the join timing")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    prices, rain, holidays = organizedData.read_sources(args.prices, args.rain, args.holidays)
+
+    print(f"{'join':<14} {'rows':>9} {'merges (ms)':>12} {'table (ms)':>11}")
+    for name, frame in (("archive", prices), (f"archive x{args.scale}", pd.concat([prices] * args.scale))):
+        merge_s, merged = time_call(lambda: merge_join(frame, rain, holidays), args.repeats)
+        table_s, looked_up = time_call(lambda: table_join(frame, rain, holidays), args.repeats)
+        for col in ExogenousTable.from_sources(rain, holidays).lookup(prices["date"][:1]):
+            pd.testing.assert_series_equal(merged[col], looked_up[col], check_names=False)
+        print(f"{name:<14} {len(frame):>9} {1000 * merge_s:>12.1f} {1000 * table_s:>11.1f}")
+
+    onehot, _, _ = organizedData.build_features(prices, rain, holidays)
+    onehot = onehot.drop(columns=["unit"])
+    categorical = from_one_hot(onehot)
+    with tempfile.TemporaryDirectory() as tmp:
+        (model, features), _, _ = train(onehot, tmp, direct=False)
+
+    exogenous = ExogenousTable.from_sources(rain, holidays)
+    series = {}
+    for veg, g in categorical.groupby("vegetable", observed=True):
+        g = g.sort_values("date")
+        series[f"vegetable_{veg}"] = (g["date"].to_numpy(), g[HISTORY_COLS].reset_index(drop=True))
+    actual = categorical.set_index(["vegetable", "date"])["avg_price"]
+    actual.index = actual.index.set_levels(actual.index.levels[0].astype(str), level=0)
+
+    split = pd.Timestamp(train_model.SPLIT_DATE)
+    origins = pd.date_range(split - pd.Timedelta(days=1), categorical["date"].max() - pd.Timedelta(days=1))
+    runs = {"no table": None, "table": exogenous}
+    errors = {name: [] for name in runs}
+    times = {name: [] for name in runs}
+    for origin in origins:
+        veg_cols, histories = histories_at(series, origin)
+        for name, table in runs.items():
+            t0 = time.perf_counter()
+            result = forecast_batched(model, features, veg_cols, histories, origin + pd.Timedelta(days=1),
+                                      FORECAST_DAYS, table)
+            times[name].append(time.perf_counter() - t0)
+            keys = pd.MultiIndex.from_arrays([result["vegetable"].astype(str), result["date"]])
+            result["actual"] = actual.reindex(keys).to_numpy()
+            result["festival"] = exogenous.lookup(result["date"])["festival_flag"] > 0
+            errors[name].append(result.dropna(subset=["actual"]))
+
+    print(f"\n{len(origins)} daily origins from {origins[0]:%Y-%m-%d}, recursive model\n")
+    print(f"{'run':<9} {'MAE festival days':>18} {'MAE other days':>15} {'forecast (ms)':>14}")
+    for name in runs:
+        scored = pd.concat(errors[name])
+        error = (scored["predicted_price"] - scored["actual"]).abs()
+        festival = scored["festival"].to_numpy()
+        print(f"{name:<9} {error[festival].mean():>18.2f} {error[~festival].mean():>15.2f} "
+              f"{1000 * statistics.median(times[name]):>14.2f}")
+    print(f"\nscored forecasts: {festival.sum()} festival, {(~festival).sum()} other")
+
+
+if __name__ == "__main__":
+    main()
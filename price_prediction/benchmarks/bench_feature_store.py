@@ -0,0 +1,115 @@
+"""Load time / RSS benchmark: one-hot CSV vs the typed Parquet feature store.
+
+Builds both formats from the full kalimati_prices.csv into a temp directory,
+then loads them in fresh interpreters so each measurement has its own RSS
+(resident set growth across the load, read from /proc, so Linux only).
+
+    cd price_prediction/benchmarks
+    python bench_feature_store.py --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import organizedData  # noqa: E402
+from feature_store import clear_store, to_store_frame, write_store  # noqa: E402
+from forecasting import HISTORY_COLS  # noqa: E402
+
+# Runs inside the child interpreter; prints one JSON line
+# (pyarrow is imported up front so RSS only counts the loaded data)
+CHILD = """
+import json, os, sys, time
+sys.path.insert(0, {models_dir!r})
+import pandas as pd
+import pyarrow.dataset, pyarrow.parquet
+import feature_store
+
+def rss():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+rss0 = rss()
+t0 = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - t0
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss_mb": (rss() - rss0) / 1e6,
+    "frame_mb": df.memory_usage(deep=True).sum() / 1e6,
+    "rows": len(df),
+}}))
+"""
+
+
+def cases(csv_path, store_dir, one_vegetable):
+    return {
+        "CSV, all columns": f"df = pd.read_csv({csv_path!r})",
+        "store, all columns": f"df = feature_store.read_store(store_dir={store_dir!r})",
+        "store, all columns + one-hot": (
+            f"df = feature_store.to_one_hot(feature_store.read_store(store_dir={store_dir!r}))"
+        ),
+        "store, forecaster columns": (
+            f"df = feature_store.read_store({HISTORY_COLS!r}, store_dir={store_dir!r})"
+        ),
+        "store, forecaster columns, 1 veg": (
+            f"df = feature_store.read_store({HISTORY_COLS!r}, [{one_vegetable!r}], store_dir={store_dir!r})"
+        ),
+    }
+
+
+def run_once(load):
+    code = CHILD.format(models_dir=MODELS_DIR, load=load)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(r, f)) for r, _, fs in os.walk(path) for f in fs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "final_training_data.csv")
+        store_dir = os.path.join(tmp, "feature_store")
+
+        prices, rain, holidays = organizedData.read_sources(prices_path=args.prices)
+        df, vegetables, tails = organizedData.build_features(prices, rain, holidays)
+        organizedData.write_feature_store(df, vegetables, tails, csv_path)
+        clear_store(store_dir)
+        write_store(to_store_frame(df, vegetables), store_dir)
+        one_vegetable = vegetables.value_counts().index[0]
+
+        print(f"{len(df)} rows, {df.shape[1]} CSV columns, {vegetables.nunique()} vegetables")
+        print(f"CSV   on disk: {os.path.getsize(csv_path) / 1e6:.2f} MB")
+        print(f"store on disk: {dir_size(store_dir) / 1e6:.2f} MB\n")
+
+        # RSS includes Arrow's memory pool, which keeps freed buffers around;
+        # frame MB is what the loaded DataFrame itself occupies
+        print(f"{'load path':<36} {'time (ms)':>10} {'RSS (MB)':>9} {'frame MB':>9} {'rows':>7}")
+        for label, load in cases(csv_path, store_dir, one_vegetable).items():
+            runs = [run_once(load) for _ in range(args.runs)]
+            seconds = statistics.median(r["seconds"] for r in runs)
+            rss = statistics.median(r["rss_mb"] for r in runs)
+            print(
+                f"{label:<36} {seconds * 1000:>10.1f} {rss:>9.1f} "
+                f"{runs[0]['frame_mb']:>9.2f} {runs[0]['rows']:>7}"
+            )
+
+
+if __name__ == "__main__":
+    main()
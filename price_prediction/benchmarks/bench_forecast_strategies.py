@@ -0,0 +1,142 @@
+"""Recursive vs direct multi-horizon forecasting: accuracy per horizon and latency.
+
+Builds features from the full Kalimati/rainfall/holiday history and trains,
+on the rows before train_model.SPLIT_DATE, both the one-step model of
+train_model.py (forecast recursively, feeding each day's prediction back as
+the next day's lags) and the direct model of `train_model.py --strategy
+direct` (the horizon is a feature; every day comes straight from the history).
+
+Every `--every` days of the test period is a forecast origin: each vegetable's
+history up to that day is forecast FORECAST_DAYS ahead by both strategies,
+exactly as the forecaster would (festivals from the exogenous table), and
+compared with the real prices. Reports MAE per horizon and the median time
+of one all-vegetable forecast.
+
+    cd price_prediction/benchmarks
+    python bench_forecast_strategies.py --every 1
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import train_model  # noqa: E402
+import organizedData  # noqa: E402
+from exogenous import ExogenousTable  # noqa: E402
+from feature_store import from_one_hot, to_one_hot  # noqa: E402
+from forecasting import (  # noqa: E402
+    FORECAST_DAYS,
+    HISTORY_COLS,
+    HISTORY_DAYS,
+    MIN_HISTORY,
+    forecast_batched,
+    forecast_direct,
+    load_native_model,
+    save_native_model,
+)
+
+
+def train(df, tmp, direct):
+    """(booster, model_features) of a model trained before SPLIT_DATE, via its native file."""
+    (X_train, y_train), _ = train_model.train_test_split_by_date(df)
+    model = train_model.make_model("onehot")
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_s = time.perf_counter() - t0
+    path = os.path.join(tmp, "direct.ubj" if direct else "recursive.ubj")
+    save_native_model(model, X_train.columns, path, max_horizon=FORECAST_DAYS if direct else None)
+    return load_native_model(path), fit_s, len(X_train)
+
+
+def histories_at(series, origin):
+    """(veg_cols, histories): the last HISTORY_DAYS rows up to `origin` of each vegetable."""
+    veg_cols, histories = [], []
+    for veg_col, (dates, frame) in series.items():
+        end = np.searchsorted(dates, origin.to_datetime64(), side="right")
+        if end >= MIN_HISTORY:
+            veg_cols.append(veg_col)
+            histories.append(frame.iloc[max(0, end - HISTORY_DAYS):end])
+    return veg_cols, histories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--every", type=int, default=1, help="days between forecast origins")
+    args = parser.parse_args()
+
+    prices, rain, holidays = organizedData.read_sources(args.prices, args.rain, args.holidays)
+    onehot, _, _ = organizedData.build_features(prices, rain, holidays)
+    onehot = onehot.drop(columns=["unit"])
+    categorical = from_one_hot(onehot)
+    exogenous = ExogenousTable.from_sources(rain, holidays)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (recursive, recursive_features), recursive_fit, recursive_rows = train(onehot, tmp, direct=False)
+        direct_frame = to_one_hot(train_model.direct_training_frame(categorical))
+        (direct, direct_features), direct_fit, direct_rows = train(direct_frame, tmp, direct=True)
+
+    # Per vegetable: sorted dates and history rows, to cut histories at any origin
+    series = {}
+    for veg, g in categorical.groupby("vegetable", observed=True):
+        g = g.sort_values("date")
+        series[f"vegetable_{veg}"] = (g["date"].to_numpy(), g[HISTORY_COLS].reset_index(drop=True))
+    actual = categorical.set_index(["vegetable", "date"])["avg_price"]
+    actual.index = actual.index.set_levels(actual.index.levels[0].astype(str), level=0)
+
+    split = pd.Timestamp(train_model.SPLIT_DATE)
+    last = categorical["date"].max()
+    origins = pd.date_range(split - pd.Timedelta(days=1), last - pd.Timedelta(days=1), freq=f"{args.every}D")
+
+    strategies = {
+        "recursive": (forecast_batched, recursive, recursive_features),
+        "direct": (forecast_direct, direct, direct_features),
+    }
+    errors = {name: [] for name in strategies}
+    times = {name: [] for name in strategies}
+    for origin in origins:
+        veg_cols, histories = histories_at(series, origin)
+        for name, (fn, model, features) in strategies.items():
+            t0 = time.perf_counter()
+            result = fn(model, features, veg_cols, histories, origin + pd.Timedelta(days=1), FORECAST_DAYS,
+                        exogenous)
+            times[name].append(time.perf_counter() - t0)
+
+            result["horizon"] = (result["date"] - origin).dt.days
+            keys = pd.MultiIndex.from_arrays([result["vegetable"].astype(str), result["date"]])
+            result["actual"] = actual.reindex(keys).to_numpy()
+            result = result.dropna(subset=["actual"])
+            errors[name].append(pd.DataFrame({
+                "horizon": result["horizon"].to_numpy(),
+                "error": (result["predicted_price"] - result["actual"]).abs().to_numpy(),
+            }))
+
+    mae = {name: pd.concat(e).groupby("horizon")["error"].mean() for name, e in errors.items()}
+    scored = sum(len(e) for e in errors["direct"])
+
+    print(f"train rows: recursive {recursive_rows}, direct {direct_rows} "
+          f"(fit {recursive_fit:.1f}s / {direct_fit:.1f}s)")
+    print(f"{len(origins)} origins from {origins[0]:%Y-%m-%d}, {scored} scored forecasts per strategy\n")
+    print(f"{'horizon':>7} {'MAE recursive':>14} {'MAE direct':>11}")
+    for h in range(1, FORECAST_DAYS + 1):
+        print(f"{h:>7} {mae['recursive'][h]:>14.2f} {mae['direct'][h]:>11.2f}")
+    print(f"{'all':>7} {mae['recursive'].mean():>14.2f} {mae['direct'].mean():>11.2f}\n")
+
+    print(f"{'strategy':<10} {'predict calls':>13} {'forecast (ms)':>14}")
+    for name, calls in (("recursive", FORECAST_DAYS), ("direct", 1)):
+        print(f"{name:<10} {calls:>13} {1000 * statistics.median(times[name]):>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Source ingestion: inferred read_csv + string-replace price cleaning vs typed Arrow reads.
+
+"legacy" is the previous path of organizedData.py: pd.read_csv with
+parse_dates and dtype inference, then per price column astype(str), three
+chained string replaces and pd.to_numeric. "typed" is organizedData.read_sources:
+Arrow's CSV reader, explicit per-source date formats, one regex for prices
+and categorical vegetable/unit.
+
+`--years N` also times a synthetic multi-year Kalimati dump: the price file
+repeated N times with the dates shifted a year each time. Both paths must
+produce the same dates and prices; reported times are medians of --repeats.
+
+    cd price_prediction/benchmarks
+    python bench_ingest.py --years 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import organizedData  # noqa: E402
+
+PRICE_COLS = ["min_price", "max_price", "avg_price"]
+
+
+def legacy_read(path):
+    """The old read_sources + price cleaning for one file."""
+    df = pd.read_csv(path, parse_dates=["date"])
+    df.columns = df.columns.str.strip().str.lower()
+    for col in PRICE_COLS:
+        if col in df.columns:
+            df[col] = (
+                df[col]
+                .astype(str)
+                .str.replace("Rs", "", regex=False)
+                .str.replace(",", "", regex=False)
+                .str.strip()
+            )
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def multi_year_dump(path, years, out_path):
+    """The price file repeated `years` times, each copy a year later."""
+    prices = pd.read_csv(path, dtype=str)
+    dates = pd.to_datetime(prices["date"], format="%m/%d/%Y")
+    copies = []
+    for k in range(years):
+        copy = prices.copy()
+        copy["date"] = (dates + pd.DateOffset(years=k)).dt.strftime("%-m/%-d/%Y")
+        copies.append(copy)
+    pd.concat(copies).to_csv(out_path, index=False)
+
+
+def time_call(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times), result
+
+
+def check_same(legacy, typed, name):
+    """Dates and prices of both paths must agree, dtypes included (NaN where a price is unparseable)."""
+    assert (legacy["date"].values == typed["date"].values).all(), f"{name}: dates differ"
+    for col in PRICE_COLS + ["rainfall_mm"]:
+        if col in legacy.columns:
+            pd.testing.assert_series_equal(legacy[col], typed[col], check_names=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--years", type=int, default=10, help="copies in the synthetic dump (0: skip)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = [
+            ("prices", args.prices, organizedData.PRICES_SCHEMA, organizedData.PRICES_DATE_FORMATS),
+            ("rainfall", args.rain, organizedData.RAIN_SCHEMA, organizedData.RAIN_DATE_FORMATS),
+            ("holidays", args.holidays, organizedData.HOLIDAYS_SCHEMA, organizedData.HOLIDAYS_DATE_FORMATS),
+        ]
+        if args.years:
+            dump = os.path.join(tmp, "kalimati_dump.csv")
+            multi_year_dump(args.prices, args.years, dump)
+            files.append((f"prices x{args.years} years", dump,
+                          organizedData.PRICES_SCHEMA, organizedData.PRICES_DATE_FORMATS))
+
+        print(f"{'source':<22} {'rows':>8} {'legacy (ms)':>12} {'typed (ms)':>11} {'speedup':>8} "
+              f"{'legacy MB':>10} {'typed MB':>9}")
+        for name, path, schema, formats in files:
+            legacy_s, legacy = time_call(lambda: legacy_read(path), args.repeats)
+            typed_s, typed = time_call(
+                lambda: organizedData.read_typed_csv(path, schema, formats), args.repeats
+            )
+            check_same(legacy, typed, name)
+            print(f"{name:<22} {len(typed):>8} {1000 * legacy_s:>12.1f} {1000 * typed_s:>11.1f} "
+                  f"{legacy_s / typed_s:>7.1f}x "
+                  f"{legacy.memory_usage(deep=True).sum() / 1e6:>10.2f} "
+                  f"{typed.memory_usage(deep=True).sum() / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
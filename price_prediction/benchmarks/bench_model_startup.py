@@ -0,0 +1,70 @@
+"""Cold-start benchmark: joblib pickle vs native XGBoost model.
+
+Each run is a fresh interpreter that loads the model and makes one prediction,
+so the timing includes every import the load path drags in.
+
+    cd price_prediction/benchmarks
+    python bench_model_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {models_dir!r})
+import numpy as np
+import pandas as pd
+import forecasting
+model, features = forecasting.{loader}()
+t_load = time.perf_counter()
+X = pd.DataFrame(np.zeros((1, len(features))), columns=features)
+forecasting.predict(model, X)
+t_pred = time.perf_counter()
+print(json.dumps({{
+    "load": t_load - t0,
+    "first_predict": t_pred - t0,
+    "sklearn": "sklearn" in sys.modules,
+    "matplotlib": "matplotlib" in sys.modules,
+}}))
+"""
+
+PATHS = {
+    "pickle (joblib + XGBRegressor)": "load_pickled_model",
+    "native (xgb.Booster .ubj)": "load_native_model",
+}
+
+
+def run_once(loader):
+    code = CHILD.format(models_dir=MODELS_DIR, loader=loader)
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'path':<32} {'load (s)':>10} {'1st predict (s)':>16} {'sklearn':>8} {'mpl':>5}")
+    for label, loader in PATHS.items():
+        runs = [run_once(loader) for _ in range(args.runs)]
+        load = statistics.median(r["load"] for r in runs)
+        first = statistics.median(r["first_predict"] for r in runs)
+        print(
+            f"{label:<32} {load:>10.3f} {first:>16.3f} "
+            f"{str(runs[0]['sklearn']):>8} {str(runs[0]['matplotlib']):>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Scheduler cycles on a fixture workspace: which stages run, and how long a cycle takes.
+
+Builds a throwaway data directory from the real sources: the Kalimati
+archive up to --cutoff as the price file, and the prices after it cut into
+weekly drops (columns in the daily file's order, date first). Then runs
+scheduler cycles as the daemon would:
+
+    cold      first cycle, nothing built yet
+    idle      nothing new
+    drop      one week of prices and a new holiday dropped into incoming/
+    again     the same price file delivered a second time
+    forced    the state file removed, so every stage runs again
+
+and prints the status of every stage and the cycle time. The model is a
+copy of models/xgboost_price_model.ubj unless --retrain.
+
+    cd price_prediction/benchmarks
+    python bench_scheduler.py --retrain
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import scheduler  # noqa: E402
+
+
+def make_workspace(args, tmp):
+    """Fixture data/models/plots dirs; returns (data_dir, models_dir, plots_dir, weekly drops)."""
+    data_dir, models_dir, plots_dir = (os.path.join(tmp, d) for d in ("data", "models", "plots"))
+    for d in (data_dir, models_dir, plots_dir):
+        os.makedirs(d)
+
+    prices = pd.read_csv(args.prices, dtype=str)
+    dates = pd.to_datetime(prices["date"], format="%m/%d/%Y")
+    cutoff = pd.Timestamp(args.cutoff)
+    prices[dates < cutoff].to_csv(os.path.join(data_dir, scheduler.SOURCES["prices"]), index=False)
+    shutil.copy(args.rain, os.path.join(data_dir, scheduler.SOURCES["rainfall"]))
+    shutil.copy(args.holidays, os.path.join(data_dir, scheduler.SOURCES["holidays"]))
+    shutil.copy(os.path.join(MODELS_DIR, "xgboost_price_model.ubj"), models_dir)
+
+    later = prices[dates >= cutoff]
+    weeks = ((dates[dates >= cutoff] - cutoff).dt.days // 7).to_numpy()
+    columns = ["date", "vegetable", "unit", "max_price", "min_price", "avg_price"]
+    drops = [week[columns] for _, week in later.groupby(weeks)]
+    return data_dir, models_dir, plots_dir, drops
+
+
+def drop(data_dir, source, name, frame):
+    inbox = os.path.join(data_dir, scheduler.INBOX_DIR, source)
+    os.makedirs(inbox, exist_ok=True)
+    frame.to_csv(os.path.join(inbox, name), index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--cutoff", default="2023-09-01", help="first date delivered as weekly drops")
+    parser.add_argument("--retrain", action="store_true", help="include the retrain stage")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir, models_dir, plots_dir, drops = make_workspace(args, tmp)
+        stages = scheduler.pipeline(data_dir, plots_dir, models_dir, retrain=args.retrain)
+        state_path = os.path.join(data_dir, scheduler.STATE_FILE)
+        prices_path = os.path.join(data_dir, scheduler.SOURCES["prices"])
+
+        def new_week():
+            drop(data_dir, "prices", "week_1.csv", drops[0])
+            holiday = pd.DataFrame({"date": [drops[0]["date"].iloc[0]], "holiday_name": ["Fixture Day"]})
+            drop(data_dir, "holidays", "extra.csv", holiday)
+
+        def forced():
+            os.remove(state_path)
+
+        cycles = [
+            ("cold", None),
+            ("idle", None),
+            ("drop", new_week),
+            ("again", lambda: drop(data_dir, "prices", "week_1.csv", drops[0])),
+            ("forced", forced),
+        ]
+        results = []
+        for name, prepare in cycles:
+            if prepare:
+                prepare()
+            t0 = time.perf_counter()
+            status = scheduler.run_cycle(stages, state_path)
+            seconds = time.perf_counter() - t0
+            rows = sum(1 for _ in open(prices_path)) - 1
+            results.append((name, rows, seconds, status))
+
+    names = [s.name for s in stages]
+    print(f"\n{'cycle':<8} {'price rows':>10} {'time (s)':>9}  " + " ".join(f"{n:>15}" for n in names))
+    for name, rows, seconds, status in results:
+        print(f"{name:<8} {rows:>10} {seconds:>9.1f}  " + " ".join(f"{status[n]:>15}" for n in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Full feature rebuild: in-memory vs streaming (organizedData.py --stream) peak memory.
+
+Generates a synthetic multi-year archive from the real sources: the Kalimati
+price file repeated for --years years (dates shifted a year per copy) and for
+--commodities commodities (the 25 real vegetables under numbered names), and
+the rainfall dump as hourly readings, which the build sums to daily totals.
+
+Each mode runs in a fresh interpreter writing the CSV, its state file and the
+Parquet store; the table shows wall time and peak RSS (ru_maxrss, so Linux
+or macOS) per mode, and whether the streaming outputs match byte for byte.
+
+    cd price_prediction/benchmarks
+    python bench_streaming_ingest.py --commodities 100 --years 8 --block-mb 4
+"""
+import argparse
+import filecmp
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import pandas as pd
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+
+# Runs inside the child interpreter; prints one JSON line
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, {models_dir!r})
+import organizedData
+from feature_store import clear_store, to_store_frame, write_store
+
+t0 = time.perf_counter()
+if {stream!r}:
+    shape = organizedData.stream_features({prices!r}, {rain!r}, {holidays!r}, {output!r}, {store!r},
+                                          block_size={block_size!r})
+else:
+    prices, rain, holidays = organizedData.read_sources({prices!r}, {rain!r}, {holidays!r})
+    df, vegetables, tails = organizedData.build_features(prices, rain, holidays)
+    organizedData.write_feature_store(df, vegetables, tails, {output!r},
+                                      organizedData.ExogenousTable.from_sources(rain, holidays))
+    clear_store({store!r})
+    write_store(to_store_frame(df, vegetables), {store!r})
+    shape = df.shape
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": time.perf_counter() - t0, "shape": list(shape),
+                  "peak_mb": peak / (1 << 20 if sys.platform == "darwin" else 1 << 10)}}))
+"""
+
+
+def make_archive(args, tmp):
+    """Write the synthetic price and hourly rainfall archives; returns their paths."""
+    prices = pd.read_csv(args.prices, dtype=str)
+    dates = pd.to_datetime(prices["date"], format="%m/%d/%Y")
+    names = prices["vegetable"]
+    n_names = names.nunique()
+    copies = []
+    for k in range(args.years):
+        shifted = (dates + pd.DateOffset(years=k)).dt.strftime("%-m/%-d/%Y")
+        for c in range(-(-args.commodities // n_names)):
+            copy = prices.copy()
+            copy["date"] = shifted
+            copy["vegetable"] = names + (f" #{c}" if c else "")
+            copies.append(copy)
+    archive = pd.concat(copies)
+    keep = sorted(archive["vegetable"].unique())[:args.commodities]
+    prices_path = os.path.join(tmp, "kalimati_archive.csv")
+    archive[archive["vegetable"].isin(keep)].to_csv(prices_path, index=False)
+
+    rain = pd.read_csv(args.rain, dtype=str)
+    days = pd.to_datetime(rain["date"], format="%m/%d/%Y %H:%M:%S").dt.normalize()
+    hourly = pd.DataFrame({
+        "date": days.repeat(24).to_numpy() + pd.to_timedelta(list(range(24)) * len(days), unit="h"),
+        "rainfall_mm": (rain["rainfall_mm"].astype(float) / 24).repeat(24).round(4).to_numpy(),
+    })
+    hourly["date"] = hourly["date"].dt.strftime("%m/%d/%Y %H:%M:%S")
+    rain_path = os.path.join(tmp, "rainfall_hourly.csv")
+    hourly.to_csv(rain_path, index=False)
+    return prices_path, rain_path
+
+
+def run(tmp, name, stream, prices, rain, args):
+    output = os.path.join(tmp, f"{name}.csv")
+    code = CHILD.format(
+        models_dir=MODELS_DIR, stream=stream, prices=prices, rain=rain, holidays=args.holidays,
+        output=output, store=os.path.join(tmp, f"{name}_store"), block_size=args.block_mb << 20,
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--commodities", type=int, default=100)
+    parser.add_argument("--years", type=int, default=8)
+    parser.add_argument("--block-mb", type=int, default=4)
+    args = parser.parse_args()
+
+    sys.path.insert(0, MODELS_DIR)
+    import organizedData
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prices, rain = make_archive(args, tmp)
+        print(f"prices: {os.path.getsize(prices) / 1e6:.0f} MB, "
+              f"hourly rainfall: {os.path.getsize(rain) / 1e6:.0f} MB, block {args.block_mb} MB\n")
+        memory, memory_csv = run(tmp, "memory", False, prices, rain, args)
+        stream, stream_csv = run(tmp, "stream", True, prices, rain, args)
+        same = filecmp.cmp(memory_csv, stream_csv, shallow=False) and filecmp.cmp(
+            organizedData.state_path(memory_csv), organizedData.state_path(stream_csv), shallow=False
+        )
+
+        print(f"{'mode':<10} {'rows':>9} {'columns':>8} {'time (s)':>9} {'peak RSS (MB)':>14}")
+        for name, r in (("in-memory", memory), ("streaming", stream)):
+            print(f"{name:<10} {r['shape'][0]:>9} {r['shape'][1]:>8} {r['seconds']:>9.1f} {r['peak_mb']:>14.0f}")
+        print("\nidentical CSV and state:", same)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""One-hot vs native categorical vegetable encoding for the XGBoost price model.
+
+Builds features from the full Kalimati/rainfall/holiday history, uses the same
+July-2023 split and hyperparameters as train_model.py, and reports training
+time, model size, predict latency and MAE for both encodings.
+
+    cd price_prediction/benchmarks
+    python bench_vegetable_encoding.py --repeats 3
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models")
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+sys.path.insert(0, MODELS_DIR)
+
+import train_model  # noqa: E402
+import organizedData  # noqa: E402
+from feature_store import from_one_hot  # noqa: E402
+
+
+def build_frames(args):
+    prices, rain, holidays = organizedData.read_sources(args.prices, args.rain, args.holidays)
+    onehot, _, _ = organizedData.build_features(prices, rain, holidays)
+    onehot = onehot.drop(columns=["unit"])
+    return {"onehot": onehot, "categorical": from_one_hot(onehot)}
+
+
+def step_index(X_test, vegetables):
+    """Index of each vegetable's last test row."""
+    index = X_test.index.to_series()
+    return index.groupby(vegetables.loc[X_test.index], observed=True).last().values
+
+
+def time_call(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--prices", default=os.path.join(DATA_DIR, "kalimati_prices.csv"))
+    parser.add_argument("--rain", default=os.path.join(DATA_DIR, "Pokhara_Rainfall_Data.csv"))
+    parser.add_argument("--holidays", default=os.path.join(DATA_DIR, "holiday.csv"))
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    frames = build_frames(args)
+    vegetables = frames["categorical"]["vegetable"]
+
+    rows = []
+    for encoding, df in frames.items():
+        (X_train, y_train), (X_test, y_test) = train_model.train_test_split_by_date(df)
+        model = train_model.make_model(encoding)
+        fit_s = time_call(lambda: model.fit(X_train, y_train), args.repeats)
+        booster = model.get_booster()
+
+        # One forecast step: one row per vegetable, like forecasting.forecast_batched
+        step = X_test.loc[step_index(X_test, vegetables)]
+        step_ms = 1000 * time_call(lambda: booster.inplace_predict(step), 50)
+        test_ms = 1000 * time_call(lambda: booster.inplace_predict(X_test), args.repeats)
+
+        mae, rmse, _ = train_model.evaluate(model, X_test, y_test)
+        rows.append((
+            encoding, X_train.shape[1], fit_s, len(booster.save_raw("ubj")) / 1e3,
+            step_ms, test_ms, mae, rmse,
+        ))
+
+    print(f"train rows: {len(X_train)}, test rows: {len(X_test)}, "
+          f"vegetables: {vegetables.nunique()}\n")
+    print(f"{'encoding':<12} {'features':>8} {'fit (s)':>8} {'size (KB)':>10} "
+          f"{'step (ms)':>10} {'test set (ms)':>14} {'MAE':>8} {'RMSE':>8}")
+    for encoding, width, fit_s, size_kb, step_ms, test_ms, mae, rmse in rows:
+        print(f"{encoding:<12} {width:>8} {fit_s:>8.2f} {size_kb:>10.0f} "
+              f"{step_ms:>10.2f} {test_ms:>14.2f} {mae:>8.2f} {rmse:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+
+import numpy as np
+import pandas as pd
+
+# ==============================
+# CONFIG
+# ==============================
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+# Written by organizedData.py next to the feature store, read by the forecaster
+EXOGENOUS_PATH = os.path.join(MODELS_DIR, "..", "data", "exogenous.npz")
+
+MONSOON_MONTHS = [6, 7, 8, 9]
+
+_DAY = np.timedelta64(1, "D")
+
+
+class ExogenousTable:
+    """Per-date inputs that do not depend on the vegetable.
+
+    rainfall_mm, festival_flag, month, day_of_week and is_monsoon, one dense
+    array each, where row d is day `start + d`. Looking up any batch of dates
+    is a subtraction and an array take, so training (every price row) and the
+    forecaster (every vegetable x horizon) share the same table instead of
+    joining by date.
+
+    The table spans the rainfall archive and the holiday list, so holidays
+    published for coming months flag the forecast dates they fall on. Dates
+    outside it get their calendar fields computed and no rainfall or festival,
+    the same as the date merges filling in 0.
+    """
+
+    def __init__(self, start, rainfall, festival):
+        self.start = np.datetime64(pd.Timestamp(start).normalize(), "D")
+        self.rainfall = np.asarray(rainfall, dtype=np.float64)
+        self.festival = np.asarray(festival, dtype=np.int8)
+        days = self.start + np.arange(len(self.rainfall))
+        self.month, self.day_of_week = _calendar(days)
+
+    @classmethod
+    def from_sources(cls, rain, holidays):
+        """Table from daily rainfall (organizedData.daily_rainfall) and the holiday list."""
+        rain_days = rain["date"].to_numpy("datetime64[D]")
+        holiday_days = holidays["date"].to_numpy("datetime64[D]")
+        all_days = np.concatenate([rain_days, holiday_days])
+        if not len(all_days):
+            return cls(pd.Timestamp("1970-01-01"), np.zeros(1), np.zeros(1))
+
+        start = all_days.min()
+        size = int((all_days.max() - start) // _DAY) + 1
+        rainfall = np.zeros(size)
+        rainfall[(rain_days - start) // _DAY] = rain["rainfall_mm"].fillna(0).to_numpy(dtype=np.float64)
+        festival = np.zeros(size, dtype=np.int8)
+        festival[(holiday_days - start) // _DAY] = 1
+        return cls(pd.Timestamp(start), rainfall, festival)
+
+    @property
+    def end(self):
+        """Last day in the table."""
+        return pd.Timestamp(self.start + (len(self.rainfall) - 1) * _DAY)
+
+    def lookup(self, dates):
+        """Feature columns for `dates`, as arrays in the dtypes the date merges produced."""
+        days = np.asarray(pd.DatetimeIndex(dates).values, dtype="datetime64[D]")
+        offsets = (days - self.start) // _DAY
+        inside = (offsets >= 0) & (offsets < len(self.rainfall))
+        rows = np.where(inside, offsets, 0)
+
+        month = self.month[rows]
+        day_of_week = self.day_of_week[rows]
+        if not inside.all():
+            month[~inside], day_of_week[~inside] = _calendar(days[~inside])
+
+        return {
+            "rainfall_mm": np.where(inside, self.rainfall[rows], 0.0),
+            "festival_flag": np.where(inside, self.festival[rows], 0).astype(np.float64),
+            "month": month.astype(np.int32),
+            "day_of_week": day_of_week.astype(np.int32),
+            "is_monsoon": np.isin(month, MONSOON_MONTHS).astype(np.int64),
+        }
+
+    def digest(self, through):
+        """Digest of the rainfall and festivals of every day up to `through`.
+
+        Only the days with rain or a festival are hashed, so the digest does
+        not depend on the table's span. organizedData.py keeps it with the
+        feature store to notice late rainfall or holidays for stored rows.
+        """
+        end = int((np.datetime64(pd.Timestamp(through), "D") - self.start) // _DAY) + 1
+        end = min(max(end, 0), len(self.rainfall))
+        h = hashlib.sha256()
+        for values in (self.rainfall[:end], self.festival[:end]):
+            days = np.flatnonzero(values)
+            h.update((self.start + days).astype(np.int64).tobytes())
+            h.update(values[days].astype(np.float64).tobytes())
+        return h.hexdigest()
+
+    def save(self, path=EXOGENOUS_PATH):
+        """Write the table atomically (readers never see a partial file)."""
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, start=self.start, rainfall=self.rainfall, festival=self.festival)
+        os.replace(tmp_path, path)
+
+
+def _calendar(days):
+    """(month, day of week) of datetime64[D] days; Monday is 0 like pandas."""
+    months = days.astype("datetime64[M]").astype(np.int64) % 12 + 1
+    # 1970-01-01 was a Thursday (3)
+    weekdays = (days.astype(np.int64) + 3) % 7
+    return months.astype(np.int8), weekdays.astype(np.int8)
+
+
+def load_exogenous(path=EXOGENOUS_PATH):
+    """The saved ExogenousTable, or None if organizedData.py has not written one."""
+    if not path or not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return ExogenousTable(pd.Timestamp(data["start"][()]), data["rainfall"], data["festival"])
@@ -0,0 +1,133 @@
+import os
+import time
+
+import pandas as pd
+
+# ==============================
+# CONFIG
+# ==============================
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+STORE_DIR = os.path.join(MODELS_DIR, "..", "data", "feature_store")
+
+# Compact on-disk schema. One row per (vegetable, date); the vegetable is the
+# partition key instead of one boolean column per vegetable.
+FLOAT_COLS = [
+    "max_price", "min_price", "avg_price", "rainfall_mm",
+    "avg_price_lag_1", "avg_price_lag_3", "avg_price_lag_7", "avg_price_lag_14",
+    "avg_price_7d_mean",
+]
+INT8_COLS = ["festival_flag", "month", "day_of_week", "is_monsoon"]
+CATEGORY_COLS = ["unit"]
+
+# Column order of the CSV (minus the one-hot block), which fixes the order of
+# model_features
+COLUMNS = [
+    "date", "unit", "max_price", "min_price", "avg_price", "rainfall_mm",
+    "festival_flag", "month", "day_of_week", "is_monsoon",
+    "avg_price_lag_1", "avg_price_lag_3", "avg_price_lag_7", "avg_price_lag_14",
+    "avg_price_7d_mean",
+]
+
+# ==============================
+# WRITE
+# ==============================
+
+def to_store_frame(df, vegetables):
+    """Wide one-hot training frame -> compact long frame with a `vegetable` column."""
+    frame = df[[c for c in COLUMNS if c in df.columns]].copy()
+    for col in FLOAT_COLS:
+        frame[col] = frame[col].astype("float32")
+    for col in INT8_COLS:
+        frame[col] = frame[col].astype("int8")
+    for col in CATEGORY_COLS:
+        frame[col] = frame[col].astype("category")
+    frame["vegetable"] = pd.Categorical(vegetables, categories=sorted(set(vegetables)))
+    return frame
+
+
+def write_store(frame, store_dir=STORE_DIR, append=False):
+    """Write `frame` partitioned by vegetable (hive layout, one file per write).
+
+    A full write replaces every partition it touches; append=True adds a new
+    part file next to the existing ones, so an append only costs the new rows.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    if frame.empty:
+        return
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    # Copy the numpy-backed columns into Arrow memory. write_dataset can drop
+    # its last reference to the input on a worker thread after it returns;
+    # freeing a numpy buffer there takes the GIL, and if the interpreter is
+    # exiting by then the process aborts ("terminate called without an
+    # active exception") after everything was written.
+    cpu = pa.default_cpu_memory_manager()
+    table = pa.Table.from_batches([batch.copy_to(cpu) for batch in table.to_batches()], table.schema)
+    # Zero-padded time_ns keeps part files in write order when listed
+    basename = f"part-{time.time_ns():020d}-{{i}}.parquet"
+    ds.write_dataset(
+        table,
+        store_dir,
+        format="parquet",
+        partitioning=ds.partitioning(pa.schema([("vegetable", pa.string())]), flavor="hive"),
+        basename_template=basename,
+        existing_data_behavior="overwrite_or_ignore" if append else "delete_matching",
+    )
+
+
+def clear_store(store_dir=STORE_DIR):
+    import shutil
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+
+# ==============================
+# READ
+# ==============================
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.isdir(store_dir) and any(
+        name.startswith("vegetable=") for name in os.listdir(store_dir)
+    )
+
+
+def store_files(store_dir=STORE_DIR):
+    """All data files in the store (used to version it)."""
+    files = []
+    for root, _, names in os.walk(store_dir):
+        files.extend(os.path.join(root, n) for n in names if n.endswith(".parquet"))
+    return sorted(files)
+
+
+def read_store(columns=None, vegetables=None, store_dir=STORE_DIR):
+    """Load only `columns` for only the `vegetables` partitions.
+
+    Rows come back in (vegetable, date) order, like the CSV, and `vegetable`
+    is a categorical with the categories in sorted order.
+    """
+    if columns is not None:
+        columns = [c for c in columns if c != "vegetable"] + ["vegetable"]
+    filters = [("vegetable", "in", list(vegetables))] if vegetables is not None else None
+
+    frame = pd.read_parquet(store_dir, columns=columns, filters=filters)
+    veg = frame["vegetable"].astype(str)
+    frame["vegetable"] = pd.Categorical(veg, categories=sorted(veg.unique()))
+    frame = frame.sort_values(["vegetable", "date"], kind="stable", ignore_index=True)
+    frame["date"] = pd.to_datetime(frame["date"])
+    return frame
+
+
+def to_one_hot(frame):
+    """Expand `vegetable` back into the model's vegetable_* boolean columns."""
+    return pd.get_dummies(frame, columns=["vegetable"])
+
+
+def from_one_hot(df):
+    """Collapse vegetable_* columns into a single categorical `vegetable`."""
+    veg_cols = [c for c in df.columns if c.startswith("vegetable_")]
+    names = df[veg_cols].astype(bool).idxmax(axis=1).str[len("vegetable_"):]
+    frame = df.drop(columns=veg_cols)
+    frame["vegetable"] = pd.Categorical(names, categories=sorted(names.unique()))
+    return frame
@@ -318,152 +318,93 @@
 
 
 
-import pandas as pd
-import numpy as np
-import joblib
-import matplotlib.pyplot as plt
-from datetime import timedelta, datetime
+import argparse
 import os
+import pandas as pd
+from datetime import datetime
+
+from exogenous import EXOGENOUS_PATH, load_exogenous
+from feature_store import STORE_DIR
+from forecast_artifact import MANIFEST_FILE, data_hash, publish_forecast
+from plotting import render_plots
+from forecasting import (
+    DATA_PATH,
+    DIRECT_MODEL_PATH,
+    FORECAST_DAYS,
+    NATIVE_MODEL_PATH,
+    forecast,
+    load_history,
+    load_model,
+    select_histories,
+)
 
 # =====================
 # CONFIG
 # =====================
-MODEL_PATH = "xgboost_price_model.pkl"
-FEATURES_PATH = "model_features.pkl"
-DATA_PATH = "../data/final_training_data_1.csv"
 FORECAST_CSV = "../data/forecasts/next_7_days_forecast.csv"
 PLOTS_DIR = "../plots/"
 
-FORECAST_DAYS = 7
-HISTORY_DAYS = 14
-MIN_HISTORY = 7
-
-os.makedirs(PLOTS_DIR, exist_ok=True)
-
-# =====================
-# LOAD MODEL & DATA
-# =====================
-model = joblib.load(MODEL_PATH)
-model_features = joblib.load(FEATURES_PATH)
-
-df = pd.read_csv(DATA_PATH)
-df["date"] = pd.to_datetime(df["date"])
-df.drop(columns=["unit"], errors="ignore", inplace=True)
-
-vegetable_cols = [c for c in df.columns if c.startswith("vegetable_")]
-print(f"Loaded {len(vegetable_cols)} vegetables")
-
-# =====================
-# FEATURE BUILDER
-# =====================
-def build_features(history, next_date, veg_col):
-    row = {}
-    prices = history["avg_price"].values
-
-    row["avg_price_lag_1"] = prices[-1] if len(prices) >= 1 else np.nan
-    row["avg_price_lag_3"] = prices[-3] if len(prices) >= 3 else prices[0] if len(prices) > 0 else np.nan
-    row["avg_price_lag_7"] = prices[-7] if len(prices) >= 7 else prices[0] if len(prices) > 0 else np.nan
-    row["avg_price_lag_14"] = prices[-14] if len(prices) >= 14 else prices[0] if len(prices) > 0 else np.nan
-    row["avg_price_7d_mean"] = history["avg_price"].tail(7).mean() if len(prices) > 0 else np.nan
-
-    row["min_price"] = history["min_price"].tail(7).mean() if len(history) > 0 else np.nan
-    row["max_price"] = history["max_price"].tail(7).mean() if len(history) > 0 else np.nan
-
-    row["month"] = next_date.month
-    row["day_of_week"] = next_date.dayofweek
-    row["is_monsoon"] = int(next_date.month in [6,7,8,9])
-
-    row["rainfall_mm"] = history["rainfall_mm"].tail(7).mean() if len(history) > 0 else 0
-    row["festival_flag"] = 0
-
-    for c in vegetable_cols:
-        row[c] = 1 if c == veg_col else 0
-
-    return row
-
-# =====================
-# FORECAST FUNCTION
-# =====================
-def forecast_vegetable(veg_col, history, start_date, forecast_days=FORECAST_DAYS):
-    results = []
-    last_date = history["date"].max()
-    # If last_date < start_date, add last row with start_date
-    if last_date < start_date:
-        last_row = history.iloc[-1].copy()
-        last_row["date"] = start_date - timedelta(days=1)
-        history = pd.concat([history, pd.DataFrame([last_row])], ignore_index=True)
-        last_date = history["date"].max()
-
-    for _ in range(forecast_days):
-        next_date = last_date + timedelta(days=1)
-        features = build_features(history, next_date, veg_col)
-
-        X = pd.DataFrame([features])
-        for col in model_features:
-            if col not in X:
-                X[col] = 0
-        X = X[model_features]
-
-        pred = float(model.predict(X)[0])
-
-        results.append({
-            "date": next_date,
-            "vegetable": veg_col.replace("vegetable_", ""),
-            "predicted_price": round(pred, 2)
-        })
-
-        new_row = history.iloc[-1].copy()
-        new_row["date"] = next_date
-        new_row["avg_price"] = pred
-        history = pd.concat([history, pd.DataFrame([new_row])], ignore_index=True)
-        last_date = next_date
-
-    return pd.DataFrame(results)
-
-# =====================
-# MAIN LOOP
-# =====================
-results_all = []
-today = pd.Timestamp(datetime.today().date())
-print("Forecasting 7 days starting from today:", today)
-
-for veg_col in vegetable_cols:
-    veg_name = veg_col.replace("vegetable_", "")
-    veg_df = df[df[veg_col] == 1].sort_values("date")
-    history = veg_df.tail(HISTORY_DAYS).copy()
-
-    if len(history) < MIN_HISTORY:
-        print(f"Skipping {veg_name}, not enough history ({len(history)} rows)")
-        continue
-
-    forecast_df = forecast_vegetable(veg_col, history, start_date=today, forecast_days=FORECAST_DAYS)
-    results_all.append(forecast_df)
-
-# Combine all forecasts
-forecast_df = pd.concat(results_all, ignore_index=True)
-forecast_df.to_csv(FORECAST_CSV, index=False)
-print("Saved forecast to", FORECAST_CSV)
-
-# =====================
-# PLOTS
-# =====================
-for veg in forecast_df["vegetable"].unique():
-    veg_col_name = f"vegetable_{veg}"
-    if veg_col_name not in df.columns:
-        continue
-    hist = df[df[veg_col_name] == 1].tail(60)
-    fut = forecast_df[forecast_df["vegetable"] == veg]
-
-    plt.figure(figsize=(10,5))
-    plt.plot(hist["date"], hist["avg_price"], label="Historical", linewidth=2)
-    plt.plot(fut["date"], fut["predicted_price"], "o--", label="Forecast")
-    plt.title(f"{veg} – Price Forecast")
-    plt.xlabel("Date")
-    plt.ylabel("Price")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    plt.savefig(f"{PLOTS_DIR}/{veg}_forecast.png")
-    plt.close()
-
-print("📊 Forecast plots saved in", PLOTS_DIR)
\ No newline at end of file
+# Guarded so plotting's process pool can re-import this module (spawn on
+# Windows/macOS) without re-running the forecast
+def main():
+    parser = argparse.ArgumentParser(description="Forecast the next days' prices for every vegetable.")
+    parser.add_argument("--skip-plots", action="store_true",
+                        help="only write the forecast CSV; render later with plotting.py")
+    parser.add_argument("--strategy", choices=["recursive", "direct"], default="recursive",
+                        help="recursive one-step model, or the direct multi-horizon model "
+                             "(train it first with train_model.py --strategy direct)")
+    parser.add_argument("--model", help="native model to forecast with (default: the one of --strategy)")
+    parser.add_argument("--store", default=STORE_DIR, help="Parquet feature store to read the history from")
+    parser.add_argument("--data", default=DATA_PATH, help="training CSV, used when there is no feature store")
+    parser.add_argument("--exogenous", default=EXOGENOUS_PATH,
+                        help="date-indexed festival/calendar table written by organizedData.py; "
+                             "without it no forecast date is a festival")
+    parser.add_argument("--output", default=FORECAST_CSV,
+                        help=f"forecast CSV; the backend's artifact ({MANIFEST_FILE}) is published next to it")
+    parser.add_argument("--plots-dir", default=PLOTS_DIR)
+    args = parser.parse_args()
+
+    # =====================
+    # LOAD MODEL & DATA
+    # =====================
+    native_path = args.model or (DIRECT_MODEL_PATH if args.strategy == "direct" else NATIVE_MODEL_PATH)
+    model, model_features = load_model(native_path)
+    df, vegetable_cols = load_history(args.data, args.store)
+    print(f"Loaded {len(vegetable_cols)} vegetables")
+
+    # =====================
+    # MAIN LOOP
+    # =====================
+    today = pd.Timestamp(datetime.today().date())
+    print("Forecasting 7 days starting from today:", today)
+
+    forecast_cols, histories = select_histories(df, vegetable_cols, verbose=True)
+    exogenous = load_exogenous(args.exogenous)
+    forecast_df = forecast(model, model_features, forecast_cols, histories, start_date=today,
+                           forecast_days=FORECAST_DAYS, exogenous=exogenous)
+
+    # Both outputs replace the previous run atomically, so readers never see a partial file
+    forecasts_dir = os.path.dirname(args.output) or "."
+    os.makedirs(forecasts_dir, exist_ok=True)
+    forecast_df.to_csv(args.output + ".tmp", index=False)
+    os.replace(args.output + ".tmp", args.output)
+    print("Saved forecast to", args.output)
+
+    manifest = publish_forecast(
+        forecast_df, data_hash(forecast_cols, histories, exogenous), forecasts_dir,
+        start_date=today.strftime("%Y-%m-%d"), days=FORECAST_DAYS, model=os.path.basename(native_path),
+    )
+    print(f"Published forecast version {manifest['version']} to", os.path.join(forecasts_dir, manifest["file"]))
+
+    # =====================
+    # PLOTS
+    # =====================
+    # Separate stage: the forecast CSV above is already complete. Plots render in
+    # a process pool and unchanged ones are skipped (see plotting.py).
+    if not args.skip_plots:
+        rendered, skipped = render_plots(df, forecast_df, args.plots_dir)
+        print(f"📊 Rendered {len(rendered)} plots ({len(skipped)} unchanged) in", args.plots_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import glob
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from forecasting import group_by_vegetable
+
+# ==============================
+# CONFIG
+# ==============================
+
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+FORECASTS_DIR = os.path.join(MODELS_DIR, "..", "data", "forecasts")
+
+# Names the current forecast-<version>.json; the backend reads only this
+MANIFEST_FILE = "latest.json"
+# Older documents kept so a reader holding a previous manifest can finish
+KEEP_VERSIONS = 3
+
+
+def data_hash(veg_cols, histories, exogenous=None):
+    """Digest of what a forecast was computed from: the histories and the exogenous table."""
+    h = hashlib.sha256()
+    for veg_col, history in zip(veg_cols, histories):
+        h.update(veg_col.encode())
+        for col in history.columns:
+            if not col.startswith("vegetable_"):
+                h.update(col.encode())
+                h.update(np.ascontiguousarray(history[col].to_numpy()).tobytes())
+    if exogenous is not None:
+        h.update(str(exogenous.start).encode())
+        h.update(exogenous.rainfall.tobytes())
+        h.update(exogenous.festival.tobytes())
+    return h.hexdigest()
+
+
+def _write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def publish_forecast(forecast_df, source_hash, forecasts_dir=FORECASTS_DIR, **info):
+    """Publish a forecast as a versioned artifact; returns its manifest.
+
+    The document is group_by_vegetable(forecast_df) as JSON, which is the
+    backend's /api/forecast response, written once to forecast-<version>.json
+    where the version is a digest of its bytes. The manifest (MANIFEST_FILE)
+    is then replaced atomically to point at it, so a reader sees either the
+    previous forecast or the new one, never a partial file. `info` (start
+    date, model, ...) is added to the manifest.
+    """
+    os.makedirs(forecasts_dir, exist_ok=True)
+    document = json.dumps(group_by_vegetable(forecast_df), separators=(",", ":")).encode()
+    version = hashlib.sha256(document).hexdigest()[:16]
+    name = f"forecast-{version}.json"
+    path = os.path.join(forecasts_dir, name)
+    if not os.path.exists(path):
+        _write_atomic(path, document)
+
+    manifest = {
+        "version": version,
+        "file": name,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "data_hash": source_hash,
+        "vegetables": int(forecast_df["vegetable"].nunique()),
+        "rows": len(forecast_df),
+        **info,
+    }
+    _write_atomic(os.path.join(forecasts_dir, MANIFEST_FILE), json.dumps(manifest, indent=1).encode())
+
+    # Prune the oldest documents, never the current one
+    documents = sorted(glob.glob(os.path.join(forecasts_dir, "forecast-*.json")), key=os.path.getmtime)
+    for old in [d for d in documents if d != path][:-KEEP_VERSIONS or None]:
+        os.remove(old)
+    return manifest
+
+
+def load_manifest(forecasts_dir=FORECASTS_DIR):
+    """The current manifest, or None if nothing has been published."""
+    path = os.path.join(forecasts_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,65 @@
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+
+from forecasting import FORECAST_DAYS, NATIVE_MODEL_PATH, Forecaster, group_by_vegetable
+
+# Native model to serve; point at xgboost_price_model_cat.ubj for the
+# categorical-vegetable model, or xgboost_price_model_direct.ubj for the direct
+# multi-horizon one (which only forecasts as many days as it was trained for)
+MODEL_PATH = os.getenv("FORECAST_MODEL_PATH", NATIVE_MODEL_PATH)
+
+# Upper bound for ?days=; the model is recursive so errors compound quickly
+MAX_FORECAST_DAYS = 30
+
+# Loaded once in lifespan and kept for the life of the process
+forecaster = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: load the model and history
+    global forecaster
+    forecaster = Forecaster(native_path=MODEL_PATH)
+    yield
+    # Shutdown: drop the model
+    forecaster = None
+
+app = FastAPI(title="AgroMart Price Forecast Service", lifespan=lifespan)
+
+# CORS
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+@app.get("/forecast")
+def forecast(
+    vegetable: str | None = None,
+    days: int = Query(FORECAST_DAYS, ge=1, le=MAX_FORECAST_DAYS),
+):
+    try:
+        result = forecaster.forecast(vegetable=vegetable, days=days)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"No forecast for vegetable '{vegetable}'")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return group_by_vegetable(result)
+
+@app.get("/")
+async def root():
+    return {
+        "status": "running",
+        "vegetables": len(forecaster.vegetables) if forecaster else 0,
+        "data_version": forecaster.data_version if forecaster else None,
+        "max_days": (forecaster.max_days or MAX_FORECAST_DAYS) if forecaster else None,
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    # Port 8002 keeps clear of the chat services on 8000/8001
+    uvicorn.run(app, host="127.0.0.1", port=8002)
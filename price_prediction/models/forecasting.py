@@ -0,0 +1,473 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import timedelta, datetime
+
+import numpy as np
+import pandas as pd
+
+from exogenous import EXOGENOUS_PATH, load_exogenous
+from feature_store import STORE_DIR, read_store, store_exists, store_files, to_one_hot
+
+# =====================
+# CONFIG
+# =====================
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_price_model.pkl")
+FEATURES_PATH = os.path.join(MODELS_DIR, "model_features.pkl")
+NATIVE_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_price_model.ubj")
+# Same model trained with a single categorical `vegetable` feature
+# (train_model.py --encoding categorical)
+CATEGORICAL_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_price_model_cat.ubj")
+# Direct multi-horizon model (train_model.py --strategy direct)
+DIRECT_MODEL_PATH = os.path.join(MODELS_DIR, "xgboost_price_model_direct.ubj")
+DATA_PATH = os.path.join(MODELS_DIR, "..", "data", "final_training_data_1.csv")
+
+FORECAST_DAYS = 7
+HISTORY_DAYS = 14
+MIN_HISTORY = 7
+
+LAG_DAYS = [1, 3, 7, 14]
+MEAN_WINDOW = 7
+
+CACHE_SIZE = 32  # cached (data version, start date, days) forecasts
+
+# =====================
+# LOAD MODEL & DATA
+# =====================
+def save_native_model(model, model_features, path=NATIVE_MODEL_PATH, categories=None, max_horizon=None):
+    """Save the booster in XGBoost's own format (UBJSON for .ubj, else JSON).
+
+    The feature list travels inside the artifact, both as the booster's
+    feature_names and as a `model_features` attribute. For a categorical model
+    the training categories of `vegetable` are stored too, so inference can
+    rebuild the exact same category codes. A direct multi-horizon model
+    records the longest horizon it was trained for.
+    """
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    booster.feature_names = list(model_features)
+    booster.set_attr(model_features=json.dumps(list(model_features)))
+    if categories is not None:
+        booster.set_attr(vegetable_categories=json.dumps(list(categories)))
+    if max_horizon is not None:
+        booster.set_attr(forecast_strategy="direct", max_horizon=str(max_horizon))
+    booster.save_model(path)
+
+
+def model_categories(model):
+    """Training categories of a categorical-vegetable model, else None."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    categories = booster.attr("vegetable_categories")
+    return json.loads(categories) if categories is not None else None
+
+
+def model_max_horizon(model):
+    """Longest horizon of a direct multi-horizon model; None for a recursive (one-step) model."""
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    if booster.attr("forecast_strategy") != "direct":
+        return None
+    return int(booster.attr("max_horizon"))
+
+
+def load_native_model(path=NATIVE_MODEL_PATH):
+    """Returns (booster, model_features) from a native model file."""
+    import xgboost as xgb
+
+    booster = xgb.Booster()
+    booster.load_model(path)
+
+    model_features = booster.attr("model_features")
+    if model_features is not None:
+        model_features = json.loads(model_features)
+    else:
+        model_features = booster.feature_names
+    return booster, model_features
+
+
+def load_pickled_model(model_path=MODEL_PATH, features_path=FEATURES_PATH):
+    """Returns (model, model_features) from the joblib pickles."""
+    import joblib
+
+    return joblib.load(model_path), joblib.load(features_path)
+
+
+def load_model(native_path=NATIVE_MODEL_PATH, model_path=MODEL_PATH, features_path=FEATURES_PATH):
+    """Returns (model, model_features), preferring the native booster."""
+    if native_path and os.path.exists(native_path):
+        return load_native_model(native_path)
+    return load_pickled_model(model_path, features_path)
+
+
+def predict(model, X):
+    """Predict with either a bare Booster or the sklearn XGBRegressor."""
+    if hasattr(model, "inplace_predict"):
+        return model.inplace_predict(X)
+    return model.predict(X)
+
+
+# Columns the forecaster reads from the feature store
+HISTORY_COLS = ["date", "avg_price", "min_price", "max_price", "rainfall_mm"]
+
+
+def load_history(data_path=DATA_PATH, store_dir=STORE_DIR, vegetables=None):
+    """Returns (df, vegetable_cols) from the feature-engineered training data.
+
+    Reads only HISTORY_COLS (and only the `vegetables` partitions, if given)
+    from the Parquet feature store when there is one, else the whole CSV.
+    """
+    if store_dir and store_exists(store_dir):
+        df = to_one_hot(read_store(HISTORY_COLS, vegetables, store_dir))
+    else:
+        df = pd.read_csv(data_path)
+        df["date"] = pd.to_datetime(df["date"])
+        df.drop(columns=["unit"], errors="ignore", inplace=True)
+
+    vegetable_cols = [c for c in df.columns if c.startswith("vegetable_")]
+    return df, vegetable_cols
+
+
+def select_histories(df, vegetable_cols, verbose=False):
+    """Tail HISTORY_DAYS rows per vegetable, skipping short histories."""
+    forecast_cols = []
+    histories = []
+    for veg_col in vegetable_cols:
+        veg_name = veg_col.replace("vegetable_", "")
+        veg_df = df[df[veg_col] == 1].sort_values("date")
+        history = veg_df.tail(HISTORY_DAYS)
+
+        if len(history) < MIN_HISTORY:
+            if verbose:
+                print(f"Skipping {veg_name}, not enough history ({len(history)} rows)")
+            continue
+
+        forecast_cols.append(veg_col)
+        histories.append(history)
+
+    return forecast_cols, histories
+
+# =====================
+# FEATURE BUILDER
+# =====================
+class LagState:
+    """Per-vegetable lag state for the batched forecaster.
+
+    Every vegetable gets one row in a set of NumPy ring buffers: the last
+    HISTORY_DAYS avg prices plus the last MEAN_WINDOW min/max/rainfall values.
+    Histories shorter than a buffer are left-padded with their first value, so
+    reading `lag k` falls back to prices[0] exactly like the old row builder.
+    """
+
+    def __init__(self, histories, start_date):
+        n = len(histories)
+        self.avg = np.empty((n, HISTORY_DAYS))
+        self.min = np.empty((n, MEAN_WINDOW))
+        self.max = np.empty((n, MEAN_WINDOW))
+        self.rain = np.empty((n, MEAN_WINDOW))
+        self.head = 0  # physical index of the oldest avg_price slot
+        self.side_head = 0  # same, for the MEAN_WINDOW buffers
+        self.last_dates = []
+
+        for i, history in enumerate(histories):
+            avg = history["avg_price"].to_numpy(dtype=float)
+            mins = history["min_price"].to_numpy(dtype=float)
+            maxs = history["max_price"].to_numpy(dtype=float)
+            rain = history["rainfall_mm"].to_numpy(dtype=float)
+            last_date = history["date"].max()
+
+            # If last_date < start_date, repeat the last row dated start_date - 1
+            if last_date < start_date:
+                avg, mins, maxs, rain = (np.append(a, a[-1]) for a in (avg, mins, maxs, rain))
+                last_date = start_date - timedelta(days=1)
+
+            self.avg[i] = _left_pad(avg, HISTORY_DAYS)
+            self.min[i] = _left_pad(mins, MEAN_WINDOW)
+            self.max[i] = _left_pad(maxs, MEAN_WINDOW)
+            self.rain[i] = _left_pad(rain, MEAN_WINDOW)
+            self.last_dates.append(last_date)
+
+        self.last_dates = pd.DatetimeIndex(self.last_dates)
+
+    def window(self, buf, head):
+        """Return `buf` in logical (oldest -> newest) order."""
+        width = buf.shape[1]
+        return buf[:, (head + np.arange(width)) % width]
+
+    def push(self, preds):
+        """Append one predicted day; min/max/rainfall repeat their last value."""
+        for buf in (self.min, self.max, self.rain):
+            buf[:, self.side_head] = buf[:, (self.side_head - 1) % MEAN_WINDOW]
+        self.avg[:, self.head] = preds
+        self.head = (self.head + 1) % HISTORY_DAYS
+        self.side_head = (self.side_head + 1) % MEAN_WINDOW
+        self.last_dates = self.last_dates + timedelta(days=1)
+
+
+def _left_pad(values, width):
+    values = values[-width:]
+    if len(values) < width:
+        values = np.concatenate([np.full(width - len(values), values[0]), values])
+    return values
+
+
+def history_columns(avg, mins, maxs, rain):
+    """Price and weather features from each row's recent history.
+
+    `avg` holds the last HISTORY_DAYS avg prices per row, oldest first; the
+    others the last MEAN_WINDOW min/max prices and rainfall. Shared by both
+    forecast strategies and by the direct model's training frame, so training
+    and inference compute the features the same way.
+    """
+    columns = {
+        "avg_price_7d_mean": avg[:, -MEAN_WINDOW:].mean(axis=1),
+        "min_price": mins.mean(axis=1),
+        "max_price": maxs.mean(axis=1),
+        "rainfall_mm": rain.mean(axis=1),
+    }
+    for lag in LAG_DAYS:
+        columns[f"avg_price_lag_{lag}"] = avg[:, -lag]
+    return columns
+
+
+def calendar_columns(dates, exogenous=None):
+    """Calendar and festival features of the predicted dates.
+
+    From the ExogenousTable if given, so holidays on the list flag the dates
+    they fall on; without one, no date is a festival. Rainfall of a predicted
+    day is not known yet and stays the history mean (history_columns).
+    """
+    if exogenous is not None:
+        columns = exogenous.lookup(dates)
+        del columns["rainfall_mm"]
+        return columns
+    return {
+        "month": dates.month,
+        "day_of_week": dates.dayofweek,
+        "is_monsoon": dates.month.isin([6, 7, 8, 9]).astype(int),
+        "festival_flag": 0,
+    }
+
+
+def feature_frame(columns, veg_cols, model_features, categories=None):
+    """Model input with one row per entry of veg_cols, laid out as model_features.
+
+    One-hot models get a 1 in their vegetable_* column; categorical models
+    (`categories` given) get a `vegetable` category column instead. Features
+    the model does not use are ignored; ones missing from `columns` are 0.
+    """
+    col_idx = {c: j for j, c in enumerate(model_features)}
+    X = np.zeros((len(veg_cols), len(model_features)))
+
+    for name, values in columns.items():
+        if name in col_idx:
+            X[:, col_idx[name]] = values
+
+    rows = [i for i, c in enumerate(veg_cols) if c in col_idx]
+    X[rows, [col_idx[veg_cols[i]] for i in rows]] = 1
+
+    X = pd.DataFrame(X, columns=model_features)
+    if categories is not None:
+        X["vegetable"] = pd.Categorical(
+            [c.replace("vegetable_", "") for c in veg_cols], categories=categories
+        )
+    return X
+
+
+def build_feature_matrix(state, next_dates, veg_cols, model_features, categories=None, exogenous=None):
+    """Build one model row per vegetable for the next horizon step."""
+    columns = history_columns(
+        state.window(state.avg, state.head),
+        state.window(state.min, state.side_head),
+        state.window(state.max, state.side_head),
+        state.window(state.rain, state.side_head),
+    )
+    columns.update(calendar_columns(next_dates, exogenous))
+    return feature_frame(columns, veg_cols, model_features, categories)
+
+# =====================
+# FORECAST FUNCTION
+# =====================
+def forecast_batched(model, model_features, veg_cols, histories, start_date, forecast_days=FORECAST_DAYS,
+                     exogenous=None):
+    """Recursive forecast for every vegetable at once.
+
+    Each horizon step is a single predict call over all vegetables, so a
+    7-day run costs 7 model calls regardless of how many vegetables there are.
+    Festival and calendar features come from `exogenous` (see calendar_columns).
+    """
+    state = LagState(histories, start_date)
+    categories = model_categories(model)
+    preds = np.empty((len(veg_cols), forecast_days))
+    dates = []
+
+    for step in range(forecast_days):
+        next_dates = state.last_dates + timedelta(days=1)
+        X = build_feature_matrix(state, next_dates, veg_cols, model_features, categories, exogenous)
+
+        preds[:, step] = predict(model, X).astype(float)
+        dates.append(next_dates)
+        state.push(preds[:, step])
+
+    return forecast_frame(veg_cols, [[d[i] for d in dates] for i in range(len(veg_cols))], preds)
+
+
+def forecast_direct(model, model_features, veg_cols, histories, start_date, forecast_days=FORECAST_DAYS,
+                    exogenous=None):
+    """Direct multi-horizon forecast for every vegetable at once.
+
+    The model takes the horizon h as a feature and predicts day t+h straight
+    from the history up to day t, so no prediction is fed back: every
+    (vegetable, day) row is independent and the whole forecast is a single
+    predict call. Raises ValueError past the horizon the model was trained for.
+    """
+    max_horizon = model_max_horizon(model)
+    if max_horizon is None:
+        raise ValueError("not a direct multi-horizon model")
+    if forecast_days > max_horizon:
+        raise ValueError(f"the direct model forecasts at most {max_horizon} days, not {forecast_days}")
+
+    state = LagState(histories, start_date)
+    n = len(veg_cols)
+    # Row i * forecast_days + (h - 1) is vegetable i at horizon h
+    rows = np.repeat(np.arange(n), forecast_days)
+    horizons = np.tile(np.arange(1, forecast_days + 1), n)
+    dates = state.last_dates[rows] + pd.to_timedelta(horizons, unit="D")
+
+    columns = history_columns(
+        state.window(state.avg, state.head)[rows],
+        state.window(state.min, state.side_head)[rows],
+        state.window(state.max, state.side_head)[rows],
+        state.window(state.rain, state.side_head)[rows],
+    )
+    columns.update(calendar_columns(dates, exogenous), horizon=horizons)
+    X = feature_frame(columns, [veg_cols[i] for i in rows], model_features, model_categories(model))
+
+    preds = predict(model, X).astype(float).reshape(n, forecast_days)
+    dates = dates.to_numpy().reshape(n, forecast_days)
+    return forecast_frame(veg_cols, [[pd.Timestamp(d) for d in row] for row in dates], preds)
+
+
+def forecast(model, model_features, veg_cols, histories, start_date, forecast_days=FORECAST_DAYS,
+             exogenous=None):
+    """forecast_direct for a direct multi-horizon model, else the recursive forecast_batched."""
+    strategy = forecast_direct if model_max_horizon(model) is not None else forecast_batched
+    return strategy(model, model_features, veg_cols, histories, start_date, forecast_days, exogenous)
+
+
+def forecast_frame(veg_cols, dates, preds):
+    """Forecast rows (date, vegetable, predicted_price), vegetable by vegetable;
+    dates[i][step] and preds[i, step] belong to veg_cols[i]."""
+    results = []
+    for i, veg_col in enumerate(veg_cols):
+        veg_name = veg_col.replace("vegetable_", "")
+        for step in range(preds.shape[1]):
+            results.append({
+                "date": dates[i][step],
+                "vegetable": veg_name,
+                "predicted_price": round(float(preds[i, step]), 2)
+            })
+
+    return pd.DataFrame(results, columns=["date", "vegetable", "predicted_price"])
+
+# =====================
+# LONG-LIVED FORECASTER
+# =====================
+def _file_version(*paths):
+    """Short digest of the files' mtime/size; changes whenever any is rewritten."""
+    stats = [(p, os.stat(p).st_mtime_ns, os.stat(p).st_size) for p in paths]
+    return hashlib.sha1(repr(stats).encode()).hexdigest()[:12]
+
+
+class Forecaster:
+    """Keeps the model and history in memory and memoises forecasts.
+
+    Results are cached by (data version, start date, days). The data version is
+    the mtime/size of the training data (CSV or feature store files) and of the
+    exogenous table, so rewriting either invalidates the cache and reloads them
+    on the next call; the model is loaded once.
+    """
+
+    def __init__(self, data_path=DATA_PATH, store_dir=STORE_DIR, native_path=NATIVE_MODEL_PATH,
+                 model_path=MODEL_PATH, features_path=FEATURES_PATH, exogenous_path=EXOGENOUS_PATH):
+        self.data_path = data_path
+        self.store_dir = store_dir
+        self.exogenous_path = exogenous_path
+        self.exogenous = None
+        self.model, self.model_features = load_model(native_path, model_path, features_path)
+        self.data_version = None
+        self.df = None
+        self.forecast_cols = []
+        self.histories = []
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._refresh()
+
+    def _data_files(self):
+        files = [self.data_path]
+        if self.store_dir and store_exists(self.store_dir):
+            files = store_files(self.store_dir)
+        if self.exogenous_path and os.path.exists(self.exogenous_path):
+            files.append(self.exogenous_path)
+        return files
+
+    def _refresh(self):
+        version = _file_version(*self._data_files())
+        if version != self.data_version:
+            self.exogenous = load_exogenous(self.exogenous_path)
+            self.df, vegetable_cols = load_history(self.data_path, self.store_dir)
+            self.forecast_cols, self.histories = select_histories(self.df, vegetable_cols)
+            self.data_version = version
+            self._cache.clear()
+
+    @property
+    def vegetables(self):
+        return [c.replace("vegetable_", "") for c in self.forecast_cols]
+
+    @property
+    def max_days(self):
+        """Longest forecast the model supports (None: any, it is recursive)."""
+        return model_max_horizon(self.model)
+
+    def forecast(self, vegetable=None, days=FORECAST_DAYS, start_date=None):
+        """Forecast `days` days from `start_date` (default: today).
+
+        Returns the forecast DataFrame for every vegetable, or only for
+        `vegetable` if given. Raises KeyError for an unknown vegetable and
+        ValueError for more days than a direct model was trained for.
+        """
+        if start_date is None:
+            start_date = pd.Timestamp(datetime.today().date())
+        start_date = pd.Timestamp(start_date)
+
+        with self._lock:
+            self._refresh()
+            if vegetable is not None and vegetable not in self.vegetables:
+                raise KeyError(vegetable)
+
+            key = (self.data_version, start_date, days)
+            if key not in self._cache:
+                if len(self._cache) >= CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[key] = forecast(
+                    self.model, self.model_features, self.forecast_cols,
+                    self.histories, start_date, days, self.exogenous
+                )
+            result = self._cache[key]
+
+        if vegetable is not None:
+            result = result[result["vegetable"] == vegetable]
+        return result
+
+
+def group_by_vegetable(forecast_df):
+    """Shape a forecast like the backend's /api/forecast response."""
+    return [
+        {
+            "vegetable": veg,
+            "forecast": [
+                {"date": d.strftime("%Y-%m-%d"), "price": float(p)}
+                for d, p in zip(group["date"], group["predicted_price"])
+            ],
+        }
+        for veg, group in forecast_df.groupby("vegetable", sort=False)
+    ]
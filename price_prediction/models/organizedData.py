@@ -1,97 +1,635 @@
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+
+from exogenous import EXOGENOUS_PATH, ExogenousTable
+from feature_store import STORE_DIR, clear_store, store_exists, to_store_frame, write_store
 
 # ==============================
-# 1. READ CSV FILES
+# CONFIG
 # ==============================
 
-prices = pd.read_csv("../data/kalimati_prices_1.csv", parse_dates=["date"])
-rain = pd.read_csv("../data/Pokhara_Rainfall_Data_1.csv", parse_dates=["date"])
-holidays = pd.read_csv("../data/holiday_1.csv", parse_dates=["date"])
+PRICES_PATH = "../data/kalimati_prices_1.csv"
+RAIN_PATH = "../data/Pokhara_Rainfall_Data_1.csv"
+HOLIDAYS_PATH = "../data/holiday_1.csv"
+OUTPUT_PATH = "final_training_data.csv"
 
-# ==============================
-# 2. CLEAN COLUMN NAMES
-# ==============================
+LAGS = [1, 3, 7, 14]
+ROLLING_WINDOW = 7
+TAIL_DAYS = max(LAGS + [ROLLING_WINDOW])  # raw prices kept per vegetable for appends
 
-prices.columns = prices.columns.str.strip().str.lower()
-rain.columns = rain.columns.str.strip().str.lower()
-holidays.columns = holidays.columns.str.strip().str.lower()
+# Typed schema of each source: column -> kind. Nothing is left to dtype
+# inference; "price" columns may carry an "Rs " prefix and thousands commas.
+PRICES_SCHEMA = {
+    "date": "date", "vegetable": "category", "unit": "category",
+    "min_price": "price", "max_price": "price", "avg_price": "price",
+}
+RAIN_SCHEMA = {"date": "date", "rainfall_mm": "float"}
+HOLIDAYS_SCHEMA = {"date": "date", "holiday_name": "string"}
 
-# ==============================
-# 4. MERGE RAINFALL
-# ==============================
+# Date formats each source has been published in; every row is parsed with
+# the first format that matches it (Kalimati: 1/5/2021; the rainfall dump:
+# 01/01/2004 03:00:00, newer extracts ISO; holidays: 02/12/2021)
+PRICES_DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d"]
+RAIN_DATE_FORMATS = ["%m/%d/%Y %H:%M:%S", "%Y-%m-%d", "%m/%d/%Y"]
+HOLIDAYS_DATE_FORMATS = ["%m/%d/%Y", "%Y-%m-%d"]
 
-df = prices.merge(rain, on="date", how="left")
+# Streaming mode (--stream) reads sources in blocks of this many bytes
+STREAM_BLOCK_BYTES = 16 << 20
+
+# A price cell that is a plain number once "Rs" and commas are gone
+_NUMBER = r"^[-+]?(\d+\.?\d*|\.\d+)$"
 
 # ==============================
-# 5. ADD FESTIVAL FLAG
+# 1. READ CSV FILES
 # ==============================
 
-holidays["festival_flag"] = 1
-df = df.merge(
-    holidays[["date", "festival_flag"]],
-    on="date",
-    how="left"
-)
+def parse_dates(values, formats):
+    """Arrow timestamps from date strings, each parsed with the first matching format."""
+    parsed = [pc.strptime(values, format=f, unit="us", error_is_null=True) for f in formats]
+    dates = pc.coalesce(*parsed) if len(parsed) > 1 else parsed[0]
+    bad = pc.and_(pc.is_null(dates), pc.is_valid(values))
+    if pc.any(bad).as_py():
+        example = pc.filter(values, bad)[0].as_py()
+        raise ValueError(f"date {example!r} matches none of {formats}")
+    return dates
+
+
+def parse_prices(values):
+    """Arrow prices from cells like "55", "42.5" or "Rs 1,250.00".
+
+    "Rs" and commas are removed as plain substrings (byte-level, no regex)
+    and the rest is cast to float64 in one go. Only if some cell is still
+    not a number does one regex pick out the numeric cells; the others
+    become null, as pd.to_numeric(errors="coerce") did. A column whose cells
+    are all integers ("350", not "350.0") is int64, also like to_numeric,
+    so the CSV keeps writing "350".
+    """
+    if not pa.types.is_string(values.type) and not pa.types.is_large_string(values.type):
+        return pc.cast(values, pa.float64())
+    digits = pc.utf8_trim_whitespace(
+        pc.replace_substring(pc.replace_substring(values, "Rs", ""), ",", "")
+    )
+    try:
+        prices = pc.cast(digits, pa.float64())
+    except pa.ArrowInvalid:
+        numeric = pc.match_substring_regex(digits, _NUMBER)
+        return pc.cast(pc.if_else(numeric, digits, None), pa.float64())
+    if _integer_cells(digits, prices):
+        return pc.cast(prices, pa.int64())
+    return prices
+
+
+def _integer_cells(digits, prices):
+    """Whether every cell is an integer: none missing, no decimal point, a whole finite value."""
+    return (
+        len(prices) > 0 and prices.null_count == 0
+        and not pc.any(pc.match_substring(digits, ".")).as_py()
+        and pc.all(pc.and_(pc.is_finite(prices), pc.equal(pc.floor(prices), prices))).as_py()
+    )
+
+
+def _csv_options(path, schema):
+    """Arrow convert options reading the `schema` columns of `path` as text.
+
+    Every column is typed explicitly, so no block's contents change how
+    another block is read (a column of plain numbers in the first block
+    would otherwise be inferred as int64 and then fail on "Rs 250.00").
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        header = next(csv.reader(f), [])
+    names = [c for c in header if c.strip().lower() in schema]
+    missing = set(schema) - {c.strip().lower() for c in names}
+    if missing:
+        raise ValueError(f"{path} has no column(s) {sorted(missing)}")
+    return pacsv.ConvertOptions(column_types={c: pa.string() for c in names}, include_columns=names)
+
+
+def _typed_table(table, schema, date_formats):
+    """Arrow table of text columns -> typed columns; categories stay plain strings."""
+    table = table.rename_columns([c.strip().lower() for c in table.column_names])
+    columns = {}
+    for name in table.column_names:
+        kind = schema[name]
+        values = table[name].combine_chunks()
+        if kind == "date":
+            values = parse_dates(values, date_formats)
+        elif kind == "price":
+            values = parse_prices(values)
+        elif kind == "float":
+            values = pc.cast(values, pa.float64())
+        columns[name] = values
+    return pa.table(columns)
+
+
+def _to_frame(table, schema, integers=()):
+    """Typed Arrow table -> DataFrame, with "category" columns as sorted categoricals
+    (and the `integers` columns cast to int64)."""
+    df = table.to_pandas()
+    for name in integers:
+        df[name] = df[name].astype("int64")
+    for name, kind in schema.items():
+        if kind == "category" and name in df.columns:
+            # Sorted like read_csv's category dtype, not in order of appearance
+            df[name] = df[name].astype(pd.CategoricalDtype(sorted(df[name].dropna().unique())))
+    return df
+
+
+def read_typed_csv(path, schema, date_formats):
+    """One source CSV as a DataFrame typed by `schema` (see PRICES_SCHEMA).
+
+    The file is read by Arrow's multithreaded CSV reader as text and typed
+    column by column, dates with `date_formats`. Header names are stripped
+    and lowercased; columns keep the file's order (it carries through to
+    model_features) and ones not in `schema` are dropped.
+    """
+    table = pacsv.read_csv(path, convert_options=_csv_options(path, schema))
+    return _to_frame(_typed_table(table, schema, date_formats), schema)
+
+
+def iter_typed_csv(path, schema, date_formats, block_size=STREAM_BLOCK_BYTES):
+    """Typed Arrow tables of consecutive ~block_size-byte blocks of `path`.
+
+    Same typing as read_typed_csv, but only one block is in memory at a time.
+    """
+    reader = pacsv.open_csv(
+        path,
+        read_options=pacsv.ReadOptions(block_size=block_size),
+        convert_options=_csv_options(path, schema),
+    )
+    for batch in reader:
+        yield _typed_table(pa.Table.from_batches([batch]), schema, date_formats)
+
+
+def daily_rainfall(rain):
+    """Rainfall totals per calendar day.
+
+    The archive stamps readings with a time of day (01/01/2004 03:00:00) and
+    may hold several per day; prices are daily, so they are merged on the day.
+    """
+    day = rain["date"].dt.normalize()
+    return rain.groupby(day)["rainfall_mm"].sum().reset_index()
+
+
+def read_sources(prices_path=PRICES_PATH, rain_path=RAIN_PATH, holidays_path=HOLIDAYS_PATH):
+    """(prices, daily rain, holidays), typed: see PRICES_SCHEMA, RAIN_SCHEMA and HOLIDAYS_SCHEMA."""
+    prices = read_typed_csv(prices_path, PRICES_SCHEMA, PRICES_DATE_FORMATS)
+    rain = daily_rainfall(read_typed_csv(rain_path, RAIN_SCHEMA, RAIN_DATE_FORMATS))
+    holidays = read_typed_csv(holidays_path, HOLIDAYS_SCHEMA, HOLIDAYS_DATE_FORMATS)
+    return prices, rain, holidays
+
+
+def merge_sources(prices, exogenous):
+    """Price rows with their date's exogenous features, in (vegetable, date) order.
+
+    Prices arrive as int64 or float64 from read_sources (see parse_prices).
+    """
+    df = prices.reset_index(drop=True)
+
+    # ==============================
+    # 4-6. RAINFALL, FESTIVAL FLAG, CALENDAR
+    # ==============================
+
+    # One lookup per row in the shared exogenous table (0 rainfall and no
+    # festival on days it does not cover)
+    columns = exogenous.lookup(df["date"])
+    df["rainfall_mm"] = columns.pop("rainfall_mm")
+    df["festival_flag"] = columns.pop("festival_flag")
+
+    # 1️⃣ Sort data (VERY IMPORTANT for time series)
+    order = df.sort_values(by=["vegetable", "date"]).index
+    df = df.loc[order]
+
+    # 2️⃣ Time-based features
+    for name, values in columns.items():
+        df[name] = values[order]
+
+    return df
 
 # ==============================
-# 6. FILL MISSING VALUES
+# FEATURE ENGINEERING
 # ==============================
 
-df["festival_flag"] = df["festival_flag"].fillna(0)
-df["rainfall_mm"] = df["rainfall_mm"].fillna(0)
+def add_lag_features(df):
+    """Lag and rolling-mean features; rows must be in (vegetable, date) order."""
+    grouped = df.groupby("vegetable")["avg_price"]
+
+    # 3️⃣ Lag features (historical price dependency)
+    for lag in LAGS:
+        df[f"avg_price_lag_{lag}"] = grouped.shift(lag)
+
+    # 4️⃣ Rolling price trend (weekly mean)
+    # Summed oldest -> newest inside each window, so a row's value depends only
+    # on its own 7 prices. That keeps appends byte-identical to a full rebuild
+    # (pandas' rolling() carries a running sum across the whole history, so
+    # its mean can differ from this one in the last bit).
+    window_sum = grouped.shift(ROLLING_WINDOW - 1)
+    for offset in range(ROLLING_WINDOW - 2, -1, -1):
+        window_sum = window_sum + grouped.shift(offset)
+    df["avg_price_7d_mean"] = window_sum / ROLLING_WINDOW
+
+    return df
+
+
+def tail_state(df):
+    """Last TAIL_DAYS raw avg prices per vegetable, for the next append."""
+    tails = {}
+    for veg, group in df.groupby("vegetable", sort=False):
+        group = group.tail(TAIL_DAYS)
+        tails[veg] = {
+            "last_date": group["date"].iloc[-1].strftime("%Y-%m-%d"),
+            "avg_price": group["avg_price"].tolist(),
+        }
+    return tails
+
+
+def build_features(prices, rain, holidays):
+    """Full rebuild. Returns (features, vegetable per row, tail state)."""
+    df = add_lag_features(merge_sources(prices, ExogenousTable.from_sources(rain, holidays)))
+    tails = tail_state(df)
+
+    # 5️⃣ Drop rows with NaN values (created by lag & rolling features)
+    df.dropna(inplace=True)
+    vegetables = df["vegetable"]
+
+    # 6️⃣ One-hot encode vegetable column (required for XGBoost); only
+    # vegetables with rows left get a column
+    df["vegetable"] = df["vegetable"].cat.remove_unused_categories()
+    df = pd.get_dummies(df, columns=["vegetable"])
+
+    return df, vegetables, tails
 
 # ==============================
-# CLEAN PRICE COLUMNS
+# FEATURE STORE
 # ==============================
 
-price_cols = ["min_price", "max_price", "avg_price"]
+def state_path(output_path):
+    return os.path.splitext(output_path)[0] + ".state.json"
+
+
+def write_feature_store(df, vegetables, tails, output_path=OUTPUT_PATH, exogenous=None):
+    """Write the CSV one vegetable block at a time and record where each ends.
+
+    The bytes are exactly what a single df.to_csv would produce; the block
+    offsets let append mode splice new rows in without re-reading the file.
+    `exogenous` is the table the features were built with; without it the
+    state cannot be appended to (see append_features).
+    """
+    write_feature_blocks(df.iloc[:0], df.groupby(vegetables, sort=False), tails, output_path, exogenous)
+
+
+def write_feature_blocks(header, blocks, tails, output_path=OUTPUT_PATH, exogenous=None):
+    """write_feature_store from an iterable of (vegetable, block) pairs.
+
+    `header` is an empty frame with the columns and dtypes every block has;
+    only one block has to be in memory at a time.
+    """
+    offsets = {}
+    with open(output_path, "w", newline="") as f:
+        header.to_csv(f, index=False)
+        for veg, block in blocks:
+            block.to_csv(f, index=False, header=False)
+            offsets[veg] = f.tell()
+
+    state = {
+        "columns": list(header.columns),
+        "dtypes": {c: str(t) for c, t in header.dtypes.items()},
+        "blocks": offsets,
+        "tails": tails,
+    }
+    if exogenous is not None:
+        state["exogenous"] = exogenous_state(exogenous, tails)
+    with open(state_path(output_path), "w") as f:
+        json.dump(state, f, indent=1)
+
+
+def exogenous_state(exogenous, tails):
+    """Digest of the rainfall/festivals the stored rows were built with (up to the last stored date)."""
+    through = max(t["last_date"] for t in tails.values())
+    return {"through": through, "digest": exogenous.digest(through)}
+
+
+def _align_dtypes(new_rows, dtypes):
+    """Cast new rows to the store's dtypes; None if a full rebuild would differ."""
+    for col, dtype in dtypes.items():
+        current = str(new_rows[col].dtype)
+        if current == dtype:
+            continue
+        if dtype == "int64" and current == "float64":
+            if not (new_rows[col] % 1 == 0).all():
+                return None
+            new_rows[col] = new_rows[col].astype("int64")
+        elif dtype == "float64" and current in ("int64", "bool"):
+            new_rows[col] = new_rows[col].astype("float64")
+        elif _is_numeric(current) or _is_numeric(dtype):
+            return None
+    return new_rows
 
-for col in price_cols:
-    df[col] = (
-        df[col]
-        .astype(str)
-        .str.replace("Rs", "", regex=False)
-        .str.replace(",", "", regex=False)
-        .str.strip()
+
+def _is_numeric(dtype):
+    return dtype.startswith(("int", "uint", "float", "bool"))
+
+
+def append_features(prices, rain, holidays, output_path=OUTPUT_PATH):
+    """Compute features only for dates newer than the stored per-vegetable tails.
+
+    Returns the appended rows (one-hot CSV columns plus `vegetable`), or None
+    if the store has to be
+    rebuilt (no state yet, a vegetable gains its first row, a column's
+    dtype would change, or rainfall/holidays changed for dates already
+    stored, e.g. rainfall arriving after the prices of its days).
+    Back-filled or corrected past prices are not picked up; run a full
+    rebuild for those.
+    """
+    if not os.path.exists(output_path) or not os.path.exists(state_path(output_path)):
+        return None
+    with open(state_path(output_path)) as f:
+        state = json.load(f)
+    tails = state["tails"]
+
+    # Stored rows keep the rainfall/festival they were built with
+    exogenous = ExogenousTable.from_sources(rain, holidays)
+    stored = state.get("exogenous")
+    if stored is None or exogenous.digest(stored["through"]) != stored["digest"]:
+        return None
+
+    # Only rows newer than what each vegetable has already seen
+    last_dates = prices["vegetable"].map(
+        {veg: pd.Timestamp(t["last_date"]) for veg, t in tails.items()}
     )
-    df[col] = pd.to_numeric(df[col], errors="coerce")
+    prices = prices[last_dates.isna() | (prices["date"] > last_dates)]
+    if prices.empty:
+        return pd.DataFrame()
+
+    new = merge_sources(prices, exogenous)
+
+    # Prepend each vegetable's stored tail so lags/rolling see the same prices;
+    # tail rows get negative index labels so they never collide with new rows
+    tail_rows = pd.DataFrame(
+        [
+            {"vegetable": veg, "avg_price": price}
+            for veg in new["vegetable"].unique() if veg in tails
+            for price in tails[veg]["avg_price"]
+        ],
+        columns=["vegetable", "avg_price"],
+    )
+    tail_rows.index = -1 - tail_rows.index
+    series = pd.concat([tail_rows, new[["vegetable", "date", "avg_price"]]])
+    series = add_lag_features(series.sort_values("vegetable", kind="stable"))
+
+    feature_cols = [c for c in series.columns if c.startswith("avg_price_")]
+    new[feature_cols] = series.loc[new.index, feature_cols]
+    new_tails = tail_state(series)
+    new.dropna(inplace=True)
+
+    blocks = state["blocks"]
+    if not set(new["vegetable"]) <= set(blocks):
+        return None
+
+    vegetables = new["vegetable"]
+    for veg in blocks:
+        new[f"vegetable_{veg}"] = vegetables == veg
+    new = _align_dtypes(new[state["columns"]], state["dtypes"])
+    if new is None:
+        return None
+
+    # Splice each vegetable's new rows in after the end of its block
+    tmp_path = output_path + ".tmp"
+    shifted = {}
+    with open(output_path, "rb") as src, open(tmp_path, "wb") as dst:
+        pos = 0
+        for veg, end in blocks.items():
+            _copy_bytes(src, dst, end - pos)
+            pos = end
+            rows = new[vegetables == veg]
+            if len(rows):
+                buf = io.StringIO(newline="")
+                rows.to_csv(buf, index=False, header=False)
+                dst.write(buf.getvalue().encode("utf-8"))
+            shifted[veg] = dst.tell()
+        shutil.copyfileobj(src, dst)
+    os.replace(tmp_path, output_path)
+
+    tails.update(new_tails)
+    state["blocks"] = shifted
+    state["exogenous"] = exogenous_state(exogenous, tails)
+    with open(state_path(output_path), "w") as f:
+        json.dump(state, f, indent=1)
+
+    return new.assign(vegetable=vegetables)
+
+
+def _copy_bytes(src, dst, size, chunk_size=1 << 20):
+    while size > 0:
+        data = src.read(min(chunk_size, size))
+        if not data:
+            break
+        dst.write(data)
+        size -= len(data)
 
 # ==============================
-# FEATURE ENGINEERING
+# STREAMING BUILD
 # ==============================
 
-# 1️⃣ Sort data (VERY IMPORTANT for time series)
-df = df.sort_values(by=["vegetable", "date"])
+def read_daily_rainfall(path, block_size=STREAM_BLOCK_BYTES):
+    """daily_rainfall of the archive, summed block by block.
 
-# 2️⃣ Time-based features
-df["month"] = df["date"].dt.month
-df["day_of_week"] = df["date"].dt.weekday
-df["is_monsoon"] = df["month"].isin([6, 7, 8, 9]).astype(int)
+    The readings of a block's last day are carried into the next block, so
+    in a date-ordered archive each day is summed in one go, in file order,
+    and the totals match daily_rainfall on the whole file to the bit (the
+    exogenous digest depends on it).
+    """
+    partial, carry = [], None
+    for table in iter_typed_csv(path, RAIN_SCHEMA, RAIN_DATE_FORMATS, block_size):
+        rain = _to_frame(table, RAIN_SCHEMA)
+        if carry is not None:
+            rain = pd.concat([carry, rain], ignore_index=True)
+        if rain.empty:
+            continue
+        day = rain["date"].dt.normalize()
+        last = day == day.iloc[-1]
+        carry = rain[last]
+        partial.append(daily_rainfall(rain[~last]))
+    if carry is None:
+        return pd.DataFrame({"date": pd.Series(dtype="datetime64[us]"), "rainfall_mm": pd.Series(dtype=float)})
+    partial.append(daily_rainfall(carry))
+    # An unordered archive can still spread a day over several blocks
+    return daily_rainfall(pd.concat(partial, ignore_index=True))
+
+
+def _write_arrow(path, tables):
+    with pa.ipc.new_file(path, tables[0].schema) as writer:
+        for table in tables:
+            writer.write_table(table)
+
+
+def _read_arrow(path):
+    with pa.memory_map(path) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def partition_prices(path, spill_dir, block_size=STREAM_BLOCK_BYTES):
+    """Spill the price rows into one Arrow file per vegetable, block by block.
+
+    Returns ({vegetable: file}, price columns that are int64 in every block).
+    Prices are spilled as float64, since parse_prices may type a column int64
+    in one block and float64 in another; a column that was int64 throughout
+    is int64 when the whole file is read, so the caller casts it back.
+    Rows keep their file order within a vegetable (the sort is stable); rows
+    without a vegetable are dropped, as the lag features would drop them anyway.
+    """
+    writers, files = {}, {}
+    integers = {name for name, kind in PRICES_SCHEMA.items() if kind == "price"}
+    try:
+        for table in iter_typed_csv(path, PRICES_SCHEMA, PRICES_DATE_FORMATS, block_size):
+            for i, name in enumerate(table.column_names):
+                if PRICES_SCHEMA[name] == "price":
+                    if table[name].type != pa.int64():
+                        integers.discard(name)
+                    table = table.set_column(i, name, pc.cast(table[name], pa.float64()))
+            table = table.take(pc.sort_indices(table, [("vegetable", "ascending")]))
+            names = table["vegetable"].to_numpy(zero_copy_only=False)
+            rows = table.drop_columns(["vegetable"])
+            starts = np.flatnonzero(np.r_[True, names[1:] != names[:-1]])
+            for start, end in zip(starts, np.r_[starts[1:], len(names)]):
+                veg = names[start]
+                if veg is None:
+                    continue
+                if veg not in writers:
+                    files[veg] = os.path.join(spill_dir, f"prices-{len(files)}.arrow")
+                    writers[veg] = pa.ipc.new_file(files[veg], rows.schema)
+                writers[veg].write_table(rows.slice(start, end - start))
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return files, integers
 
-# 3️⃣ Lag features (historical price dependency)
-for lag in [1, 3, 7, 14]:
-    df[f"avg_price_lag_{lag}"] = (
-        df.groupby("vegetable")["avg_price"]
-        .shift(lag)
-    )
 
-# 4️⃣ Rolling price trend (weekly mean)
-df["avg_price_7d_mean"] = (
-    df.groupby("vegetable")["avg_price"]
-    .rolling(7)
-    .mean()
-    .reset_index(level=0, drop=True)
-)
+def stream_features(prices_path=PRICES_PATH, rain_path=RAIN_PATH, holidays_path=HOLIDAYS_PATH,
+                    output_path=OUTPUT_PATH, store_dir=STORE_DIR, block_size=STREAM_BLOCK_BYTES,
+                    exogenous_path=None):
+    """Full rebuild for archives too large to load at once; returns the features' shape.
+
+    Writes exactly what build_features + write_feature_store + write_store
+    would, byte for byte, in three passes over temporary Arrow files:
+
+    1. the price CSV is read in blocks of block_size bytes and each block's
+       rows are appended to their vegetable's spill file; rainfall is summed
+       to daily totals on the way in
+    2. each vegetable is loaded on its own, merged with rainfall and holidays
+       and given its lag features, which only ever look within a vegetable
+    3. once the vegetables with rows are known (they name the one-hot
+       columns), their blocks are written to the CSV and the Parquet store
+
+    Peak memory is one source block or one vegetable's history, not the archive.
+    The exogenous table is also saved to `exogenous_path`, if given.
+    """
+    holidays = read_typed_csv(holidays_path, HOLIDAYS_SCHEMA, HOLIDAYS_DATE_FORMATS)
+    exogenous = ExogenousTable.from_sources(read_daily_rainfall(rain_path, block_size), holidays)
+    if exogenous_path:
+        exogenous.save(exogenous_path)
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        partitions, integers = partition_prices(prices_path, spill_dir, block_size)
+
+        tails, features = {}, {}
+        for i, veg in enumerate(sorted(partitions)):
+            prices = _to_frame(_read_arrow(partitions[veg]), PRICES_SCHEMA, integers)
+            prices["vegetable"] = pd.Categorical([veg] * len(prices))
+            df = add_lag_features(merge_sources(prices, exogenous))
+            tails.update(tail_state(df))
+            df = df.dropna().drop(columns="vegetable")
+            if len(df):
+                features[veg] = os.path.join(spill_dir, f"features-{i}.arrow")
+                _write_arrow(features[veg], [pa.Table.from_pandas(df, preserve_index=False)])
+            os.remove(partitions[veg])
+
+        vegetables = list(features)
+        onehot_cols = [f"vegetable_{veg}" for veg in vegetables]
+        n_rows = 0
+
+        def blocks():
+            nonlocal n_rows
+            for i, veg in enumerate(vegetables):
+                df = _read_arrow(features[veg]).to_pandas()
+                flags = np.zeros((len(df), len(vegetables)), dtype=bool)
+                flags[:, i] = True
+                block = pd.concat([df, pd.DataFrame(flags, columns=onehot_cols, index=df.index)], axis=1)
+                write_store(to_store_frame(block, [veg] * len(block)), store_dir)
+                n_rows += len(block)
+                yield veg, block
+
+        clear_store(store_dir)
+        blocks = blocks()
+        first = next(blocks, None)
+        if first is None:
+            raise ValueError(f"{prices_path} has no rows with a full price history")
+        write_feature_blocks(first[1].iloc[:0], itertools.chain([first], blocks), tails, output_path,
+                             exogenous)
+
+    return n_rows, len(first[1].columns)
+
+# ==============================
+# MAIN
+# ==============================
 
-# 5️⃣ Drop rows with NaN values (created by lag & rolling features)
-df.dropna(inplace=True)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the ML-ready training dataset.")
+    parser.add_argument("--append", action="store_true",
+                        help="only compute features for new dates and append them to the existing output")
+    parser.add_argument("--prices", default=PRICES_PATH)
+    parser.add_argument("--rain", default=RAIN_PATH)
+    parser.add_argument("--holidays", default=HOLIDAYS_PATH)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--store", default=STORE_DIR,
+                        help="directory of the typed Parquet feature store (partitioned by vegetable)")
+    parser.add_argument("--exogenous", default=EXOGENOUS_PATH,
+                        help="where to save the date-indexed rainfall/festival/calendar table")
+    parser.add_argument("--stream", action="store_true",
+                        help="full rebuild reading the sources in blocks, for archives too large for memory")
+    parser.add_argument("--block-mb", type=int, default=STREAM_BLOCK_BYTES >> 20,
+                        help="source block size of --stream")
+    args = parser.parse_args()
 
-# 6️⃣ One-hot encode vegetable column (required for XGBoost)
-df = pd.get_dummies(df, columns=["vegetable"])
+    appended = None
+    if args.append and store_exists(args.store):
+        prices, rain, holidays = read_sources(args.prices, args.rain, args.holidays)
+        appended = append_features(prices, rain, holidays, args.output)
+        # Holidays may have been added for coming months, even with no new prices
+        ExogenousTable.from_sources(rain, holidays).save(args.exogenous)
+    if appended is not None:
+        if len(appended):
+            write_store(to_store_frame(appended, appended["vegetable"]), args.store, append=True)
+        print(f"Appended {len(appended)} new rows to {args.output} and {args.store}")
+    else:
+        if args.append:
+            print("Append not possible, running a full rebuild")
+        if args.stream:
+            shape = stream_features(args.prices, args.rain, args.holidays, args.output, args.store,
+                                    block_size=args.block_mb << 20, exogenous_path=args.exogenous)
+        else:
+            prices, rain, holidays = read_sources(args.prices, args.rain, args.holidays)
+            exogenous = ExogenousTable.from_sources(rain, holidays)
+            exogenous.save(args.exogenous)
+            df, vegetables, tails = build_features(prices, rain, holidays)
 
-# 7️⃣ Save final ML-ready dataset
-df.to_csv("final_training_data.csv", index=False)
+            # 7️⃣ Save final ML-ready dataset
+            write_feature_store(df, vegetables, tails, args.output, exogenous)
+            clear_store(args.store)
+            write_store(to_store_frame(df, vegetables), args.store)
+            shape = df.shape
 
-print("Feature engineering completed successfully!")
-print("Output file: final_training_data.csv")
-print("Final dataset shape:", df.shape)
\ No newline at end of file
+        print("Feature engineering completed successfully!")
+        print("Output file:", args.output)
+        print("Final dataset shape:", shape)
@@ -0,0 +1,166 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from feature_store import from_one_hot
+
+# =====================
+# CONFIG
+# =====================
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+PLOTS_DIR = os.path.join(MODELS_DIR, "..", "plots")
+FORECAST_CSV = os.path.join(MODELS_DIR, "..", "data", "forecasts", "next_7_days_forecast.csv")
+
+HISTORY_POINTS = 60
+HASHES_FILE = "plot_hashes.json"
+
+# Bump when the figure layout changes so every plot is re-rendered once
+PLOT_STYLE_VERSION = 1
+
+# =====================
+# PLOT TASKS
+# =====================
+def plot_tasks(df, forecast_df):
+    """One (vegetable, history, forecast) task per forecast vegetable.
+
+    The history is grouped once instead of filtering `df` per vegetable.
+    """
+    if "vegetable" not in df.columns:
+        veg_cols = [c for c in df.columns if c.startswith("vegetable_")]
+        df = from_one_hot(df[["date", "avg_price"] + veg_cols])
+    hist_by_veg = {
+        veg: group for veg, group in
+        df.groupby("vegetable", observed=True, sort=False)[["date", "avg_price"]]
+    }
+
+    tasks = []
+    for veg, fut in forecast_df.groupby("vegetable", sort=False):
+        if veg not in hist_by_veg:
+            continue
+        hist = hist_by_veg[veg].tail(HISTORY_POINTS)
+        tasks.append({
+            "vegetable": veg,
+            "hist_dates": hist["date"].to_numpy(dtype="datetime64[ns]"),
+            "hist_prices": hist["avg_price"].to_numpy(dtype=float),
+            "fut_dates": pd.to_datetime(fut["date"]).to_numpy(dtype="datetime64[ns]"),
+            "fut_prices": fut["predicted_price"].to_numpy(dtype=float),
+        })
+    return tasks
+
+
+def task_hash(task):
+    h = hashlib.sha256(f"{PLOT_STYLE_VERSION}|{task['vegetable']}".encode())
+    for key in ("hist_dates", "hist_prices", "fut_dates", "fut_prices"):
+        h.update(np.ascontiguousarray(task[key]).tobytes())
+    return h.hexdigest()
+
+
+def plot_path(plots_dir, vegetable):
+    return os.path.join(plots_dir, f"{vegetable}_forecast.png")
+
+# =====================
+# RENDER
+# =====================
+def render_plot(task, plots_dir):
+    """Render one PNG; runs in a worker process on the Agg backend."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    veg = task["vegetable"]
+    plt.figure(figsize=(10,5))
+    plt.plot(task["hist_dates"], task["hist_prices"], label="Historical", linewidth=2)
+    plt.plot(task["fut_dates"], task["fut_prices"], "o--", label="Forecast")
+    plt.title(f"{veg} – Price Forecast")
+    plt.xlabel("Date")
+    plt.ylabel("Price")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(plot_path(plots_dir, veg))
+    plt.close()
+    return veg
+
+
+def render_plots(df, forecast_df, plots_dir=PLOTS_DIR, workers=None, force=False):
+    """Render every changed plot in a process pool.
+
+    A plot is skipped when its PNG exists and the hash of its history and
+    forecast matches the one recorded in plots_dir/plot_hashes.json.
+    Returns (rendered, skipped) vegetable lists. A plot that fails to render
+    does not stop the others: the hashes of those that did are saved, and a
+    RuntimeError naming the failed ones is raised at the end.
+    """
+    os.makedirs(plots_dir, exist_ok=True)
+    hashes_path = os.path.join(plots_dir, HASHES_FILE)
+    hashes = {}
+    if os.path.exists(hashes_path):
+        with open(hashes_path) as f:
+            hashes = json.load(f)
+
+    todo, skipped = [], []
+    for task in plot_tasks(df, forecast_df):
+        digest = task_hash(task)
+        veg = task["vegetable"]
+        if not force and hashes.get(veg) == digest and os.path.exists(plot_path(plots_dir, veg)):
+            skipped.append(veg)
+        else:
+            todo.append((task, digest))
+
+    rendered, failed = [], []
+    if todo:
+        # Until it renders again, a plot's old PNG no longer matches its hash
+        for task, _ in todo:
+            hashes.pop(task["vegetable"], None)
+        try:
+            workers = workers or min(len(todo), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(render_plot, task, plots_dir) for task, _ in todo]
+                for (task, digest), future in zip(todo, futures):
+                    try:
+                        rendered.append(future.result())
+                    except Exception as e:
+                        print(f"⚠️ Plot for {task['vegetable']} failed: {e!r}")
+                        failed.append(task["vegetable"])
+                    else:
+                        hashes[task["vegetable"]] = digest
+        finally:
+            save_hashes(hashes, hashes_path)
+
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {len(todo)} plots failed: {', '.join(failed)}")
+    return rendered, skipped
+
+
+def save_hashes(hashes, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# =====================
+# MAIN
+# =====================
+if __name__ == "__main__":
+    from feature_store import STORE_DIR
+    from forecasting import DATA_PATH, load_history
+
+    parser = argparse.ArgumentParser(description="Render forecast plots for the last forecast CSV.")
+    parser.add_argument("--forecast", default=FORECAST_CSV)
+    parser.add_argument("--plots-dir", default=PLOTS_DIR)
+    parser.add_argument("--store", default=STORE_DIR, help="Parquet feature store to read the history from")
+    parser.add_argument("--data", default=DATA_PATH, help="training CSV, used when there is no feature store")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--force", action="store_true", help="re-render even unchanged plots")
+    args = parser.parse_args()
+
+    df, _ = load_history(args.data, args.store)
+    forecast_df = pd.read_csv(args.forecast, parse_dates=["date"])
+
+    rendered, skipped = render_plots(df, forecast_df, args.plots_dir, args.workers, args.force)
+    print(f"📊 Rendered {len(rendered)} plots ({len(skipped)} unchanged) in", args.plots_dir)
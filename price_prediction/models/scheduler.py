@@ -0,0 +1,326 @@
+import argparse
+import csv
+import functools
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, datetime
+
+from forecast_artifact import MANIFEST_FILE
+from organizedData import HOLIDAYS_PATH, PRICES_PATH, RAIN_PATH
+
+# =====================
+# CONFIG
+# =====================
+MODELS_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(MODELS_DIR, "..", "data")
+PLOTS_DIR = os.path.join(MODELS_DIR, "..", "plots")
+
+# New source files are dropped into <data>/incoming/<source>/ and moved to
+# <data>/incoming/<source>/processed/ once their rows are in the source CSV
+INBOX_DIR = "incoming"
+PROCESSED_DIR = "processed"
+SOURCES = {
+    "prices": os.path.basename(PRICES_PATH),
+    "rainfall": os.path.basename(RAIN_PATH),
+    "holidays": os.path.basename(HOLIDAYS_PATH),
+}
+
+# Per stage, the fingerprint of the inputs it last ran on successfully
+STATE_FILE = "scheduler_state.json"
+INTERVAL_MINUTES = 30
+
+# =====================
+# STAGES
+# =====================
+class Stage:
+    """One step of the pipeline.
+
+    A stage is due when the fingerprint of its `inputs` (files, globs or
+    directories, by mtime/size) and of `key()` differs from the one recorded
+    after its last successful run, or when one of its `outputs` is missing.
+    It starts once every stage in `deps` has finished, so it sees their
+    outputs. `consumes` stages (ingest) move their inputs away, so they record
+    the fingerprint after running instead of before.
+    """
+
+    def __init__(self, name, action, inputs=(), outputs=(), deps=(), key=None, consumes=False):
+        self.name = name
+        self.action = action
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.key = key
+        self.consumes = consumes
+
+    def fingerprint(self):
+        stats = []
+        for path in self.inputs:
+            for f in _expand(path):
+                st = os.stat(f)
+                stats.append((f, st.st_mtime_ns, st.st_size))
+            if not os.path.exists(path) and not glob.has_magic(path):
+                stats.append((path, None))
+        if self.key is not None:
+            stats.append(self.key())
+        return hashlib.sha1(repr(stats).encode()).hexdigest()[:12]
+
+    def is_due(self, state):
+        return state.get(self.name) != self.fingerprint() or not all(map(os.path.exists, self.outputs))
+
+
+def _expand(path):
+    """Files behind an input: a glob's matches, a directory's files, or the file."""
+    if glob.has_magic(path):
+        return sorted(glob.glob(path))
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+    return [path] if os.path.exists(path) else []
+
+
+def command(script, *args, cwd=MODELS_DIR):
+    """Action running one of the pipeline scripts in a fresh interpreter; returns its output."""
+    def run():
+        result = subprocess.run(
+            [sys.executable, os.path.join(MODELS_DIR, script), *args],
+            cwd=cwd, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise RuntimeError(f"{script} exited with {result.returncode}:\n{result.stderr.strip()}")
+        return result.stdout
+    return run
+
+# =====================
+# INGEST
+# =====================
+def ingest_file(path, target):
+    """Append the rows of `path` that `target` does not already have; returns how many.
+
+    Columns are matched by name (case and spaces ignored) and written in the
+    target's order; the target is rewritten atomically.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = [c.strip().lower() for c in next(reader, [])]
+        rows = [row for row in reader if any(v.strip() for v in row)]
+
+    if not os.path.exists(target):
+        columns = header
+        with open(target, "w", newline="") as f:
+            csv.writer(f, lineterminator="\n").writerow(columns)
+    else:
+        with open(target, newline="") as f:
+            columns = [c.strip().lower() for c in next(csv.reader(f), [])]
+    missing = set(columns) - set(header)
+    if missing:
+        raise ValueError(f"{path} has no {sorted(missing)} column(s) for {target}")
+    order = [header.index(c) for c in columns]
+    new = dict.fromkeys(tuple(row[i] for i in order) for row in rows)
+
+    # Drop rows the target already has (a file delivered twice, overlapping dumps)
+    with open(target, newline="") as f:
+        for row in csv.reader(f):
+            new.pop(tuple(row), None)
+    if not new:
+        return 0
+
+    tmp_path = target + ".tmp"
+    with open(target, "rb") as src, open(tmp_path, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+        if dst.tell() and (src.seek(-1, os.SEEK_END), src.read(1))[1] != b"\n":
+            dst.write(b"\n")
+    with open(tmp_path, "a", newline="") as dst:
+        csv.writer(dst, lineterminator="\n").writerows(new)
+    os.replace(tmp_path, target)
+    return len(new)
+
+
+def ingest_inbox(inbox, target):
+    """Ingest every CSV waiting in `inbox` into `target`, oldest name first."""
+    processed = os.path.join(inbox, PROCESSED_DIR)
+    lines = []
+    for path in sorted(glob.glob(os.path.join(inbox, "*.csv"))):
+        added = ingest_file(path, target)
+        os.makedirs(processed, exist_ok=True)
+        os.replace(path, os.path.join(processed, os.path.basename(path)))
+        lines.append(f"{os.path.basename(path)}: {added} new rows")
+    return "\n".join(lines)
+
+# =====================
+# PIPELINE
+# =====================
+def pipeline(data_dir=DATA_DIR, plots_dir=PLOTS_DIR, models_dir=MODELS_DIR, retrain=False):
+    """The stages: ingest (one per source) -> features -> [retrain] -> forecast -> plot."""
+    sources = {name: os.path.join(data_dir, filename) for name, filename in SOURCES.items()}
+    training_csv = os.path.join(data_dir, "final_training_data.csv")
+    store = os.path.join(data_dir, "feature_store")
+    exogenous = os.path.join(data_dir, "exogenous.npz")
+    model = os.path.join(models_dir, "xgboost_price_model.ubj")
+    forecast_csv = os.path.join(data_dir, "forecasts", "next_7_days_forecast.csv")
+
+    stages = []
+    for name, target in sources.items():
+        inbox = os.path.join(data_dir, INBOX_DIR, name)
+        stages.append(Stage(
+            f"ingest_{name}", functools.partial(ingest_inbox, inbox, target),
+            inputs=[os.path.join(inbox, "*.csv")], consumes=True,
+        ))
+    ingest = [s.name for s in stages]
+
+    # Rainfall or holidays can land a cycle after the prices of their days;
+    # --append then finds the stored rows out of date and rebuilds them all
+    stages.append(Stage(
+        "features",
+        command("organizedData.py", "--append", "--prices", sources["prices"], "--rain", sources["rainfall"],
+                "--holidays", sources["holidays"], "--output", training_csv, "--store", store,
+                "--exogenous", exogenous),
+        inputs=list(sources.values()), outputs=[training_csv, store, exogenous], deps=ingest,
+    ))
+    forecast_deps = ["features"]
+    if retrain:
+        # train_model.py writes the model files into its working directory
+        stages.append(Stage(
+            "retrain", command("train_model.py", "--data", training_csv, "--store", store, cwd=models_dir),
+            inputs=[store], outputs=[model], deps=["features"],
+        ))
+        forecast_deps.append("retrain")
+    # Also due every new day, since the forecast starts from today
+    stages.append(Stage(
+        "forecast",
+        command("forecast_all_vegetables.py", "--skip-plots", "--model", model, "--store", store,
+                "--data", training_csv, "--exogenous", exogenous, "--output", forecast_csv),
+        inputs=[store, exogenous, model],
+        outputs=[forecast_csv, os.path.join(data_dir, "forecasts", MANIFEST_FILE)], deps=forecast_deps,
+        key=lambda: date.today().isoformat(),
+    ))
+    stages.append(Stage(
+        "plot",
+        command("plotting.py", "--forecast", forecast_csv, "--plots-dir", plots_dir, "--store", store,
+                "--data", training_csv),
+        inputs=[forecast_csv], deps=["forecast"],
+    ))
+    return stages
+
+# =====================
+# RUN
+# =====================
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def log(message):
+    print(f"{datetime.now():%Y-%m-%d %H:%M:%S} {message}", flush=True)
+
+
+def run_cycle(stages, state_path, workers=None):
+    """Run every due stage once, independent ones concurrently.
+
+    Returns {stage: "ran" | "unchanged" | "failed" | "blocked"}. A failed
+    stage keeps its old fingerprint, so it is retried next cycle, and the
+    stages after it are blocked until then.
+    """
+    state = load_state(state_path)
+    status = {}
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers or len(stages)) as pool:
+        while pending or running:
+            # Start (or settle) every stage whose dependencies have finished;
+            # settling one can make the next ready, so repeat until none is
+            ready = [s for s in pending if all(d in status for d in s.deps)]
+            while ready:
+                for stage in ready:
+                    pending.remove(stage)
+                    if any(status[d] in ("failed", "blocked") for d in stage.deps):
+                        status[stage.name] = "blocked"
+                    elif not stage.is_due(state):
+                        status[stage.name] = "unchanged"
+                    else:
+                        log(f"{stage.name}: started")
+                        running[pool.submit(stage.action)] = (stage, stage.fingerprint(), time.perf_counter())
+                ready = [s for s in pending if all(d in status for d in s.deps)]
+            if not running:
+                if pending:
+                    raise ValueError(f"stages depend on unknown stages: {[s.name for s in pending]}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint, t0 = running.pop(future)
+                try:
+                    output = future.result()
+                except Exception as e:
+                    status[stage.name] = "failed"
+                    log(f"{stage.name}: failed after {time.perf_counter() - t0:.1f}s\n{e}")
+                    continue
+                status[stage.name] = "ran"
+                state[stage.name] = stage.fingerprint() if stage.consumes else fingerprint
+                save_state(state, state_path)
+                log(f"{stage.name}: done in {time.perf_counter() - t0:.1f}s")
+                for line in (output or "").strip().splitlines():
+                    print(f"    {line}", flush=True)
+    return status
+
+
+def serve(stages, state_path, interval=INTERVAL_MINUTES, workers=None):
+    """Run a cycle now and then every `interval` minutes, until interrupted."""
+    import schedule
+
+    def cycle():
+        status = run_cycle(stages, state_path, workers)
+        log(", ".join(f"{name} {s}" for name, s in status.items()))
+
+    schedule.every(interval).minutes.do(cycle)
+    schedule.run_all()
+    while True:
+        schedule.run_pending()
+        time.sleep(1)
+
+# =====================
+# MAIN
+# =====================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Keep features, forecast and plots up to date as new source files arrive."
+    )
+    parser.add_argument("--data-dir", default=DATA_DIR,
+                        help=f"source CSVs, {INBOX_DIR}/<source>/ drops, feature store and forecast")
+    parser.add_argument("--plots-dir", default=PLOTS_DIR)
+    parser.add_argument("--models-dir", default=MODELS_DIR,
+                        help="model to forecast with (and where --retrain writes it)")
+    parser.add_argument("--retrain", action="store_true",
+                        help="retrain the model whenever the features change")
+    parser.add_argument("--interval", type=int, default=INTERVAL_MINUTES, help="minutes between checks")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="stages run at once (default: all that are ready)")
+    parser.add_argument("--once", action="store_true", help="run one cycle and exit")
+    args = parser.parse_args()
+
+    for name in SOURCES:
+        os.makedirs(os.path.join(args.data_dir, INBOX_DIR, name), exist_ok=True)
+    stages = pipeline(args.data_dir, args.plots_dir, args.models_dir, args.retrain)
+    state_path = os.path.join(args.data_dir, STATE_FILE)
+
+    if args.once:
+        status = run_cycle(stages, state_path, args.workers)
+        log(", ".join(f"{name} {s}" for name, s in status.items()))
+        sys.exit(1 if "failed" in status.values() else 0)
+    serve(stages, state_path, args.interval, args.workers)
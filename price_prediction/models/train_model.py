@@ -1,30 +1,39 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import xgboost as xgb
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
 import numpy as np
 import joblib
+from numpy.lib.stride_tricks import sliding_window_view
+from forecasting import (
+    CATEGORICAL_MODEL_PATH,
+    DIRECT_MODEL_PATH,
+    FORECAST_DAYS,
+    HISTORY_DAYS,
+    MEAN_WINDOW,
+    calendar_columns,
+    history_columns,
+    save_native_model,
+)
+from feature_store import COLUMNS, STORE_DIR, from_one_hot, read_store, store_exists, to_one_hot
 
-# 1. LOAD TRAINING DATA
-df = pd.read_csv("../data/final_training_data.csv")
-
-# 2. TRAIN / TEST SPLIT
-df["date"] = pd.to_datetime(df["date"])
-
-# Split using a date inside your data range
-train = df[df["date"] < "2023-07-01"]  # all rows before July 2023
-test  = df[df["date"] >= "2023-07-01"] # all rows from July 2023 onwards
-
-X_train = train.drop(columns=["date", "avg_price", "unit"])
-y_train = train["avg_price"]
+SPLIT_DATE = "2023-07-01"
 
-X_test = test.drop(columns=["date", "avg_price", "unit"])
-y_test = test["avg_price"]
+# "onehot": one boolean vegetable_* column per vegetable (the original model)
+# "categorical": a single `vegetable` category column, split natively by XGBoost
+ENCODINGS = ["onehot", "categorical"]
 
-print("Train samples:", len(X_train))
-print("Test samples:", len(X_test))
+# "recursive": one-step model, fed its own predictions day by day (the original)
+# "direct": one model for every horizon 1..FORECAST_DAYS, with the horizon as a
+# feature, predicting each day straight from the history at the forecast origin
+STRATEGIES = ["recursive", "direct"]
 
-# 3. TRAIN XGBOOST REGRESSOR
-model = xgb.XGBRegressor(
+XGB_PARAMS = dict(
     objective="reg:squarederror",
     n_estimators=300,
     learning_rate=0.05,
@@ -34,26 +43,327 @@ model = xgb.XGBRegressor(
     random_state=42
 )
 
-model.fit(X_train, y_train)
+# Rolling-origin cross-validation inside the training period: each fold
+# trains on every day before its window and is scored on the next FOLD_DAYS.
+# The last EARLY_STOPPING_DAYS of a fold's training days are held out to
+# pick the number of trees, so the scored window never influences the fit.
+CV_FOLDS = 5
+FOLD_DAYS = 30
+EARLY_STOPPING_DAYS = 28
+EARLY_STOPPING_ROUNDS = 50
+SEARCH_MAX_ESTIMATORS = 1000
+
+BEST_PARAMS_PATH = "best_params.json"
+SEARCH_RESULTS_PATH = "search_results.csv"
+
+# 1. LOAD TRAINING DATA
+def load_training_data(encoding="onehot", csv_path="../data/final_training_data.csv", store_dir=STORE_DIR):
+    # Prefer the typed Parquet store written by organizedData.py (no `unit` needed)
+    if store_exists(store_dir):
+        df = read_store(columns=[c for c in COLUMNS if c != "unit"], store_dir=store_dir)
+        if encoding == "onehot":
+            df = to_one_hot(df)
+    else:
+        df = pd.read_csv(csv_path)
+        if encoding == "categorical":
+            df = from_one_hot(df)
+
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def direct_training_frame(df, max_horizon=FORECAST_DAYS):
+    """Training rows of the direct multi-horizon model, from the categorical frame.
+
+    One row per vegetable, origin day t and horizon h = 1..max_horizon: the
+    price and weather features of the HISTORY_DAYS rows up to t (computed by
+    forecasting.history_columns, as forecast_direct does at inference), the
+    calendar features of day t + h, and its avg_price as the target. `date` is
+    the target day t + h, so splitting by date keeps targets out of training.
+    Origins whose target row is not exactly h days later are skipped.
+    """
+    frames = []
+    for vegetable, g in df.groupby("vegetable", observed=True, sort=False):
+        g = g.sort_values("date")
+        n = len(g)
+        if n <= HISTORY_DAYS:
+            continue
+        dates = pd.DatetimeIndex(g["date"])
+        avg = g["avg_price"].to_numpy(dtype=float)
+        festival = g["festival_flag"].to_numpy()
+        # Window j holds rows j .. j + width - 1, so the one ending at row t is t - width + 1
+        avg_windows = sliding_window_view(avg, HISTORY_DAYS)
+        side_windows = [sliding_window_view(g[c].to_numpy(dtype=float), MEAN_WINDOW)
+                        for c in ("min_price", "max_price", "rainfall_mm")]
 
+        origins = np.arange(HISTORY_DAYS - 1, n)
+        for h in range(1, max_horizon + 1):
+            t = origins[origins + h < n]
+            t = t[(dates[t + h] - dates[t]).days == h]
+            columns = history_columns(avg_windows[t - HISTORY_DAYS + 1],
+                                      *(w[t - MEAN_WINDOW + 1] for w in side_windows))
+            columns.update(calendar_columns(dates[t + h]), festival_flag=festival[t + h])
+            frames.append(pd.DataFrame({
+                "date": dates[t + h], "horizon": h, **columns,
+                "avg_price": avg[t + h], "vegetable": vegetable,
+            }))
+
+    frame = pd.concat(frames, ignore_index=True)
+    frame["vegetable"] = pd.Categorical(frame["vegetable"], categories=df["vegetable"].cat.categories)
+    return frame
+
+# 2. TRAIN / TEST SPLIT
+def split_xy(df):
+    X = df.drop(columns=["date", "avg_price", "unit"], errors="ignore")
+    y = df["avg_price"]
+    return X, y
+
+
+def train_test_split_by_date(df, split_date=SPLIT_DATE):
+    # Split using a date inside your data range
+    train = df[df["date"] < split_date]  # all rows before July 2023
+    test  = df[df["date"] >= split_date] # all rows from July 2023 onwards
+    return split_xy(train), split_xy(test)
+
+# 3. TRAIN XGBOOST REGRESSOR
+def make_model(encoding="onehot", **params):
+    params = {**XGB_PARAMS, **params}
+    if encoding == "categorical":
+        params.update(enable_categorical=True, tree_method="hist")
+    return xgb.XGBRegressor(**params)
 
 # 4. EVALUATION
-preds = model.predict(X_test)
+def evaluate(model, X_test, y_test):
+    preds = model.predict(X_test)
+
+    mae = mean_absolute_error(y_test, preds)
+    rmse = np.sqrt(mean_squared_error(y_test, preds))  # version-independent RMSE
+    r2  = r2_score(y_test, preds)
+    return mae, rmse, r2
+
+
+def mae_by_horizon(model, X_test, y_test):
+    """Test MAE of a direct model per horizon."""
+    errors = pd.Series(np.abs(model.predict(X_test) - y_test.to_numpy()), index=X_test.index)
+    return errors.groupby(X_test["horizon"]).mean()
+
+# 5. TIME-SERIES CROSS-VALIDATION
+def rolling_origin_folds(dates, n_folds=CV_FOLDS, fold_days=FOLD_DAYS,
+                         early_stopping_days=EARLY_STOPPING_DAYS):
+    """[(fit rows, early-stopping rows, test rows)] as positional index arrays.
+
+    The last n_folds windows of fold_days calendar days are the test sets,
+    oldest first; each fold's training set is every row dated before its
+    window (an expanding window), minus its last early_stopping_days.
+    """
+    dates = pd.DatetimeIndex(dates)
+    end = dates.max() + pd.Timedelta(days=1)
+    folds = []
+    for k in range(n_folds, 0, -1):
+        test_start = end - pd.Timedelta(days=k * fold_days)
+        test_end = test_start + pd.Timedelta(days=fold_days)
+        es_start = test_start - pd.Timedelta(days=early_stopping_days)
+        fit = np.flatnonzero(dates < es_start)
+        es = np.flatnonzero((dates >= es_start) & (dates < test_start))
+        test = np.flatnonzero((dates >= test_start) & (dates < test_end))
+        if not len(fit) or not len(es) or not len(test):
+            raise ValueError(f"not enough history for {n_folds} folds of {fold_days} days "
+                             f"({dates.min():%Y-%m-%d} to {dates.max():%Y-%m-%d})")
+        folds.append((fit, es, test))
+    return folds
+
+
+def cross_validate(X, y, folds, encoding="onehot", n_jobs=None, **params):
+    """Fit one configuration on every fold with early stopping.
+
+    Returns one dict per fold: rows, fit seconds, best iteration, MAE, RMSE.
+    """
+    results = []
+    for i, (fit, es, test) in enumerate(folds):
+        model = make_model(encoding, early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                           n_jobs=n_jobs, **params)
+        t0 = time.perf_counter()
+        model.fit(X.iloc[fit], y.iloc[fit], eval_set=[(X.iloc[es], y.iloc[es])], verbose=False)
+        fit_s = time.perf_counter() - t0
+        mae, rmse, _ = evaluate(model, X.iloc[test], y.iloc[test])
+        results.append({
+            "fold": i, "train_rows": len(fit), "test_rows": len(test), "fit_s": fit_s,
+            "best_iteration": model.best_iteration, "mae": mae, "rmse": rmse,
+        })
+    return results
+
+# 6. HYPERPARAMETER SEARCH
+def sample_params(n, seed=0):
+    """XGB_PARAMS first, then n - 1 random configurations around it."""
+    rng = np.random.default_rng(seed)
+    configs = [{**XGB_PARAMS, "n_estimators": SEARCH_MAX_ESTIMATORS}]
+    for _ in range(n - 1):
+        configs.append({
+            **XGB_PARAMS,
+            "n_estimators": SEARCH_MAX_ESTIMATORS,
+            "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.3)))),
+            "max_depth": int(rng.integers(3, 11)),
+            "min_child_weight": float(np.exp(rng.uniform(0, np.log(10)))),
+            "subsample": float(rng.uniform(0.6, 1.0)),
+            "colsample_bytree": float(rng.uniform(0.5, 1.0)),
+            "reg_lambda": float(np.exp(rng.uniform(np.log(0.1), np.log(10)))),
+        })
+    return configs
+
+
+_worker_data = None  # (X, y, folds, encoding, n_jobs), set once per worker process
+
+
+def _init_worker(X, y, folds, encoding, n_jobs):
+    global _worker_data
+    _worker_data = (X, y, folds, encoding, n_jobs)
+
+
+def _run_config(config_id, params):
+    X, y, folds, encoding, n_jobs = _worker_data
+    return [{"config": config_id, **r} for r in cross_validate(X, y, folds, encoding, n_jobs, **params)]
+
+
+def search(X, y, folds, configs, encoding="onehot", workers=None):
+    """Cross-validate every configuration in a process pool.
+
+    Each worker gets cpu_count // workers XGBoost threads, so the pool as a
+    whole never runs more threads than there are cores. Returns the per-fold
+    results as a DataFrame (one row per configuration and fold).
+    """
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(configs)))
+    n_jobs = max(1, cpus // workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(X, y, folds, encoding, n_jobs)) as pool:
+        futures = [pool.submit(_run_config, i, params) for i, params in enumerate(configs)]
+        rows = [row for future in futures for row in future.result()]
+    return pd.DataFrame(rows)
+
+
+def summarize(results, configs):
+    """One row per configuration, best mean MAE first."""
+    summary = results.groupby("config").agg(
+        mae=("mae", "mean"), mae_std=("mae", "std"), rmse=("rmse", "mean"),
+        fit_s=("fit_s", "sum"), best_iteration=("best_iteration", "mean"),
+    )
+    tuned = ["learning_rate", "max_depth", "min_child_weight", "subsample", "colsample_bytree", "reg_lambda"]
+    for name in tuned:
+        summary[name] = [configs[i].get(name) for i in summary.index]
+    return summary.sort_values("mae")
+
+
+def best_params(summary, configs):
+    """The best configuration, with n_estimators set to its mean early-stopped size."""
+    best = summary.index[0]
+    params = dict(configs[best])
+    params["n_estimators"] = int(round(summary.loc[best, "best_iteration"])) + 1
+    return params
+
+
+def save_params(params, path=BEST_PARAMS_PATH, **info):
+    with open(path, "w") as f:
+        json.dump({"params": params, **info}, f, indent=1)
+
+
+def load_params(path=BEST_PARAMS_PATH):
+    with open(path) as f:
+        return json.load(f)["params"]
+
+
+def print_search(results, summary, top=10):
+    pd.set_option("display.width", 160)
+    print(f"\nCross-validation ({results['fold'].nunique()} rolling-origin folds), best {top} by MAE:")
+    print(summary.head(top).round(4).to_string())
+    best = summary.index[0]
+    print(f"\nFolds of configuration {best}:")
+    print(results[results["config"] == best].drop(columns="config").round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the XGBoost price model.")
+    parser.add_argument("--encoding", choices=ENCODINGS, default="onehot",
+                        help="how the vegetable is fed to the model")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="recursive",
+                        help="one-step model for recursive forecasting, or a direct "
+                             f"multi-horizon model (saved as {os.path.basename(DIRECT_MODEL_PATH)})")
+    parser.add_argument("--data", default="../data/final_training_data.csv",
+                        help="training CSV, used when there is no feature store")
+    parser.add_argument("--store", default=STORE_DIR, help="Parquet feature store written by organizedData.py")
+    parser.add_argument("--params", help="JSON file of XGBoost parameters to train with "
+                                         f"(e.g. {BEST_PARAMS_PATH} from --search)")
+    parser.add_argument("--search", type=int, default=0, metavar="N",
+                        help="cross-validate N configurations (XGB_PARAMS plus N-1 random ones) "
+                             f"before training, then train with the best; writes {BEST_PARAMS_PATH} "
+                             f"and {SEARCH_RESULTS_PATH}")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--fold-days", type=int, default=FOLD_DAYS)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel configurations (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random configurations")
+    args = parser.parse_args()
+
+    if args.strategy == "direct":
+        df = direct_training_frame(load_training_data("categorical", args.data, args.store))
+        if args.encoding == "onehot":
+            df = to_one_hot(df)
+    else:
+        df = load_training_data(args.encoding, args.data, args.store)
+    (X_train, y_train), (X_test, y_test) = train_test_split_by_date(df)
+
+    print("Train samples:", len(X_train))
+    print("Test samples:", len(X_test))
+
+    params = load_params(args.params) if args.params else {}
+    if args.search:
+        # Folds come from the training period only; the test split stays unseen
+        folds = rolling_origin_folds(df.loc[X_train.index, "date"], args.folds, args.fold_days)
+        configs = sample_params(args.search, args.seed)
+        t0 = time.perf_counter()
+        results = search(X_train, y_train, folds, configs, args.encoding, args.workers)
+        summary = summarize(results, configs)
+        print_search(results, summary)
+        print(f"Search took {time.perf_counter() - t0:.1f}s")
+
+        params = best_params(summary, configs)
+        results.to_csv(SEARCH_RESULTS_PATH, index=False)
+        save_params(params, encoding=args.encoding, folds=args.folds, fold_days=args.fold_days,
+                    cv_mae=float(summary["mae"].iloc[0]), cv_rmse=float(summary["rmse"].iloc[0]))
+        print("Best parameters saved as", BEST_PARAMS_PATH)
+
+    model = make_model(args.encoding, **params)
+    model.fit(X_train, y_train)
+
+    mae, rmse, r2 = evaluate(model, X_test, y_test)
 
-mae = mean_absolute_error(y_test, preds)
-rmse = np.sqrt(mean_squared_error(y_test, preds))  # version-independent RMSE
-r2  = r2_score(y_test, preds)
+    print("Model Evaluation")
+    print("MAE :", round(mae, 2))
+    print("RMSE:", round(rmse, 2))
+    print("R²  :", round(r2, 4))
 
-print("Model Evaluation")
-print("MAE :", round(mae, 2))
-print("RMSE:", round(rmse, 2))
-print("R²  :", round(r2, 4))
+    if args.strategy == "direct":
+        print("MAE by horizon:", mae_by_horizon(model, X_test, y_test).round(2).to_dict())
+        # Native format only; the horizon range (and categories) travel with the model
+        categories = list(X_train["vegetable"].cat.categories) if args.encoding == "categorical" else None
+        save_native_model(model, X_train.columns, DIRECT_MODEL_PATH,
+                          categories=categories, max_horizon=FORECAST_DAYS)
+        print("Model saved as", DIRECT_MODEL_PATH)
+    elif args.encoding == "categorical":
+        # Native format only; the vegetable categories travel with the model
+        save_native_model(model, X_train.columns, CATEGORICAL_MODEL_PATH,
+                          categories=list(X_train["vegetable"].cat.categories))
+        print("Model saved as", CATEGORICAL_MODEL_PATH)
+    else:
+        # SAVE MODEL
+        joblib.dump(model, "xgboost_price_model.pkl")
+        print("Model saved as xgboost_price_model.pkl")
 
-# SAVE MODEL
-joblib.dump(model, "xgboost_price_model.pkl")
-print("Model saved as xgboost_price_model.pkl")
 
+        # Save feature names for future prediction
+        joblib.dump(list(X_train.columns), "model_features.pkl")
+        print("model_features.pkl saved")
 
-# Save feature names for future prediction
-joblib.dump(list(X_train.columns), "model_features.pkl")
-print("model_features.pkl saved")
\ No newline at end of file
+        # Native XGBoost format with the feature list embedded; this is what the
+        # forecaster loads (no joblib/sklearn needed at prediction time)
+        save_native_model(model, X_train.columns, "xgboost_price_model.ubj")
+        print("Model saved as xgboost_price_model.ubj")
@@ -0,0 +1,73 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(TESTS_DIR, "..", "models")
+# A month of Kalimati prices, Pokhara rainfall and holidays (copies of data/*_1.csv),
+# and features.csv, what the original organizedData.py script made of them
+FIXTURES_DIR = os.path.join(TESTS_DIR, "fixtures")
+sys.path.insert(0, MODELS_DIR)
+
+from feature_store import read_store  # noqa: E402
+from organizedData import state_path  # noqa: E402
+
+DATE_FORMATS = {"prices.csv": "%m/%d/%Y", "rainfall.csv": "%Y-%m-%d", "holidays.csv": "%m/%d/%Y"}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    """Copies of the fixture CSVs: {"prices"|"rainfall"|"holidays": path}."""
+    paths = {}
+    for name in DATE_FORMATS:
+        paths[name.split(".")[0]] = str(tmp_path / name)
+        shutil.copy(os.path.join(FIXTURES_DIR, name), tmp_path / name)
+    return paths
+
+
+def write_until(name, path, until=None, drop=None):
+    """Write fixture `name` to `path` with only the rows dated up to `until`, minus the `drop` dates."""
+    df = pd.read_csv(os.path.join(FIXTURES_DIR, name), dtype=str)
+    dates = pd.to_datetime(df["date"], format=DATE_FORMATS[name])
+    keep = pd.Series(True, index=df.index)
+    if until is not None:
+        keep &= dates <= pd.Timestamp(until)
+    if drop is not None:
+        keep &= ~dates.isin(pd.to_datetime(drop))
+    df[keep].to_csv(path, index=False)
+    return path
+
+
+def build(out_dir, sources, append=False):
+    """Run organizedData.py into out_dir; returns its output."""
+    os.makedirs(out_dir, exist_ok=True)
+    csv_path, store_dir = outputs(out_dir)
+    cmd = [
+        sys.executable, os.path.join(MODELS_DIR, "organizedData.py"),
+        "--prices", sources["prices"], "--rain", sources["rainfall"], "--holidays", sources["holidays"],
+        "--output", csv_path, "--store", store_dir,
+        "--exogenous", os.path.join(out_dir, "exogenous.npz"),
+    ]
+    if append:
+        cmd.append("--append")
+    return subprocess.run(cmd, cwd=MODELS_DIR, check=True, capture_output=True, text=True).stdout
+
+
+def outputs(out_dir):
+    """(feature CSV, Parquet store) written by build() into out_dir."""
+    return os.path.join(out_dir, "features.csv"), os.path.join(out_dir, "store")
+
+
+def assert_same_store(a, b):
+    """Two (feature CSV, store) pairs hold the same CSV bytes, state and store rows."""
+    (csv_a, store_a), (csv_b, store_b) = a, b
+    with open(csv_a, "rb") as f, open(csv_b, "rb") as g:
+        assert f.read() == g.read()
+    with open(state_path(csv_a)) as f, open(state_path(csv_b)) as g:
+        assert json.load(f) == json.load(g)
+    pd.testing.assert_frame_equal(read_store(store_dir=store_a), read_store(store_dir=store_b))
@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import FIXTURES_DIR, assert_same_store, build, outputs, write_until
+from organizedData import (RAIN_DATE_FORMATS, RAIN_SCHEMA, daily_rainfall, read_daily_rainfall, read_typed_csv,
+                           stream_features)
+
+
+def test_rebuild_matches_original_script(tmp_path, sources):
+    build(tmp_path / "rebuilt", sources)
+    rebuilt = pd.read_csv(outputs(tmp_path / "rebuilt")[0], dtype=str)
+    original = pd.read_csv(os.path.join(FIXTURES_DIR, "features.csv"), dtype=str)
+
+    # Same text in every column, whole-number prices included ("350", not "350.0")
+    mean = "avg_price_7d_mean"
+    pd.testing.assert_frame_equal(rebuilt.drop(columns=mean), original.drop(columns=mean))
+    # The weekly mean sums each window on its own instead of pandas' running
+    # sum (see add_lag_features), so a few rows differ in the last bit
+    np.testing.assert_allclose(rebuilt[mean].astype(float), original[mean].astype(float), rtol=1e-14, atol=0)
+
+
+def test_streaming_rebuild_matches_rebuild(tmp_path, sources):
+    # 4 KB blocks, so the integer price columns have to be typed across blocks
+    os.makedirs(tmp_path / "streamed")
+    csv_path, store_dir = outputs(tmp_path / "streamed")
+    stream_features(sources["prices"], sources["rainfall"], sources["holidays"], csv_path, store_dir,
+                    block_size=4096)
+
+    build(tmp_path / "rebuilt", sources)
+    assert_same_store((csv_path, store_dir), outputs(tmp_path / "rebuilt"))
+
+
+def test_streamed_daily_rainfall_matches_whole_file(tmp_path):
+    # Hourly readings in 512-byte blocks: most days straddle a block boundary
+    hours = pd.date_range("2024-01-01", periods=24 * 30, freq="h")
+    rain = pd.DataFrame({"date": hours.strftime("%m/%d/%Y %H:%M:%S"),
+                         "rainfall_mm": np.random.default_rng(0).random(len(hours)).round(4)})
+    rain.to_csv(tmp_path / "rain.csv", index=False)
+
+    streamed = read_daily_rainfall(tmp_path / "rain.csv", block_size=512)
+    whole = daily_rainfall(read_typed_csv(tmp_path / "rain.csv", RAIN_SCHEMA, RAIN_DATE_FORMATS))
+    assert len(streamed) == 30
+    # To the bit, or the exogenous digest of a --stream build would not match
+    pd.testing.assert_frame_equal(streamed, whole, check_exact=True)
+
+
+def test_append_new_prices_matches_rebuild(tmp_path, sources):
+    early = dict(sources, prices=write_until("prices.csv", tmp_path / "early.csv", "2026-01-28"))
+    build(tmp_path / "appended", early)
+    assert "Appended" in build(tmp_path / "appended", sources, append=True)
+
+    build(tmp_path / "rebuilt", sources)
+    assert_same_store(outputs(tmp_path / "appended"), outputs(tmp_path / "rebuilt"))
+
+
+@pytest.mark.parametrize("late", ["rainfall", "holidays"])
+def test_late_exogenous_data_rebuilds(tmp_path, sources, late):
+    # Prices up to the 28th arrive before rainfall after the 26th / the 23rd's holiday
+    early = dict(sources, prices=write_until("prices.csv", tmp_path / "early.csv", "2026-01-28"))
+    if late == "rainfall":
+        early["rainfall"] = write_until("rainfall.csv", tmp_path / "early_rain.csv", "2026-01-26")
+    else:
+        early["holidays"] = write_until("holidays.csv", tmp_path / "early_holidays.csv", drop=["2026-01-23"])
+    build(tmp_path / "appended", early)
+    assert "Append not possible" in build(tmp_path / "appended", sources, append=True)
+
+    build(tmp_path / "rebuilt", sources)
+    assert_same_store(outputs(tmp_path / "appended"), outputs(tmp_path / "rebuilt"))
@@ -0,0 +1,35 @@
+import json
+
+import pandas as pd
+import pytest
+
+from plotting import HASHES_FILE, render_plots
+
+
+def frames(vegetables):
+    """(history, forecast) for a week of prices and a 3-day forecast per vegetable."""
+    history = pd.DataFrame({
+        "date": list(pd.date_range("2026-01-01", periods=7)) * len(vegetables),
+        "vegetable": [veg for veg in vegetables for _ in range(7)],
+        "avg_price": [float(10 * i + d) for i in range(len(vegetables)) for d in range(7)],
+    })
+    forecast = pd.DataFrame({
+        "date": list(pd.date_range("2026-01-08", periods=3)) * len(vegetables),
+        "vegetable": [veg for veg in vegetables for _ in range(3)],
+        "predicted_price": [float(10 * i + 7) for i in range(len(vegetables)) for _ in range(3)],
+    })
+    return history, forecast
+
+
+def test_failed_plot_keeps_the_others(tmp_path):
+    # "Missing/Dir" points into a directory that does not exist, so its savefig fails
+    history, forecast = frames(["Tomato", "Missing/Dir", "Onion"])
+    with pytest.raises(RuntimeError, match="1 of 3 plots failed: Missing/Dir"):
+        render_plots(history, forecast, str(tmp_path), workers=2)
+    with open(tmp_path / HASHES_FILE) as f:
+        assert sorted(json.load(f)) == ["Onion", "Tomato"]
+    assert not (tmp_path / (HASHES_FILE + ".tmp")).exists()
+
+    # The plots that rendered are not rendered again
+    history, forecast = (df[df["vegetable"] != "Missing/Dir"] for df in (history, forecast))
+    assert render_plots(history, forecast, str(tmp_path), workers=2) == ([], ["Tomato", "Onion"])
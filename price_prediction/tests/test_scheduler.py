@@ -0,0 +1,138 @@
+import os
+import shutil
+import threading
+
+import pandas as pd
+import pytest
+
+import scheduler
+from conftest import FIXTURES_DIR, MODELS_DIR, assert_same_store, build, outputs, write_until
+from scheduler import STATE_FILE, Stage, run_cycle
+
+STAGES = ["ingest_prices", "ingest_rainfall", "ingest_holidays", "features", "forecast", "plot"]
+
+
+def make_workspace(tmp_path, rain_until=None):
+    """Data dir with prices up to the 28th; returns (data_dir, sources, stages, state path)."""
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    sources = {name: str(data_dir / filename) for name, filename in scheduler.SOURCES.items()}
+    write_until("prices.csv", sources["prices"], "2026-01-28")
+    write_until("rainfall.csv", sources["rainfall"], rain_until)
+    shutil.copy(os.path.join(FIXTURES_DIR, "holidays.csv"), sources["holidays"])
+    # Forecasts with the repo's model; without --retrain nothing is written to MODELS_DIR
+    stages = scheduler.pipeline(str(data_dir), str(tmp_path / "plots"), MODELS_DIR)
+    return data_dir, sources, stages, str(data_dir / STATE_FILE)
+
+
+def drop(data_dir, source, name, fixture, after):
+    """Put the rows of `fixture` dated after `after` into the source's inbox."""
+    inbox = data_dir / scheduler.INBOX_DIR / source
+    inbox.mkdir(parents=True, exist_ok=True)
+    df = pd.read_csv(os.path.join(FIXTURES_DIR, fixture), dtype=str)
+    df[pd.to_datetime(df["date"], format="mixed") > pd.Timestamp(after)].to_csv(inbox / name, index=False)
+    return inbox / name
+
+
+def ran(status):
+    return sorted(name for name, s in status.items() if s == "ran")
+
+
+def test_cycles(tmp_path):
+    data_dir, sources, stages, state = make_workspace(tmp_path)
+    assert [s.name for s in stages] == STAGES
+
+    # Cold: nothing built yet, every stage runs
+    assert ran(run_cycle(stages, state)) == sorted(STAGES)
+    assert os.path.exists(data_dir / "forecasts" / "latest.json")
+
+    # Idle: no new files, nothing runs
+    assert set(run_cycle(stages, state).values()) == {"unchanged"}
+
+    # A new price file: its ingest and everything downstream of it
+    path = drop(data_dir, "prices", "week.csv", "prices.csv", "2026-01-28")
+    rows = sum(1 for _ in open(sources["prices"]))
+    status = run_cycle(stages, state)
+    assert ran(status) == ["features", "forecast", "ingest_prices", "plot"]
+    assert status["ingest_rainfall"] == status["ingest_holidays"] == "unchanged"
+    assert not path.exists() and (path.parent / scheduler.PROCESSED_DIR / "week.csv").exists()
+    assert sum(1 for _ in open(sources["prices"])) > rows
+
+    # The same file again adds no rows, so the stages after ingest are skipped
+    drop(data_dir, "prices", "week.csv", "prices.csv", "2026-01-28")
+    status = run_cycle(stages, state)
+    assert ran(status) == ["ingest_prices"]
+    assert {status[n] for n in ["features", "forecast", "plot"]} == {"unchanged"}
+
+    # Forced: without the recorded fingerprints every stage runs again
+    os.remove(state)
+    assert ran(run_cycle(stages, state)) == sorted(STAGES)
+
+
+def test_late_rainfall_rebuilds_features(tmp_path):
+    # Prices up to the 28th are in the store before rainfall after the 26th arrives
+    data_dir, sources, stages, state = make_workspace(tmp_path, rain_until="2026-01-26")
+    run_cycle(stages, state)
+    drop(data_dir, "rainfall", "late.csv", "rainfall.csv", "2026-01-26")
+
+    status = run_cycle(stages, state)
+    assert ran(status) == ["features", "forecast", "ingest_rainfall", "plot"]
+    build(tmp_path / "rebuilt", sources)
+    features = (str(data_dir / "final_training_data.csv"), str(data_dir / "feature_store"))
+    assert_same_store(features, outputs(tmp_path / "rebuilt"))
+
+
+def test_ingest_stages_are_independent(tmp_path):
+    _, _, stages, _ = make_workspace(tmp_path)
+    deps = {s.name: s.deps for s in stages}
+    assert deps["ingest_prices"] == deps["ingest_rainfall"] == deps["ingest_holidays"] == []
+    assert sorted(deps["features"]) == ["ingest_holidays", "ingest_prices", "ingest_rainfall"]
+
+
+@pytest.mark.parametrize("workers", [None, 1])
+def test_independent_stages_run_in_parallel(tmp_path, workers):
+    # Each action waits for the other two; run one at a time, they time out
+    barrier = threading.Barrier(3, timeout=2)
+
+    def wait_for_others():
+        barrier.wait()
+
+    stages = [Stage(f"stage_{i}", wait_for_others) for i in range(3)]
+    stages.append(Stage("after", lambda: None, deps=[s.name for s in stages]))
+
+    status = run_cycle(stages, str(tmp_path / STATE_FILE), workers)
+    if workers is None:
+        assert set(status.values()) == {"ran"}
+    else:
+        assert status["after"] == "blocked"
+
+
+def test_unchanged_inputs_skip_downstream(tmp_path):
+    source = tmp_path / "source.txt"
+    source.write_text("a")
+    cycles = iter(range(100))
+    stages = [
+        Stage("upstream", lambda: None, key=lambda: next(cycles)),  # due every cycle
+        Stage("downstream", lambda: None, inputs=[str(source)], deps=["upstream"]),
+    ]
+    state = str(tmp_path / STATE_FILE)
+
+    assert run_cycle(stages, state) == {"upstream": "ran", "downstream": "ran"}
+    assert run_cycle(stages, state) == {"upstream": "ran", "downstream": "unchanged"}
+    source.write_text("ab")
+    assert run_cycle(stages, state) == {"upstream": "ran", "downstream": "ran"}
+
+
+def test_failed_stage_blocks_downstream_and_is_retried(tmp_path):
+    fail = [True]
+
+    def flaky():
+        if fail[0]:
+            raise RuntimeError("source unavailable")
+
+    stages = [Stage("upstream", flaky), Stage("downstream", lambda: None, deps=["upstream"])]
+    state = str(tmp_path / STATE_FILE)
+
+    assert run_cycle(stages, state) == {"upstream": "failed", "downstream": "blocked"}
+    fail[0] = False
+    assert run_cycle(stages, state) == {"upstream": "ran", "downstream": "ran"}